@@ -1,24 +1,50 @@
+import os
+
 from flask import Flask
-from app.extensions import db
-# NO importar api_bp si no existe
+from config import Config
+from app.extensions import db, sqlite_engine_options, resolve_sqlite_paths, configure_sqlite_pragmas, configure_template_cache
 from app.web_views import web_bp
+from app.api_views import api_bp
+from app.commands import register_commands
+from app.audit import audit_log
+from app.metrics import init_metrics
+from app.query_diagnostics import init_query_diagnostics
+from app.snapshot import read_snapshot
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
     
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = 'tu-clave-secreta-super-segura-12345'
+    # Configuración desde config.Config (cada valor admite override por variable de entorno)
+    app.config.from_object(config_class)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(app)
+    resolve_sqlite_paths(app)
     
     db.init_app(app)
+    configure_sqlite_pragmas(app)
+    configure_template_cache(app)
+    init_metrics(app)
+    init_query_diagnostics(app)
+    audit_log.init_app(app)
+    read_snapshot.init_app(app)
     
-    # SOLO registrar web_bp
     app.register_blueprint(web_bp)
-    # NO registrar api_bp
-    
+    # API JSON versionada (/api/v1), incluye auth_bp en /api/v1/auth
+    app.register_blueprint(api_bp)
+
+    register_commands(app)
+
+    # Sin acceso a la base al arrancar: el esquema se crea con `flask init-db`
+    return app
+
+
+def init_db(app):
+    """Crea las tablas, el índice de búsqueda y las columnas/índices que falten (idempotente)."""
     with app.app_context():
-        from app.models import User, Product, Supplier
+        # Las bases con ruta relativa viven en instance/ (ver resolve_sqlite_paths);
+        # solo se crean los directorios de las bases, no instance/ si no se usa
+        for engine in db.engines.values():
+            if engine.url.get_backend_name() == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+                os.makedirs(os.path.dirname(engine.url.database), exist_ok=True)
+        from app.models import User, Product, Supplier, EntityCounts, TableVersion, AuditLog, StockMovement, DailySales, ProductSales, \
+            LowStockWatch, StockAlert
         db.create_all()
-        print("✅ Base de datos inicializada correctamente")
-    
-    return app
\ No newline at end of file
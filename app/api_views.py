@@ -0,0 +1,193 @@
+import math
+
+from flask import Blueprint, request, jsonify
+
+from app.auth_views import auth_bp, api_role_required
+from app.controllers.auth_controller import AuthController
+from app.controllers.product_controller import ProductController
+from app.controllers.sales_controller import SalesController
+from app.controllers.stock_controller import StockController
+from app.controllers.supplier_controller import SupplierController
+from app.http_cache import conditional_json, gzip_response
+from app.models import Product, Supplier, User
+
+# API JSON versionada: /api/v1/...
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+# Login/registro y CRUD de usuarios en /api/v1/auth/...
+api_bp.register_blueprint(auth_bp, url_prefix='/auth')
+
+PRODUCT_TABLES = (Product.__tablename__, Supplier.__tablename__)
+SUPPLIER_TABLES = (Supplier.__tablename__,)
+USER_TABLES = (User.__tablename__,)
+# Campos numéricos del producto -> conversión
+PRODUCT_NUMBER_FIELDS = {'price': float, 'stock': int, 'reorder_threshold': int}
+
+
+@api_bp.after_request
+def compress_response(response):
+    return gzip_response(response)
+
+
+def _status(result, ok=200, error=400):
+    return ok if result['success'] else error
+
+
+def _json_object():
+    """Cuerpo JSON de la petición si es un objeto, o None (lista, escalar o null)."""
+    data = request.get_json()
+    return data if isinstance(data, dict) else None
+
+
+def _product_numbers(data):
+    """price, stock y reorder_threshold de `data` convertidos (None si faltan), o None si alguno no es un número."""
+    numbers = {}
+    for field, convert in PRODUCT_NUMBER_FIELDS.items():
+        value = data.get(field)
+        if value is None:
+            numbers[field] = None
+            continue
+        if isinstance(value, bool) or (convert is int and isinstance(value, float) and not value.is_integer()):
+            return None
+        try:
+            numbers[field] = convert(value)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(numbers[field]):
+            return None
+    return numbers
+
+
+# --- Usuarios (solo lectura condicional; la escritura está en /auth/users) ---
+@api_bp.route('/users', methods=['GET'])
+@api_role_required(['admin'])
+def list_users():
+    return conditional_json(USER_TABLES, AuthController.get_all_users)
+
+@api_bp.route('/users/<int:user_id>', methods=['GET'])
+@api_role_required(['admin'])
+def get_user(user_id):
+    return conditional_json(USER_TABLES, lambda: AuthController.get_user_by_id(user_id))
+
+
+# --- Productos ---
+@api_bp.route('/products', methods=['GET'])
+@api_role_required(['admin', 'subadmin'])
+def list_products():
+    after_id = request.args.get('after', type=int)
+    per_page = request.args.get('per_page', type=int)
+    filters = ProductController.parse_filters(request.args)
+    return conditional_json(PRODUCT_TABLES, lambda: ProductController.get_products_page(after_id=after_id, per_page=per_page, **filters))
+
+@api_bp.route('/products/<int:product_id>', methods=['GET'])
+@api_role_required(['admin', 'subadmin'])
+def get_product(product_id):
+    return conditional_json(PRODUCT_TABLES, lambda: ProductController.get_product_by_id(product_id))
+
+@api_bp.route('/products', methods=['POST'])
+@api_role_required(['admin'])
+def create_product():
+    data = _json_object() or {}
+    if not data.get('name') or data.get('price') is None:
+        return jsonify({'success': False, 'message': 'Faltan datos'}), 400
+    numbers = _product_numbers(data)
+    if numbers is None:
+        return jsonify({'success': False, 'message': 'Precio, stock o umbral inválido'}), 400
+    result = ProductController.create_product(data['name'], data.get('description'), numbers['price'],
+                                              numbers['stock'] or 0, data.get('supplier_id'),
+                                              numbers['reorder_threshold'])
+    return jsonify(result), _status(result, 201)
+
+@api_bp.route('/products/<int:product_id>', methods=['PUT'])
+@api_role_required(['admin', 'subadmin'])
+def update_product(product_id):
+    data = _json_object()
+    if data is None:
+        return jsonify({'success': False, 'message': 'Datos inválidos'}), 400
+    numbers = _product_numbers(data)
+    if numbers is None:
+        return jsonify({'success': False, 'message': 'Precio, stock o umbral inválido'}), 400
+    result = ProductController.update_product(product_id, data.get('name'), data.get('description'),
+                                              numbers['price'], numbers['stock'], data.get('supplier_id'),
+                                              numbers['reorder_threshold'])
+    return jsonify(result), _status(result)
+
+@api_bp.route('/products/<int:product_id>', methods=['DELETE'])
+@api_role_required(['admin'])
+def delete_product(product_id):
+    result = ProductController.delete_product(product_id)
+    return jsonify(result), _status(result, error=404)
+
+
+@api_bp.route('/stock/adjust', methods=['POST'])
+@api_role_required(['admin', 'subadmin'])
+def adjust_stock():
+    # {"lines": [{"product_id": 1, "delta": -2}, ...]} aplicado todo o nada
+    data = _json_object()
+    lines = data.get('lines') if data is not None else None
+    if not isinstance(lines, list) or not lines:
+        return jsonify({'success': False, 'message': 'Formato de líneas inválido'}), 400
+    try:
+        lines = [(int(line['product_id']), int(line['delta'])) for line in lines]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Formato de líneas inválido'}), 400
+    result = ProductController.adjust_stock(lines)
+    return jsonify(result), _status(result, error=409)
+
+
+# --- Ventas y reposiciones (libro de movimientos) ---
+@api_bp.route('/sales', methods=['POST'])
+@api_role_required(['admin', 'subadmin'])
+def record_sales():
+    # {"kind": "sale", "lines": [{"product_id": 1, "quantity": 2, "unit_price": 9.5}, ...]} todo o nada
+    data = _json_object()
+    if data is None:
+        return jsonify({'success': False, 'message': 'Formato de líneas inválido'}), 400
+    result = SalesController.record_movements(data.get('lines') or [], data.get('kind', 'sale'))
+    if not result['success'] and 'product_id' not in result:
+        return jsonify(result), 400
+    return jsonify(result), _status(result, ok=201, error=409)
+
+
+@api_bp.route('/stock/alerts', methods=['GET'])
+@api_role_required(['admin', 'subadmin'])
+def stock_alerts():
+    # Consulta periódica: ?after=<last_id de la respuesta anterior>
+    result = StockController.get_alerts(after_id=request.args.get('after', type=int),
+                                        limit=request.args.get('limit', type=int))
+    return jsonify(result)
+
+
+# --- Proveedores ---
+@api_bp.route('/suppliers', methods=['GET'])
+@api_role_required(['admin'])
+def list_suppliers():
+    return conditional_json(SUPPLIER_TABLES, SupplierController.get_all_suppliers)
+
+@api_bp.route('/suppliers/<int:supplier_id>', methods=['GET'])
+@api_role_required(['admin'])
+def get_supplier(supplier_id):
+    return conditional_json(SUPPLIER_TABLES, lambda: SupplierController.get_supplier_by_id(supplier_id))
+
+@api_bp.route('/suppliers', methods=['POST'])
+@api_role_required(['admin'])
+def create_supplier():
+    data = _json_object() or {}
+    if not data.get('name'):
+        return jsonify({'success': False, 'message': 'Faltan datos'}), 400
+    result = SupplierController.create_supplier(data['name'], data.get('contact_person'),
+                                                data.get('phone'), data.get('email'))
+    return jsonify(result), _status(result, 201)
+
+@api_bp.route('/suppliers/<int:supplier_id>', methods=['PUT'])
+@api_role_required(['admin'])
+def update_supplier(supplier_id):
+    data = _json_object() or {}
+    result = SupplierController.update_supplier(supplier_id, data.get('name'), data.get('contact_person'),
+                                                data.get('phone'), data.get('email'))
+    return jsonify(result), _status(result)
+
+@api_bp.route('/suppliers/<int:supplier_id>', methods=['DELETE'])
+@api_role_required(['admin'])
+def delete_supplier(supplier_id):
+    result = SupplierController.delete_supplier(supplier_id)
+    return jsonify(result), _status(result)
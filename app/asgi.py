@@ -0,0 +1,314 @@
+"""API de solo lectura sobre asyncio para clientes que consultan con mucha frecuencia.
+
+Atiende con Starlette y aiosqlite los GET de productos, proveedores y
+alertas de stock de /api/v1 con las mismas rutas, permisos, ETag y JSON que
+la API de Flask. La sesión es la cookie firmada de Flask (mismo SECRET_KEY),
+así que se inicia sesión en la aplicación normal y se consulta aquí.
+
+Una conexión ociosa es solo un socket en el event loop: miles de clientes
+con keep-alive o esperando en /stock/alerts?wait=N no ocupan workers ni
+conexiones a la base (el pool se usa solo mientras corre la consulta). Las
+escrituras siguen en la aplicación WSGI (run.py).
+
+Dependencias opcionales: `pip install aiosqlite starlette uvicorn`. Para
+varios workers se sirve con gunicorn (ver gunicorn_asgi.conf.py).
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+
+from itsdangerous import BadSignature
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import http_date, parse_date, parse_etags, quote_etag
+
+from app import create_app
+from app.controllers.product_controller import (DEFAULT_PER_PAGE, MAX_PER_PAGE, ProductController,
+                                                products_page_result, products_page_statement)
+from app.controllers.stock_controller import LOW_STOCK_COUNT, alerts_result, alerts_statement, clamp_alerts_limit
+from app.extensions import db
+from app.http_cache import describe_versions, is_not_modified, version_etag
+from app.models import Product, StockAlert, Supplier, TableVersion, User
+from app.role_cache import DEFAULT_TTL, DEFAULT_VERSION_TTL, role_cache
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_TABLES = (Product.__tablename__, Supplier.__tablename__)
+SUPPLIER_TABLES = (Supplier.__tablename__,)
+DEFAULTS = {
+    'ASYNC_DB_POOL_SIZE': 8,
+    'ASYNC_DB_MAX_OVERFLOW': 8,
+    'ASYNC_DB_POOL_TIMEOUT': 30,
+    'ASYNC_ALERTS_MAX_WAIT': 30.0,
+    'ASYNC_ALERTS_POLL_INTERVAL': 0.5,
+}
+
+
+def json_response(data, status=200):
+    # Mismos bytes que jsonify de Flask (claves ordenadas, compacto, ASCII)
+    body = json.dumps(data, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n'
+    return Response(body, status_code=status, media_type='application/json')
+
+
+class AlertWatcher:
+    """Último id de stock_alerts, consultado por una sola tarea para todos los long-poll.
+
+    Mientras haya clientes esperando lee max(id) (clave primaria) cada
+    `interval` segundos y despierta a los que esperan cuando cambia; sin
+    clientes esperando no consulta la base.
+    """
+
+    def __init__(self, sessions, interval):
+        self.sessions = sessions
+        self.interval = interval
+        self.last_id = None
+        self.waiting = 0
+        self.polls = 0
+        self._changed = asyncio.Event()
+        self._has_waiters = asyncio.Event()
+
+    async def run(self):
+        while True:
+            await self._has_waiters.wait()
+            try:
+                async with self.sessions() as session:
+                    last_id = await session.scalar(select(func.max(StockAlert.id)))
+                self.polls += 1
+            except Exception as error:  # la próxima vuelta lo reintenta
+                logger.error('No se pudo consultar stock_alerts: %s', error)
+            else:
+                if last_id is not None and last_id != self.last_id:
+                    self.last_id = last_id
+                    changed, self._changed = self._changed, asyncio.Event()
+                    changed.set()
+            await asyncio.sleep(self.interval)
+
+    async def wait_after(self, after_id, timeout):
+        """Espera hasta `timeout` segundos a que haya alertas con id > `after_id`."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        self.waiting += 1
+        self._has_waiters.set()
+        try:
+            while self.last_id is None or self.last_id <= after_id:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return False
+            return True
+        finally:
+            self.waiting -= 1
+            if not self.waiting:
+                self._has_waiters.clear()
+
+
+class AsyncReadAPI:
+    """Rutas GET de /api/v1 sobre un engine aiosqlite de solo lectura."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = {key: flask_app.config.get(key, default) for key, default in DEFAULTS.items()}
+        with flask_app.app_context():
+            # URL ya resuelta por Flask-SQLAlchemy (las rutas relativas van a instance/)
+            url = db.engine.url
+        if url.get_backend_name() != 'sqlite':
+            raise RuntimeError('La API asíncrona solo admite SQLite (aiosqlite)')
+        self.engine = create_async_engine(
+            url.set(drivername='sqlite+aiosqlite'),
+            pool_size=self.config['ASYNC_DB_POOL_SIZE'],
+            max_overflow=self.config['ASYNC_DB_MAX_OVERFLOW'],
+            pool_timeout=self.config['ASYNC_DB_POOL_TIMEOUT'],
+        )
+        _configure_read_pragmas(self.engine.sync_engine, flask_app)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.alerts = AlertWatcher(self.sessions, self.config['ASYNC_ALERTS_POLL_INTERVAL'])
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.cookie_name = flask_app.config['SESSION_COOKIE_NAME']
+        self.session_max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        self.role_ttl = flask_app.config.get('ROLE_CACHE_TTL', DEFAULT_TTL)
+        self.role_version_ttl = flask_app.config.get('ROLE_CACHE_VERSION_TTL', DEFAULT_VERSION_TTL)
+
+    # --- Autorización (misma cookie y mismos mensajes que api_role_required) ---
+    def _user_id(self, request):
+        cookie = request.cookies.get(self.cookie_name)
+        if not cookie:
+            return None
+        try:
+            return self.serializer.loads(cookie, max_age=self.session_max_age).get('user_id')
+        except BadSignature:
+            return None
+
+    async def _deny(self, request, session, roles):
+        """Respuesta 401/403 si la petición no tiene uno de `roles`, o None."""
+        user_id = self._user_id(request)
+        if user_id is None:
+            return json_response({'success': False, 'message': 'Autenticación requerida'}, 401)
+        # Igual que RoleCache.get_role: la versión de `user` se relee como mucho cada
+        # ROLE_CACHE_VERSION_TTL segundos y el cache vale solo para esa versión
+        version = role_cache.cached_version()
+        if version is None:
+            version = await session.scalar(
+                select(TableVersion.version).where(TableVersion.name == User.__tablename__)) or 0
+            role_cache.remember_version(version, self.role_version_ttl)
+        role = role_cache.lookup(user_id, version)
+        if role is None:
+            role = await session.scalar(select(User.role).where(User.id == user_id))
+            role_cache.remember(user_id, role, version, self.role_ttl)
+        if role not in roles:
+            return json_response({'success': False, 'message': 'No tienes permiso para este recurso'}, 403)
+        return None
+
+    async def _conditional(self, request, session, table_names, build):
+        """Equivalente a http_cache.conditional_json: 304 sin consultar las filas si el ETag coincide."""
+        rows = (await session.execute(select(TableVersion).where(TableVersion.name.in_(table_names)))).scalars()
+        versions, last_modified = describe_versions(table_names, {row.name: row for row in rows})
+        etag = version_etag(versions, f'{request.url.path}?{request.url.query}')
+        if is_not_modified(etag, last_modified, parse_etags(request.headers.get('if-none-match')),
+                           parse_date(request.headers.get('if-modified-since'))):
+            response = Response(status_code=304)
+        else:
+            result = await build()
+            response = json_response(result, 200 if result.get('success', True) else 404)
+        response.headers['ETag'] = quote_etag(etag, weak=True)
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    # --- Productos ---
+    async def list_products(self, request):
+        args = MultiDict(request.query_params.multi_items())
+        after_id = args.get('after', type=int)
+        per_page = args.get('per_page', type=int) or self.flask_app.config.get('PRODUCTS_PER_PAGE', DEFAULT_PER_PAGE)
+        per_page = max(1, min(per_page, MAX_PER_PAGE))
+        filters = ProductController.parse_filters(args)
+
+        async def build():
+            stmt = products_page_statement(after_id, None, per_page, **filters)
+            products = [p.to_dict() for p in (await session.execute(stmt)).scalars()]
+            return products_page_result(products, per_page, after_id)
+
+        async with self.sessions() as session:
+            return (await self._deny(request, session, ('admin', 'subadmin'))
+                    or await self._conditional(request, session, PRODUCT_TABLES, build))
+
+    async def get_product(self, request):
+        product_id = request.path_params['product_id']
+
+        async def build():
+            product = await session.get(Product, product_id, options=[joinedload(Product.supplier)])
+            if not product:
+                return {'success': False, 'message': 'Producto no encontrado'}
+            return {'success': True, 'product': product.to_dict()}
+
+        async with self.sessions() as session:
+            return (await self._deny(request, session, ('admin', 'subadmin'))
+                    or await self._conditional(request, session, PRODUCT_TABLES, build))
+
+    # --- Proveedores ---
+    async def list_suppliers(self, request):
+        async def build():
+            suppliers = (await session.execute(select(Supplier))).scalars()
+            return {'success': True, 'suppliers': [s.to_dict() for s in suppliers]}
+
+        async with self.sessions() as session:
+            return (await self._deny(request, session, ('admin',))
+                    or await self._conditional(request, session, SUPPLIER_TABLES, build))
+
+    async def get_supplier(self, request):
+        supplier_id = request.path_params['supplier_id']
+
+        async def build():
+            supplier = await session.get(Supplier, supplier_id)
+            if not supplier:
+                return {'success': False, 'message': 'Proveedor no encontrado'}
+            return {'success': True, 'supplier': supplier.to_dict()}
+
+        async with self.sessions() as session:
+            return (await self._deny(request, session, ('admin',))
+                    or await self._conditional(request, session, SUPPLIER_TABLES, build))
+
+    # --- Alertas de stock ---
+    async def stock_alerts(self, request):
+        """GET /stock/alerts?after=<last_id>&wait=<segundos>.
+
+        Con `wait` y sin alertas nuevas la petición queda en espera (sin
+        conexión a la base) hasta que llegue una o venza el plazo, y recién
+        entonces consulta; así un cliente puede esperar sin reintentar.
+        """
+        args = MultiDict(request.query_params.multi_items())
+        after_id = args.get('after', type=int)
+        limit = clamp_alerts_limit(args.get('limit', type=int))
+        wait = min(max(args.get('wait', 0.0, type=float), 0.0), self.config['ASYNC_ALERTS_MAX_WAIT'])
+
+        async with self.sessions() as session:
+            denied = await self._deny(request, session, ('admin', 'subadmin'))
+            if denied:
+                return denied
+            rows = (await session.execute(alerts_statement(after_id, limit))).scalars().all()
+            if rows or after_id is None or not wait:
+                return json_response(alerts_result(rows, after_id, limit, await session.scalar(LOW_STOCK_COUNT)))
+        # Espera fuera de la sesión: no ocupa una conexión del pool
+        await self.alerts.wait_after(after_id, wait)
+        async with self.sessions() as session:
+            rows = (await session.execute(alerts_statement(after_id, limit))).scalars().all()
+            return json_response(alerts_result(rows, after_id, limit, await session.scalar(LOW_STOCK_COUNT)))
+
+    def routes(self):
+        return [
+            Route('/api/v1/products', self.list_products, methods=['GET']),
+            Route('/api/v1/products/{product_id:int}', self.get_product, methods=['GET']),
+            Route('/api/v1/suppliers', self.list_suppliers, methods=['GET']),
+            Route('/api/v1/suppliers/{supplier_id:int}', self.get_supplier, methods=['GET']),
+            Route('/api/v1/stock/alerts', self.stock_alerts, methods=['GET']),
+        ]
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        watcher = asyncio.create_task(self.alerts.run())
+        try:
+            yield
+        finally:
+            watcher.cancel()
+            await self.engine.dispose()
+
+
+def _configure_read_pragmas(engine, app):
+    # Solo lectura: las escrituras de la aplicación WSGI no compiten con esta conexión
+    pragmas = [
+        ('query_only', 'ON'),
+        ('busy_timeout', app.config.get('SQLITE_BUSY_TIMEOUT_MS')),
+        ('mmap_size', app.config.get('SQLITE_MMAP_SIZE')),
+        ('cache_size', app.config.get('SQLITE_CACHE_SIZE')),
+    ]
+    pragmas = [(name, value) for name, value in pragmas if value is not None]
+
+    @event.listens_for(engine, 'connect')
+    def _set_read_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def create_asgi_app(config_class=Config):
+    """Aplicación ASGI de solo lectura; reutiliza la configuración y los modelos de `create_app`."""
+    api = AsyncReadAPI(create_app(config_class))
+    middleware = [Middleware(GZipMiddleware, minimum_size=api.flask_app.config.get('API_GZIP_MIN_SIZE', 1024),
+                             compresslevel=6)]
+    app = Starlette(routes=api.routes(), middleware=middleware, lifespan=api.lifespan)
+    app.state.api = api
+    return app
+
@@ -0,0 +1,286 @@
+import atexit
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+from flask import has_request_context, request, session as web_session
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import AuditLog, Product, Supplier, User
+
+DEFAULTS = {
+    'AUDIT_BACKEND': 'table',
+    'AUDIT_DIR': None,
+    'AUDIT_QUEUE_SIZE': 10000,
+    'AUDIT_BATCH_SIZE': 500,
+    'AUDIT_FLUSH_INTERVAL': 1.0,
+    'AUDIT_ENQUEUE_TIMEOUT': 0.05,
+    'AUDIT_FILE_MAX_BYTES': 10 * 1024 * 1024,
+    'AUDIT_FILE_BACKUPS': 5,
+    'AUDIT_SHUTDOWN_TIMEOUT': 5.0,
+}
+AUDIT_BACKENDS = ('table', 'ndjson', 'none')
+
+AUDITED_MODELS = {User: 'user', Product: 'product', Supplier: 'supplier'}
+# Columnas que no se registran (la contraseña solo aparece como '***')
+IGNORED_COLUMNS = {'version'}
+SECRET_COLUMNS = {'password'}
+
+_STOP = object()
+
+
+class TableBackend:
+    """Escribe cada lote con un único INSERT executemany en `audit_log`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def write(self, events):
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(insert(AuditLog), events)
+
+
+class NDJSONBackend:
+    """Un archivo NDJSON por proceso, rotado por tamaño (audit-<pid>.ndjson.1, .2...)."""
+
+    def __init__(self, directory, max_bytes, backups):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'audit-{os.getpid()}.ndjson')
+
+    def _rotate(self, path):
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{path}.{n}'):
+                os.replace(f'{path}.{n}', f'{path}.{n + 1}')
+        if self.backups > 0:
+            os.replace(path, f'{path}.1')
+        else:
+            os.remove(path)
+
+    def write(self, events):
+        path = self.path
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+            self._rotate(path)
+        lines = ''.join(json.dumps(e, default=str, ensure_ascii=False) + '\n' for e in events)
+        with open(path, 'a', encoding='utf-8') as fh:
+            fh.write(lines)
+
+
+class AuditLogger:
+    """Cola en memoria acotada + hilo escritor que vuelca los eventos por lotes.
+
+    Las peticiones solo encolan: si la cola está llena esperan como mucho
+    `AUDIT_ENQUEUE_TIMEOUT` (backpressure) y después descartan el evento,
+    que queda contado en `dropped`. El hilo se arranca en el primer evento
+    (y de nuevo tras un fork) y vacía la cola al cerrar el proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.app = None
+        self.config = dict(DEFAULTS)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.config = {key: app.config.get(key, default) for key, default in DEFAULTS.items()}
+        if not self.config['AUDIT_DIR']:
+            self.config['AUDIT_DIR'] = os.path.join(app.instance_path, 'audit')
+
+    @property
+    def enabled(self):
+        return self.app is not None and self.config['AUDIT_BACKEND'] != 'none'
+
+    def _backend(self):
+        if self.config['AUDIT_BACKEND'] == 'ndjson':
+            return NDJSONBackend(self.config['AUDIT_DIR'], self.config['AUDIT_FILE_MAX_BYTES'],
+                                 self.config['AUDIT_FILE_BACKUPS'])
+        return TableBackend(self.app)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.config['AUDIT_QUEUE_SIZE'])
+                self._thread = threading.Thread(target=self._run, args=(self._queue, self._backend()),
+                                                name='audit-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def record(self, events):
+        if not self.enabled or not events:
+            return
+        self._ensure_started()
+        timeout = self.config['AUDIT_ENQUEUE_TIMEOUT']
+        for item in events:
+            try:
+                self._queue.put(item, timeout=timeout)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self, events_queue, backend):
+        batch_size = self.config['AUDIT_BATCH_SIZE']
+        interval = self.config['AUDIT_FLUSH_INTERVAL']
+        stopping = False
+        while not stopping:
+            try:
+                item = events_queue.get(timeout=interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    break
+                try:
+                    item = events_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(backend, batch)
+
+    def _write(self, backend, batch):
+        try:
+            backend.write(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as exc:  # el hilo escritor no debe morir por un lote
+            self.errors += 1
+            self.dropped += len(batch)
+            if self.app is not None:
+                self.app.logger.error('No se pudo escribir un lote de auditoría (%d eventos): %s', len(batch), exc)
+
+    def shutdown(self):
+        """Vacía la cola y detiene el hilo (se llama al salir del proceso)."""
+        with self._lock:
+            thread, events_queue = self._thread, self._queue
+            if thread is None or self._pid != os.getpid():
+                return
+            self._thread = self._queue = self._pid = None
+        # put bloqueante: el sentinela va detrás de todo lo encolado
+        events_queue.put(_STOP)
+        thread.join(self.config['AUDIT_SHUTDOWN_TIMEOUT'])
+
+    def stats(self):
+        pending = self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0
+        return {
+            'backend': self.config['AUDIT_BACKEND'],
+            'pending': pending,
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
+
+
+audit_log = AuditLogger()
+atexit.register(audit_log.shutdown)
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def make_event(action, entity, entity_id=None, details=None):
+    """Evento con el actor, la IP y la ruta de la petición actual."""
+    event_data = {
+        'created_at': _now(),
+        'actor_id': None,
+        'actor': None,
+        'action': action,
+        'entity': entity,
+        'entity_id': entity_id,
+        'details': json.dumps(details, default=str, ensure_ascii=False) if details else None,
+        'ip': None,
+        'path': None,
+    }
+    if has_request_context():
+        event_data.update(actor_id=web_session.get('user_id'), actor=web_session.get('username'),
+                          ip=request.remote_addr, path=request.path[:200])
+    return event_data
+
+
+def record(action, entity, entity_id=None, details=None):
+    """Audita una operación que no pasa por el flush del ORM (p. ej. escrituras con Core)."""
+    audit_log.record([make_event(action, entity, entity_id, details)])
+
+
+def _column_values(obj):
+    values = {}
+    for column in obj.__table__.columns:
+        if column.key in IGNORED_COLUMNS or column.primary_key:
+            continue
+        values[column.key] = '***' if column.key in SECRET_COLUMNS else getattr(obj, column.key)
+    return values
+
+
+def _changes(obj):
+    changes = {}
+    state = inspect(obj)
+    for column in obj.__table__.columns:
+        if column.key in IGNORED_COLUMNS:
+            continue
+        history = state.attrs[column.key].history
+        if history.has_changes():
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if old != new:
+                changes[column.key] = '***' if column.key in SECRET_COLUMNS else [old, new]
+    return changes
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_audit_events(session, flush_context):
+    # Solo modificaciones hechas desde una petición; los eventos se encolan
+    # en after_commit para no auditar escrituras que terminen en rollback
+    if not audit_log.enabled or not has_request_context():
+        return
+    pending = session.info.setdefault('audit_pending', [])
+    for obj in session.new:
+        entity = AUDITED_MODELS.get(type(obj))
+        if entity:
+            pending.append(make_event('create', entity, obj.id, _column_values(obj)))
+    for obj in session.dirty:
+        entity = AUDITED_MODELS.get(type(obj))
+        if entity and session.is_modified(obj, include_collections=False):
+            changes = _changes(obj)
+            if changes:
+                action = 'role_change' if 'role' in changes else 'update'
+                pending.append(make_event(action, entity, obj.id, changes))
+    for obj in session.deleted:
+        entity = AUDITED_MODELS.get(type(obj))
+        if entity:
+            pending.append(make_event('delete', entity, obj.id, _column_values(obj)))
+
+
+@event.listens_for(Session, 'after_commit')
+def _enqueue_audit_events(session):
+    pending = session.info.pop('audit_pending', None)
+    if pending:
+        audit_log.record(pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_audit_events(session):
+    session.info.pop('audit_pending', None)
+
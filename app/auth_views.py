@@ -1,8 +1,26 @@
-from flask import Blueprint, request, jsonify
+from functools import wraps
+
+from flask import Blueprint, request, jsonify, session
 from app.controllers.auth_controller import AuthController
+from app.role_cache import role_cache, load_user_role
 
 auth_bp = Blueprint('auth', __name__)
 
+# --- Decoradores para la API JSON (responden 401/403 en lugar de redirigir) ---
+def api_role_required(roles):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if 'user_id' not in session:
+                return jsonify({'success': False, 'message': 'Autenticación requerida'}), 401
+            role = role_cache.get_role(session['user_id'], load_user_role)
+            if role not in roles:
+                return jsonify({'success': False, 'message': 'No tienes permiso para este recurso'}), 403
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -26,29 +44,45 @@ def login():
         return jsonify({'success': False, 'message': 'Faltan datos'}), 400
     
     result = AuthController.login_user(username, password)
+    if result['success']:
+        session['user_id'] = result['user']['id']
+        session['username'] = result['user']['username']
+        session['user_role'] = result['user']['role']
     return jsonify(result), 200 if result['success'] else 401
 
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    session.pop('user_id', None)
+    session.pop('username', None)
+    session.pop('user_role', None)
+    return jsonify({'success': True, 'message': 'Sesión cerrada'}), 200
+
 @auth_bp.route('/users', methods=['GET'])
+@api_role_required(['admin'])
 def get_users():
     result = AuthController.get_all_users()
     return jsonify(result), 200
 
 @auth_bp.route('/users/<int:user_id>', methods=['GET'])
+@api_role_required(['admin'])
 def get_user(user_id):
     result = AuthController.get_user_by_id(user_id)
     return jsonify(result), 200 if result['success'] else 404
 
 @auth_bp.route('/users/<int:user_id>', methods=['PUT'])
+@api_role_required(['admin'])
 def update_user(user_id):
     data = request.get_json()
     username = data.get('username')
     email = data.get('email')
     password = data.get('password')
+    role = data.get('role')
     
-    result = AuthController.update_user(user_id, username, email, password)
+    result = AuthController.update_user(user_id, username, email, password, role)
     return jsonify(result), 200 if result['success'] else 404
 
 @auth_bp.route('/users/<int:user_id>', methods=['DELETE'])
+@api_role_required(['admin'])
 def delete_user(user_id):
     result = AuthController.delete_user(user_id)
-    return jsonify(result), 200 if result['success'] else 404
\ No newline at end of file
+    return jsonify(result), 200 if result['success'] else 404
@@ -0,0 +1,162 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.controllers.product_controller import ProductController, BULK_OPERATIONS, IMPORT_FORMATS, parse_bulk_value
+from app.controllers.sales_controller import SalesController
+from app.controllers.stats_controller import StatsController
+from app.controllers.stock_controller import StockController
+from app.extensions import precompile_templates
+from app.models import db, rebuild_product_search_index
+from app.seeding import DEFAULT_BATCH_SIZE, HASH_MODES, SYNTHETIC_PASSWORD, Progress, seed_database
+from app.snapshot import read_snapshot
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Crea o actualiza el esquema (tablas, columnas e índices nuevos, índice FTS)."""
+    from app import init_db
+    init_db(current_app._get_current_object())
+    click.echo("✅ Base de datos inicializada correctamente")
+
+
+@click.command('compile-templates')
+@with_appcontext
+def compile_templates_command():
+    """Precompila las plantillas Jinja en el cache de bytecode."""
+    total = precompile_templates(current_app._get_current_object())
+    click.echo(f"✅ {total} plantillas compiladas")
+
+
+@click.command('reconcile-counters')
+@with_appcontext
+def reconcile_counters_command():
+    """Recalcula los contadores materializados de productos, proveedores y usuarios."""
+    result = StatsController.reconcile_counts()
+    counts = result['counts']
+    click.echo(f"✅ {result['message']}: {counts['products']} productos, "
+               f"{counts['suppliers']} proveedores, {counts['users']} usuarios")
+
+
+@click.command('recompute-sales-rollups')
+@with_appcontext
+def recompute_sales_rollups_command():
+    """Reconstruye los acumulados de ventas (por día y por producto) desde el libro."""
+    result = SalesController.recompute_rollups()
+    click.echo(f"✅ {result['message']}: {result['days']} días, {result['products']} productos")
+
+
+@click.command('rebuild-low-stock-watchlist')
+@with_appcontext
+def rebuild_low_stock_watchlist_command():
+    """Reconstruye la lista de stock bajo desde los umbrales de reposición de cada producto."""
+    result = StockController.rebuild_watchlist()
+    click.echo(f"✅ {result['message']}: {result['products']} productos bajo el umbral")
+
+
+@click.command('refresh-snapshot')
+@with_appcontext
+def refresh_snapshot_command():
+    """Renueva la copia de solo lectura (bind `snapshot`) con la API de backup de SQLite."""
+    if not read_snapshot.enabled:
+        raise click.ClickException('No hay snapshot configurado (SNAPSHOT_DATABASE_URL)')
+    if not read_snapshot.refresh():
+        raise click.ClickException('Otro proceso está renovando el snapshot')
+    click.echo(f"✅ Snapshot renovado en {read_snapshot.last_refresh_ms:.0f} ms: {read_snapshot.path}")
+
+
+@click.command('import-products')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Formato del archivo (por defecto según la extensión).')
+@click.option('--batch-size', type=int, default=None, help='Filas por transacción.')
+@with_appcontext
+def import_products_command(path, fmt, batch_size):
+    """Importa productos en lote desde un archivo CSV o NDJSON."""
+    if fmt is None:
+        fmt = 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+    with open(path, 'rb') as stream:
+        result = ProductController.import_products(stream, fmt, batch_size)
+    if not result['success']:
+        raise click.ClickException(result['message'])
+    click.echo(f"✅ {result['message']}")
+    for error in result['errors']:
+        click.echo(f"   línea {error['line']}: {error['message']}")
+
+
+@click.command('bulk-update-products')
+@click.argument('operation', type=click.Choice(list(BULK_OPERATIONS)))
+@click.argument('value', required=False, default='')
+@click.option('--ids', help='Ids de producto separados por coma.')
+@click.option('--supplier-id', type=int, default=None, help='Filtro: productos de este proveedor.')
+@click.option('--min-stock', type=int, default=None)
+@click.option('--max-stock', type=int, default=None)
+@click.option('--min-price', type=float, default=None)
+@click.option('--max-price', type=float, default=None)
+@with_appcontext
+def bulk_update_products_command(operation, value, ids, supplier_id, min_stock, max_stock, min_price, max_price):
+    """Actualiza muchos productos con un único UPDATE (precio en % o monto, stock o proveedor).
+
+    Ej.: `bulk-update-products price_percent 5 --supplier-id 3`. Los valores
+    negativos van después de `--` (`... --ids 4,5 -- price_delta -2`); con
+    `supplier` sin VALUE se quita el proveedor.
+    """
+    parsed, error = parse_bulk_value(operation, value)
+    if error:
+        raise click.ClickException(error)
+    filters = {'supplier_id': supplier_id, 'min_stock': min_stock, 'max_stock': max_stock,
+               'min_price': min_price, 'max_price': max_price}
+    filters = {key: val for key, val in filters.items() if val is not None}
+    try:
+        product_ids = [int(pid) for pid in ids.split(',') if pid.strip()] if ids else None
+    except ValueError:
+        raise click.ClickException('--ids debe ser una lista de números separados por coma')
+    result = ProductController.bulk_update(operation, parsed, product_ids=product_ids, filters=filters)
+    if not result['success']:
+        raise click.ClickException(result['message'])
+    click.echo(f"✅ {result['message']}")
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Crea (si hace falta) y repuebla el índice FTS5 de búsqueda de productos."""
+    with db.engine.begin() as connection:
+        total = rebuild_product_search_index(connection)
+    click.echo(f"✅ Índice de búsqueda reconstruido: {total} productos")
+
+
+@click.command('seed')
+@click.option('--users', type=int, default=0, help='Usuarios sintéticos a crear.')
+@click.option('--suppliers', type=int, default=0, help='Proveedores sintéticos a crear.')
+@click.option('--products', type=int, default=0, help='Productos sintéticos a crear.')
+@click.option('--sales', type=int, default=0, help='Ventas históricas a generar en el libro.')
+@click.option('--seed', 'seed_value', type=int, default=42, help='Semilla (mismos datos en cada carga).')
+@click.option('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Filas por INSERT executemany.')
+@click.option('--hash-mode', type=click.Choice(HASH_MODES), default='shared',
+              help="'shared' reutiliza un hash; 'pool' hashea cada usuario en un pool de procesos.")
+@click.option('--no-relax', is_flag=True, help='Mantiene los PRAGMA de durabilidad durante la carga.')
+@with_appcontext
+def seed_command(users, suppliers, products, sales, seed_value, batch_size, hash_mode, no_relax):
+    """Carga masiva de datos sintéticos con Core, en una sola transacción."""
+    progress = Progress(echo=click.echo)
+    totals = seed_database(db.engine, relax=not no_relax, users=users, suppliers=suppliers, products=products,
+                           sales=sales, seed=seed_value, batch_size=batch_size, hash_mode=hash_mode, progress=progress)
+    click.echo(f"✅ {totals['users']} usuarios, {totals['suppliers']} proveedores, {totals['products']} productos "
+               f"y {totals['sales']} ventas: {progress.summary()}")
+    if users:
+        click.echo(f"   Contraseña de los usuarios sintéticos: {SYNTHETIC_PASSWORD}")
+
+
+def register_commands(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(compile_templates_command)
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(recompute_sales_rollups_command)
+    app.cli.add_command(rebuild_low_stock_watchlist_command)
+    app.cli.add_command(refresh_snapshot_command)
+    app.cli.add_command(import_products_command)
+    app.cli.add_command(bulk_update_products_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(seed_command)
@@ -0,0 +1,41 @@
+from flask import current_app
+
+from app.audit import audit_log
+from app.models import AuditLog
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+
+
+class AuditController:
+
+    @staticmethod
+    def get_page(before_id=None, per_page=None, entity=None, action=None, actor=None):
+        """Registro de auditoría del más reciente al más antiguo, paginado por keyset sobre id.
+
+        `before_id` es el id más bajo de la página anterior; los filtros usan
+        el índice (entity, entity_id) y la clave primaria, sin OFFSET.
+        """
+        per_page = max(1, min(int(per_page or DEFAULT_PER_PAGE), MAX_PER_PAGE))
+        query = AuditLog.query
+        if entity:
+            query = query.filter(AuditLog.entity == entity)
+        if action:
+            query = query.filter(AuditLog.action == action)
+        if actor:
+            query = query.filter(AuditLog.actor == actor)
+        if before_id is not None:
+            query = query.filter(AuditLog.id < before_id)
+
+        rows = query.order_by(AuditLog.id.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        entries = [row.to_dict() for row in rows[:per_page]]
+        return {
+            'success': True,
+            'entries': entries,
+            'per_page': per_page,
+            'has_next': has_next,
+            'next_before': entries[-1]['id'] if has_next else None,
+            'backend': current_app.config.get('AUDIT_BACKEND', 'table'),
+            'stats': audit_log.stats(),
+        }
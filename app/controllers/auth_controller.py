@@ -1,18 +1,31 @@
-from app.models import db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, User, constraint_violation
+from app.password_hasher import password_hasher, PasswordHasherBusy
+from app.role_cache import role_cache
+
+BUSY_MESSAGE = 'El servidor está ocupado, inténtalo de nuevo en unos segundos'
+# Restricción violada -> mensaje para el usuario
+UNIQUE_MESSAGES = {
+    'user.username': 'El nombre de usuario ya existe',
+    'user.email': 'El email ya está registrado',
+}
+
+
+def _integrity_error_result(exc):
+    db.session.rollback()
+    kind, detail = constraint_violation(exc)
+    return {'success': False, 'message': UNIQUE_MESSAGES.get(detail, 'No se pudo guardar el usuario')}
 
 class AuthController:
 
     @staticmethod
     def register_user(username, email, password):
-        # Verificar si el usuario ya existe
-        if User.query.filter_by(username=username).first():
-            return {'success': False, 'message': 'El nombre de usuario ya existe'}
-        if User.query.filter_by(email=email).first():
-            return {'success': False, 'message': 'El email ya está registrado'}
-        
-        # Hash de la contraseña
-        hashed_password = generate_password_hash(password)
+        # Hash de la contraseña (en el pool de procesos)
+        try:
+            hashed_password = password_hasher.hash(password)
+        except PasswordHasherBusy:
+            return {'success': False, 'message': BUSY_MESSAGE}
         
         # Crear nuevo usuario (por defecto con rol 'user')
         new_user = User(
@@ -22,8 +35,12 @@ class AuthController:
             role='user'  # Por defecto
         )
         
+        # Las restricciones UNIQUE de username/email validan en el propio INSERT
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as exc:
+            return _integrity_error_result(exc)
         
         return {'success': True, 'message': 'Usuario registrado exitosamente'}
 
@@ -31,8 +48,19 @@ class AuthController:
     def login_user(username, password):
         user = User.query.filter_by(username=username).first()
         
-        if not user or not check_password_hash(user.password, password):
+        if not user:
             return {'success': False, 'message': 'Usuario o contraseña incorrectos'}
+
+        try:
+            if not password_hasher.verify(user.password, password):
+                return {'success': False, 'message': 'Usuario o contraseña incorrectos'}
+
+            # Actualizar hashes antiguos al método/iteraciones configurados
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.hash(password)
+                db.session.commit()
+        except PasswordHasherBusy:
+            return {'success': False, 'message': BUSY_MESSAGE}
         
         return {
             'success': True,
@@ -41,8 +69,15 @@ class AuthController:
         }
 
     @staticmethod
-    def get_all_users():
-        users = User.query.all()
+    def get_all_users(role=None, username_prefix=None):
+        query = User.query
+        if role:
+            query = query.filter(User.role == role)
+        if username_prefix:
+            # Rango en lugar de LIKE para que SQLite use el índice único de username
+            query = query.filter(User.username >= username_prefix,
+                                 User.username < username_prefix + '\uffff')
+        users = query.order_by(User.id).all()
         return {'success': True, 'users': [user.to_dict() for user in users]}
 
     @staticmethod
@@ -59,30 +94,33 @@ class AuthController:
             return {'success': False, 'message': 'Usuario no encontrado'}
         
         # Actualizar campos si se proporcionan
+        # La unicidad de username/email la valida el UPDATE (ver IntegrityError abajo)
         if username:
-            # Verificar que el username no esté en uso por otro usuario
-            existing = User.query.filter(User.username == username, User.id != user_id).first()
-            if existing:
-                return {'success': False, 'message': 'El nombre de usuario ya existe'}
             user.username = username
             
         if email:
-            # Verificar que el email no esté en uso por otro usuario
-            existing = User.query.filter(User.email == email, User.id != user_id).first()
-            if existing:
-                return {'success': False, 'message': 'El email ya está registrado'}
             user.email = email
             
         if password:
-            user.password = generate_password_hash(password)
+            try:
+                user.password = password_hasher.hash(password)
+            except PasswordHasherBusy:
+                # Descarta el username/email ya asignados para que no los guarde otro commit
+                db.session.rollback()
+                return {'success': False, 'message': BUSY_MESSAGE}
             
         if role:
             # Validar que el rol sea válido
             if role not in ['admin', 'subadmin', 'user']:
+                db.session.rollback()
                 return {'success': False, 'message': 'Rol inválido'}
             user.role = role
         
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as exc:
+            return _integrity_error_result(exc)
+        role_cache.invalidate(user_id)
         return {'success': True, 'message': 'Usuario actualizado exitosamente'}
 
     @staticmethod
@@ -93,4 +131,5 @@ class AuthController:
         
         db.session.delete(user)
         db.session.commit()
+        role_cache.invalidate(user_id)
         return {'success': True, 'message': 'Usuario eliminado exitosamente'}
@@ -1,12 +1,375 @@
-from app.models import db, Product, Supplier
+import csv
+import io
+import json
+import re
+
+from flask import current_app
+from sqlalchemy import column, func, insert, literal_column, select, table, tuple_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import aliased, joinedload
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import audit
+from app.models import (db, Product, Supplier, DEFAULT_REORDER_THRESHOLD, bump_entity_counter, bump_table_version,
+                        constraint_violation)
+from app.snapshot import read_session
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+DEFAULT_IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+IMPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_FIELDS = ['id', 'name', 'description', 'price', 'stock', 'reorder_threshold', 'supplier']
+EXPORT_YIELD_PER = 1000
+DUPLICATE_NAME_MESSAGE = 'Ya existe un producto con ese nombre'
+SUPPLIER_NOT_FOUND_MESSAGE = 'Proveedor no encontrado'
+BUSY_MESSAGE = 'La base de datos está ocupada, inténtalo de nuevo en unos segundos'
+SEARCH_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Operaciones de la actualización masiva: nombre -> etiqueta del formulario
+BULK_OPERATIONS = {
+    'price_percent': 'Precio: cambio en %',
+    'price_delta': 'Precio: sumar/restar monto',
+    'stock_set': 'Stock: fijar cantidad',
+    'supplier': 'Cambiar proveedor',
+}
+# Orden permitido en el listado: nombre -> (columna, descendente)
+SORT_OPTIONS = {
+    'id': (Product.id, False),
+    'name': (Product.name, False),
+    'price': (Product.price, False),
+    '-price': (Product.price, True),
+    'stock': (Product.stock, False),
+    '-stock': (Product.stock, True),
+}
+
+# Tabla virtual FTS5 (ver PRODUCT_FTS_DDL en app.models)
+product_fts = table('product_fts', column('rowid'), column('rank'))
+
+
+def _build_search_query(terms):
+    """Convierte el texto del usuario en una consulta FTS5 segura.
+
+    Cada palabra se cita (sin operadores FTS5 inyectados por el usuario) y se
+    busca por prefijo: "lap hp" -> "lap"* "hp"* (todas las palabras).
+    """
+    tokens = SEARCH_TOKEN_RE.findall(terms or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _keyset_condition(sort_column, anchor_id, less_than):
+    """Condición de keyset (columna, id) respecto al producto `anchor_id`."""
+    if sort_column is Product.id:
+        return Product.id < anchor_id if less_than else Product.id > anchor_id
+    anchor_value = select(sort_column).where(Product.id == anchor_id).scalar_subquery()
+    key = tuple_(sort_column, Product.id)
+    anchor = tuple_(anchor_value, anchor_id)
+    return key < anchor if less_than else key > anchor
+
+
+def product_filter_conditions(min_stock=None, max_stock=None, min_price=None, max_price=None, supplier_id=None,
+                              model=Product):
+    """Condiciones WHERE de los filtros del listado (las usa también la actualización masiva).
+
+    `model` permite aplicarlas a un alias de Product (subconsultas sobre la misma tabla).
+    """
+    conditions = []
+    if min_stock is not None:
+        conditions.append(model.stock >= min_stock)
+    if max_stock is not None:
+        conditions.append(model.stock <= max_stock)
+    if min_price is not None:
+        conditions.append(model.price >= min_price)
+    if max_price is not None:
+        conditions.append(model.price <= max_price)
+    if supplier_id is not None:
+        conditions.append(model.supplier_id == supplier_id)
+    return conditions
+
+
+def products_page_statement(after_id=None, before_id=None, per_page=DEFAULT_PER_PAGE, min_stock=None,
+                            max_stock=None, min_price=None, max_price=None, supplier_id=None, sort='id'):
+    """SELECT de una página del listado: `per_page + 1` filas para saber si hay más.
+
+    Lo comparten `ProductController.get_products_page` y la API asíncrona
+    (app/asgi.py); el proveedor se carga en el mismo query para `to_dict()`.
+    """
+    sort_column, descending = SORT_OPTIONS.get(sort or 'id', SORT_OPTIONS['id'])
+
+    stmt = select(Product).options(joinedload(Product.supplier))
+    conditions = product_filter_conditions(min_stock, max_stock, min_price, max_price, supplier_id)
+    if conditions:
+        stmt = stmt.where(*conditions)
+
+    anchor_id = before_id if before_id is not None else after_id
+    backwards = before_id is not None
+    if anchor_id is not None:
+        stmt = stmt.where(_keyset_condition(sort_column, anchor_id, descending != backwards))
+
+    # Hacia atrás se recorre en el orden inverso y luego se invierte
+    reverse = descending != backwards
+    order = [sort_column.desc(), Product.id.desc()] if reverse else [sort_column.asc(), Product.id.asc()]
+    if sort_column is Product.id:
+        order = order[1:]
+    return stmt.order_by(*order).limit(per_page + 1)
+
+
+def products_page_result(products, per_page, after_id=None, before_id=None):
+    """Respuesta del listado a partir de las filas de `products_page_statement` (ya en dicts)."""
+    has_more = len(products) > per_page
+    products = products[:per_page]
+    if before_id is not None:
+        products.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after_id is not None, has_more
+    return {
+        'success': True,
+        'products': products,
+        'per_page': per_page,
+        'has_next': has_next and bool(products),
+        'has_prev': has_prev and bool(products),
+        'next_after': products[-1]['id'] if products else None,
+        'prev_before': products[0]['id'] if products else None,
+    }
+
+
+def parse_bulk_value(operation, raw):
+    """Convierte el valor de una operación masiva; devuelve (valor, None) o (None, mensaje de error).
+
+    Para 'supplier' un valor vacío quita el proveedor.
+    """
+    if operation not in BULK_OPERATIONS:
+        return None, 'Operación masiva inválida'
+    raw = (raw or '').strip() if isinstance(raw, str) else raw
+    try:
+        if operation == 'supplier':
+            return (int(raw) if raw not in (None, '') else None), None
+        if operation == 'stock_set':
+            value = int(raw)
+            return (value, None) if value >= 0 else (None, 'El stock debe ser positivo')
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None, 'Valor inválido para la operación'
+    if operation == 'price_percent' and value <= -100:
+        return None, 'El porcentaje debe ser mayor a -100'
+    return value, None
+
+
+def _iter_import_rows(stream, fmt):
+    """Genera (número de línea, dict) leyendo el archivo en streaming."""
+    if isinstance(stream, io.TextIOBase):
+        text = stream
+    else:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_num, None
+                continue
+            yield line_num, row if isinstance(row, dict) else None
+
+
+def _parse_import_row(row, supplier_ids, supplier_names):
+    """Valida una fila y devuelve (valores, None) o (None, mensaje de error)."""
+    if row is None:
+        return None, 'Línea con formato inválido'
+    name = (row.get('name') or '').strip()
+    if not name:
+        return None, 'El nombre es obligatorio'
+    try:
+        price = float(row.get('price'))
+        stock = int(row.get('stock') or 0)
+        raw_threshold = row.get('reorder_threshold')
+        threshold = DEFAULT_REORDER_THRESHOLD if raw_threshold in (None, '') else int(raw_threshold)
+    except (TypeError, ValueError):
+        return None, 'Precio, stock o umbral inválido'
+    if price < 0 or stock < 0 or threshold < 0:
+        return None, 'Precio, stock y umbral deben ser positivos'
+
+    supplier_id = None
+    raw_supplier_id = row.get('supplier_id')
+    raw_supplier = row.get('supplier')
+    if raw_supplier_id not in (None, ''):
+        try:
+            supplier_id = int(raw_supplier_id)
+        except (TypeError, ValueError):
+            return None, SUPPLIER_NOT_FOUND_MESSAGE
+        if supplier_id not in supplier_ids:
+            return None, SUPPLIER_NOT_FOUND_MESSAGE
+    elif raw_supplier:
+        supplier_id = supplier_names.get(raw_supplier.strip())
+        if supplier_id is None:
+            return None, SUPPLIER_NOT_FOUND_MESSAGE
+
+    return {
+        'name': name,
+        'description': row.get('description') or None,
+        'price': price,
+        'stock': stock,
+        'reorder_threshold': threshold,
+        'supplier_id': supplier_id,
+    }, None
+
+
+def _integrity_message(exc, default):
+    """Mensaje de usuario para un IntegrityError al escribir en `product`."""
+    kind, detail = constraint_violation(exc)
+    if kind == 'foreign_key':
+        return SUPPLIER_NOT_FOUND_MESSAGE
+    if detail == 'product.name':
+        return DUPLICATE_NAME_MESSAGE
+    return default
+
+
+def _save_product(product):
+    """Flush + commit traduciendo las violaciones de restricciones a mensajes.
+
+    Devuelve (dict del producto, None) o (None, resultado de error).
+    """
+    try:
+        db.session.flush()
+        data = product.to_dict()
+        db.session.commit()
+    except IntegrityError as exc:
+        db.session.rollback()
+        return None, {'success': False, 'message': _integrity_message(exc, 'No se pudo guardar el producto')}
+    except StaleDataError:
+        # Otro proceso modificó el producto entre la lectura y la escritura
+        db.session.rollback()
+        return None, {'success': False, 'message': 'El producto fue modificado por otro usuario, vuelve a intentarlo'}
+    return data, None
+
+
+def apply_stock_deltas(totals):
+    """UPDATE condicional por producto ({product_id: delta}) en la transacción actual.
+
+    Devuelve None si todas las líneas se aplicaron, o el resultado de error
+    después de hacer rollback. No hace commit: el llamador puede agregar más
+    escrituras a la misma transacción.
+    """
+    # Orden fijo por id para que lotes concurrentes tomen los locks igual
+    for product_id in sorted(totals):
+        delta = totals[product_id]
+        stmt = (update(Product)
+                .where(Product.id == product_id)
+                .values(stock=Product.stock + delta, version=Product.version + 1)
+                .execution_options(synchronize_session=False))
+        if delta < 0:
+            stmt = stmt.where(Product.stock >= -delta)
+        if db.session.execute(stmt).rowcount == 0:
+            db.session.rollback()
+            exists = db.session.get(Product, product_id) is not None
+            message = 'Stock insuficiente' if exists else 'Producto no encontrado'
+            return {'success': False, 'message': f'{message} (producto {product_id})', 'product_id': product_id}
+    bump_table_version(db.session.connection(), Product.__tablename__)
+    return None
+
 
 class ProductController:
 
     @staticmethod
     def get_all_products():
-        products = Product.query.all()
+        # Cargar el proveedor en el mismo query para evitar N+1 en to_dict()
+        products = Product.query.options(joinedload(Product.supplier)).all()
         return {'success': True, 'products': [p.to_dict() for p in products]}
 
+    @staticmethod
+    def parse_filters(args):
+        """Extrae filtros y orden válidos de los parámetros de la petición."""
+        filters = {}
+        for key in ('min_stock', 'max_stock', 'supplier_id'):
+            value = args.get(key, type=int)
+            if value is not None:
+                filters[key] = value
+        for key in ('min_price', 'max_price'):
+            value = args.get(key, type=float)
+            if value is not None:
+                filters[key] = value
+        sort = args.get('sort')
+        if sort in SORT_OPTIONS and sort != 'id':
+            filters['sort'] = sort
+        return filters
+
+    @staticmethod
+    def get_products_page(after_id=None, before_id=None, per_page=None, min_stock=None, max_stock=None,
+                          min_price=None, max_price=None, supplier_id=None, sort='id'):
+        """Listado filtrado y paginado por keyset sobre (columna de orden, id), sin OFFSET.
+
+        `after_id` avanza a la página siguiente y `before_id` retrocede a la
+        anterior; el valor de la columna de orden se toma de ese producto.
+        Los filtros se resuelven en SQL con los índices de stock, price y
+        supplier_id.
+        """
+        if per_page is None:
+            per_page = current_app.config.get('PRODUCTS_PER_PAGE', DEFAULT_PER_PAGE)
+        per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+        stmt = products_page_statement(after_id, before_id, per_page, min_stock=min_stock, max_stock=max_stock,
+                                       min_price=min_price, max_price=max_price, supplier_id=supplier_id, sort=sort)
+        # Lectura de reporte: el snapshot si está vigente (ver app/snapshot.py)
+        with read_session() as reader:
+            products = [p.to_dict() for p in reader.execute(stmt).scalars()]
+        return products_page_result(products, per_page, after_id, before_id)
+
+    @staticmethod
+    def search_products(terms, page=1, per_page=None):
+        """Búsqueda por nombre, descripción y proveedor ordenada por relevancia (bm25)."""
+        query = _build_search_query(terms)
+        if per_page is None:
+            per_page = current_app.config.get('PRODUCTS_PER_PAGE', DEFAULT_PER_PAGE)
+        per_page = max(1, min(int(per_page), MAX_PER_PAGE))
+        page = max(1, int(page or 1))
+        if not query:
+            return {'success': False, 'message': 'Ingresa un término de búsqueda', 'products': []}
+
+        stmt = (
+            select(Product)
+            .options(joinedload(Product.supplier))
+            .join(product_fts, product_fts.c.rowid == Product.id)
+            .where(literal_column('product_fts').op('MATCH')(query))
+            .order_by(product_fts.c.rank)
+            .limit(per_page + 1)
+            .offset((page - 1) * per_page)
+        )
+        with read_session() as reader:
+            rows = reader.execute(stmt).scalars().all()
+            products = [p.to_dict() for p in rows[:per_page]]
+        return {
+            'success': True,
+            'products': products,
+            'query': terms,
+            'page': page,
+            'per_page': per_page,
+            'has_next': len(rows) > per_page,
+            'has_prev': page > 1,
+        }
+
+    @staticmethod
+    def iter_export_rows():
+        """Genera los productos (con el nombre del proveedor) con un cursor de servidor.
+
+        `yield_per` trae las filas en bloques, así la memoria no crece con el
+        tamaño de la tabla. Usa el mismo formato que `Product.to_dict()`.
+        """
+        stmt = (
+            select(Product.id, Product.name, Product.description, Product.price,
+                   Product.stock, Product.reorder_threshold, Supplier.name.label('supplier'))
+            .outerjoin(Supplier, Product.supplier_id == Supplier.id)
+            .order_by(Product.id)
+            .execution_options(yield_per=EXPORT_YIELD_PER)
+        )
+        with read_session() as reader:
+            for row in reader.execute(stmt):
+                yield row._asdict()
+
     @staticmethod
     def get_product_by_id(product_id):
         product = Product.query.get(product_id)
@@ -15,29 +378,25 @@ class ProductController:
         return {'success': True, 'product': product.to_dict()}
 
     @staticmethod
-    def create_product(name, description, price, stock, supplier_id=None):
-        if Product.query.filter_by(name=name).first():
-            return {'success': False, 'message': 'Ya existe un producto con ese nombre'}
-
-        # Opcional: Verificar si el supplier_id existe
-        if supplier_id:
-            supplier = Supplier.query.get(supplier_id)
-            if not supplier:
-                return {'success': False, 'message': 'Proveedor no encontrado'}
-
+    def create_product(name, description, price, stock, supplier_id=None, reorder_threshold=None):
         new_product = Product(
             name=name,
             description=description,
             price=price,
             stock=stock,
-            supplier_id=supplier_id
+            supplier_id=supplier_id,
+            reorder_threshold=DEFAULT_REORDER_THRESHOLD if reorder_threshold is None else reorder_threshold
         )
         db.session.add(new_product)
-        db.session.commit()
-        return {'success': True, 'message': 'Producto creado exitosamente', 'product': new_product.to_dict()}
+        # UNIQUE(name) y la clave foránea de supplier_id validan en el INSERT
+        data, error = _save_product(new_product)
+        if error:
+            return error
+        return {'success': True, 'message': 'Producto creado exitosamente', 'product': data}
 
     @staticmethod
-    def update_product(product_id, name=None, description=None, price=None, stock=None, supplier_id=None):
+    def update_product(product_id, name=None, description=None, price=None, stock=None, supplier_id=None,
+                       reorder_threshold=None):
         product = Product.query.get(product_id)
         if not product:
             return {'success': False, 'message': 'Producto no encontrado'}
@@ -50,17 +409,111 @@ class ProductController:
             product.price = price
         if stock is not None:
             product.stock = stock
+        if reorder_threshold is not None:
+            product.reorder_threshold = reorder_threshold
         if supplier_id is not None: # Permitir cambiar el proveedor o quitarlo
-            if supplier_id == '': # Si se envía vacío para quitar el proveedor
-                product.supplier_id = None
-            else:
-                supplier = Supplier.query.get(supplier_id)
-                if not supplier:
-                    return {'success': False, 'message': 'Proveedor no encontrado'}
-                product.supplier_id = supplier_id
+            # '' quita el proveedor; un id inexistente lo rechaza la clave foránea
+            product.supplier_id = None if supplier_id == '' else supplier_id
+
+        data, error = _save_product(product)
+        if error:
+            return error
+        return {'success': True, 'message': 'Producto actualizado exitosamente', 'product': data}
+
+    @staticmethod
+    def adjust_stock(lines):
+        """Aplica ajustes de stock (product_id, delta) en una sola transacción, todo o nada.
 
+        Cada línea es un UPDATE condicional `stock = stock + :delta WHERE stock
+        >= -:delta`, así dos reservas concurrentes nunca dejan stock negativo
+        ni se pisan entre sí. Si alguna línea no se puede aplicar se revierte
+        todo el lote.
+        """
+        totals = {}
+        for product_id, delta in lines:
+            totals[int(product_id)] = totals.get(int(product_id), 0) + int(delta)
+        if not totals:
+            return {'success': False, 'message': 'No hay líneas de ajuste'}
+
+        failure = apply_stock_deltas(totals)
+        if failure:
+            return failure
         db.session.commit()
-        return {'success': True, 'message': 'Producto actualizado exitosamente', 'product': product.to_dict()}
+        return {'success': True, 'message': 'Stock ajustado exitosamente', 'adjusted': len(totals)}
+
+    @staticmethod
+    def bulk_update(operation, value, product_ids=None, filters=None):
+        """Aplica una operación a muchos productos con un único UPDATE en una transacción.
+
+        Las filas se eligen por `product_ids` y/o `filters` (los del
+        listado, ver `parse_filters`); sin ninguno de los dos no se toca nada.
+        `value` ya convertido con `parse_bulk_value`. Los triggers de SQLite
+        mantienen el índice de búsqueda y la lista de stock bajo fila por
+        fila. Devuelve la cantidad de productos actualizados.
+        """
+        if operation not in BULK_OPERATIONS:
+            return {'success': False, 'message': 'Operación masiva inválida'}
+        filters = {key: val for key, val in (filters or {}).items() if key != 'sort'}
+        ids = sorted({int(pid) for pid in product_ids}) if product_ids else None
+
+        def target_conditions(model):
+            conditions = product_filter_conditions(**filters, model=model)
+            if ids:
+                conditions.append(model.id.in_(ids))
+            return conditions
+
+        conditions = target_conditions(Product)
+        if not conditions:
+            return {'success': False, 'message': 'Selecciona productos o al menos un filtro'}
+
+        if operation == 'price_percent':
+            values = {'price': func.round(Product.price * (1 + value / 100.0), 2)}
+        elif operation == 'price_delta':
+            values = {'price': func.round(Product.price + value, 2)}
+        elif operation == 'stock_set':
+            values = {'stock': value}
+        else:
+            values = {'supplier_id': value}
+        values['version'] = Product.version + 1
+
+        stmt = update(Product).where(*conditions).values(values).execution_options(synchronize_session=False)
+        negative = None
+        if operation == 'price_delta' and value < 0:
+            # Todo o nada en la misma sentencia: si algún precio quedaría
+            # negativo el UPDATE no toca ninguna fila (sin SELECT previo que
+            # otro escritor pueda dejar desactualizado)
+            target = aliased(Product)
+            negative = select(target.id).where(*target_conditions(target), target.price + value < 0)
+            stmt = stmt.where(~negative.exists())
+
+        try:
+            updated = db.session.execute(stmt).rowcount
+            if not updated and negative is not None:
+                # Misma transacción de escritura: el conteo ve lo que vio el UPDATE
+                blocked = db.session.execute(select(func.count()).select_from(negative.subquery())).scalar()
+                if blocked:
+                    db.session.rollback()
+                    return {'success': False, 'message': f'{blocked} productos quedarían con precio negativo'}
+            if updated:
+                # Core/UPDATE masivo: no pasa por el flush que versiona las tablas
+                bump_table_version(db.session.connection(), Product.__tablename__)
+            db.session.commit()
+        except IntegrityError as exc:
+            db.session.rollback()
+            kind, _ = constraint_violation(exc)
+            message = SUPPLIER_NOT_FOUND_MESSAGE if kind == 'foreign_key' else 'No se pudo actualizar los productos'
+            return {'success': False, 'message': message}
+        except OperationalError:
+            # Lock no obtenido dentro de busy_timeout (otro proceso escribiendo)
+            db.session.rollback()
+            return {'success': False, 'message': BUSY_MESSAGE}
+
+        if updated:
+            audit.record('bulk_update', 'product', details={
+                'operation': operation, 'value': value, 'updated': updated,
+                'ids': ids, 'filters': filters or None,
+            })
+        return {'success': True, 'message': f'{updated} productos actualizados', 'updated': updated}
 
     @staticmethod
     def delete_product(product_id):
@@ -69,4 +522,84 @@ class ProductController:
             return {'success': False, 'message': 'Producto no encontrado'}
         db.session.delete(product)
         db.session.commit()
-        return {'success': True, 'message': 'Producto eliminado exitosamente'}
\ No newline at end of file
+        return {'success': True, 'message': 'Producto eliminado exitosamente'}
+
+    @staticmethod
+    def import_products(stream, fmt='csv', batch_size=None):
+        """Importación masiva de productos desde CSV o NDJSON.
+
+        El archivo se lee en streaming; proveedores y nombres existentes se
+        precargan una vez y cada lote se inserta con un único INSERT
+        executemany dentro de su propia transacción. Si el lote choca con una
+        restricción (otro proceso creó un nombre o borró un proveedor mientras
+        tanto) se reintenta fila por fila: se guardan las válidas y cada
+        rechazo se informa con su línea.
+        """
+        if fmt not in IMPORT_FORMATS:
+            return {'success': False, 'message': 'Formato no soportado (use csv o ndjson)'}
+        if batch_size is None:
+            batch_size = current_app.config.get('PRODUCT_IMPORT_BATCH_SIZE', DEFAULT_IMPORT_BATCH_SIZE)
+
+        supplier_names = dict(db.session.query(Supplier.name, Supplier.id).all())
+        supplier_ids = set(supplier_names.values())
+        existing_names = {name for (name,) in db.session.query(Product.name)}
+
+        imported = 0
+        error_count = 0
+        errors = []
+        batch = []
+
+        def report(line_num, message):
+            nonlocal error_count
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'line': line_num, 'message': message})
+
+        def flush():
+            nonlocal imported
+            if not batch:
+                return
+            rows = [values for _, values in batch]
+            try:
+                db.session.execute(insert(Product), rows)
+            except IntegrityError:
+                db.session.rollback()
+                connection = db.session.connection()
+                rows = []
+                for line_num, values in batch:
+                    # SQLite deshace solo la sentencia fallida, la transacción sigue abierta
+                    try:
+                        connection.execute(insert(Product), [values])
+                    except IntegrityError as exc:
+                        report(line_num, _integrity_message(exc, 'No se pudo importar la fila'))
+                    else:
+                        rows.append(values)
+            if rows:
+                bump_entity_counter(db.session.connection(), 'products', len(rows))
+                bump_table_version(db.session.connection(), Product.__tablename__)
+            db.session.commit()
+            imported += len(rows)
+            batch.clear()
+
+        for line_num, row in _iter_import_rows(stream, fmt):
+            values, error = _parse_import_row(row, supplier_ids, supplier_names)
+            if values and values['name'] in existing_names:
+                values, error = None, DUPLICATE_NAME_MESSAGE
+            if error:
+                report(line_num, error)
+                continue
+            existing_names.add(values['name'])
+            batch.append((line_num, values))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        # Los rechazos de un lote reintentado llegan después de los de validación
+        errors.sort(key=lambda error: error['line'])
+
+        return {
+            'success': True,
+            'message': f'{imported} productos importados, {error_count} filas con errores',
+            'imported': imported,
+            'error_count': error_count,
+            'errors': errors,
+        }
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select
+
+from app.controllers.product_controller import apply_stock_deltas
+from app.models import (db, Product, StockMovement, DailySales, ProductSales, MOVEMENT_KINDS,
+                        apply_sales_rollups, recompute_sales_rollups)
+from app.snapshot import read_session
+
+# Las ventas descuentan stock y las reposiciones lo suman
+STOCK_SIGN = {'sale': -1, 'restock': 1}
+DEFAULT_TOP_PRODUCTS = 5
+DEFAULT_RECENT_DAYS = 30
+
+
+def _parse_line(line):
+    product_id = int(line['product_id'])
+    quantity = int(line['quantity'])
+    if quantity <= 0:
+        raise ValueError('La cantidad debe ser mayor a cero')
+    unit_price = line.get('unit_price')
+    return product_id, quantity, float(unit_price) if unit_price is not None else None
+
+
+class SalesController:
+
+    @staticmethod
+    def record_movements(lines, kind='sale'):
+        """Agrega un lote de movimientos al libro, todo o nada.
+
+        En una sola transacción: descuenta (o suma) el stock con UPDATE
+        condicionales, inserta las entradas con un INSERT executemany y
+        actualiza los acumulados diario y por producto. Si falta stock para
+        alguna línea no se escribe nada. El precio por defecto es el actual
+        del producto.
+        """
+        if kind not in MOVEMENT_KINDS:
+            return {'success': False, 'message': 'Tipo de movimiento inválido'}
+        try:
+            parsed = [_parse_line(line) for line in lines]
+        except (KeyError, TypeError, ValueError):
+            return {'success': False, 'message': 'Formato de líneas inválido'}
+        if not parsed:
+            return {'success': False, 'message': 'No hay líneas'}
+
+        product_ids = {product_id for product_id, _, _ in parsed}
+        products = {row.id: row for row in db.session.execute(
+            select(Product.id, Product.name, Product.price).where(Product.id.in_(product_ids)))}
+        missing = sorted(product_ids - products.keys())
+        if missing:
+            return {'success': False, 'message': f'Producto no encontrado (producto {missing[0]})',
+                    'product_id': missing[0]}
+
+        totals = {}
+        for product_id, quantity, _ in parsed:
+            totals[product_id] = totals.get(product_id, 0) + STOCK_SIGN[kind] * quantity
+        failure = apply_stock_deltas(totals)
+        if failure:
+            return failure
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        entries = []
+        for product_id, quantity, unit_price in parsed:
+            product = products[product_id]
+            price = unit_price if unit_price is not None else product.price
+            entries.append({
+                'created_at': now,
+                'day': now.date(),
+                'product_id': product_id,
+                'product_name': product.name,
+                'kind': kind,
+                'quantity': quantity,
+                'unit_price': price,
+                'amount': round(price * quantity, 2) if kind == 'sale' else 0.0,
+            })
+        connection = db.session.connection()
+        connection.execute(insert(StockMovement), entries)
+        apply_sales_rollups(connection, entries)
+        db.session.commit()
+        total = sum(entry['amount'] for entry in entries)
+        return {'success': True, 'message': f'{len(entries)} movimientos registrados',
+                'recorded': len(entries), 'amount': round(total, 2)}
+
+    @staticmethod
+    def get_summary(recent_days=DEFAULT_RECENT_DAYS, top=DEFAULT_TOP_PRODUCTS):
+        """Totales de ventas para los paneles, leídos solo de los acumulados (en el snapshot si está vigente)."""
+        today = datetime.now(timezone.utc).date()
+        with read_session() as reader:
+            total_revenue, total_units = reader.execute(
+                select(func.coalesce(func.sum(DailySales.revenue), 0), func.coalesce(func.sum(DailySales.units), 0))
+            ).one()
+            recent_revenue = reader.execute(
+                select(func.coalesce(func.sum(DailySales.revenue), 0))
+                .where(DailySales.day > today - timedelta(days=recent_days))
+            ).scalar()
+            today_row = reader.get(DailySales, today)
+            top_products = reader.execute(
+                select(Product.id, Product.name, ProductSales.revenue, ProductSales.units)
+                .join(Product, Product.id == ProductSales.product_id)
+                .order_by(ProductSales.revenue.desc())
+                .limit(top)
+            ).all()
+            today_revenue = round(today_row.revenue, 2) if today_row else 0.0
+        return {
+            'success': True,
+            'total_revenue': round(total_revenue, 2),
+            'total_units': total_units,
+            'recent_days': recent_days,
+            'recent_revenue': round(recent_revenue, 2),
+            'today_revenue': today_revenue,
+            'top_products': [
+                {'id': row.id, 'name': row.name, 'revenue': round(row.revenue, 2), 'units': row.units}
+                for row in top_products
+            ],
+        }
+
+    @staticmethod
+    def recompute_rollups():
+        """Reconstruye los acumulados desde el libro en una transacción."""
+        result = recompute_sales_rollups(db.session.connection())
+        db.session.commit()
+        return {'success': True, 'message': 'Acumulados de ventas recalculados', **result}
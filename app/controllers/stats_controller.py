@@ -0,0 +1,26 @@
+from app.models import db, EntityCounts, compute_entity_counts
+
+class StatsController:
+
+    @staticmethod
+    def get_entity_counts():
+        # Una sola fila precalculada en lugar de tres COUNT(*)
+        counts = db.session.get(EntityCounts, EntityCounts.SINGLETON_ID)
+        if not counts:
+            return StatsController.reconcile_counts()
+        return {'success': True, 'counts': counts.to_dict()}
+
+    @staticmethod
+    def reconcile_counts():
+        """Recalcula los contadores materializados desde las tablas reales."""
+        values = compute_entity_counts(db.session.connection())
+        counts = db.session.get(EntityCounts, EntityCounts.SINGLETON_ID)
+        if counts:
+            counts.products = values['products']
+            counts.suppliers = values['suppliers']
+            counts.users = values['users']
+        else:
+            counts = EntityCounts(id=EntityCounts.SINGLETON_ID, **values)
+            db.session.add(counts)
+        db.session.commit()
+        return {'success': True, 'message': 'Contadores reconciliados', 'counts': counts.to_dict()}
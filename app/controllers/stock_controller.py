@@ -0,0 +1,85 @@
+from sqlalchemy import func, select
+
+from app.models import db, LowStockWatch, Product, StockAlert, rebuild_low_stock_watchlist
+
+DEFAULT_ALERTS_LIMIT = 100
+MAX_ALERTS_LIMIT = 1000
+DEFAULT_WATCHLIST_LIMIT = 200
+
+# COUNT sobre la lista (solo los productos bajo el umbral), no sobre product
+LOW_STOCK_COUNT = select(func.count()).select_from(LowStockWatch)
+
+
+def clamp_alerts_limit(limit):
+    return max(1, min(int(limit or DEFAULT_ALERTS_LIMIT), MAX_ALERTS_LIMIT))
+
+
+def alerts_statement(after_id, limit):
+    """SELECT de `get_alerts` (compartido con la API asíncrona, app/asgi.py).
+
+    Sin `after_id` trae las `limit` más recientes en orden descendente; el
+    llamador las invierte.
+    """
+    if after_id is None:
+        return select(StockAlert).order_by(StockAlert.id.desc()).limit(limit)
+    return select(StockAlert).where(StockAlert.id > after_id).order_by(StockAlert.id).limit(limit)
+
+
+def alerts_result(rows, after_id, limit, low_stock_count):
+    alerts = [row.to_dict() for row in (rows[::-1] if after_id is None else rows)]
+    return {
+        'success': True,
+        'alerts': alerts,
+        'last_id': alerts[-1]['id'] if alerts else after_id,
+        'has_more': after_id is not None and len(alerts) == limit,
+        'low_stock_count': low_stock_count,
+    }
+
+
+class StockController:
+
+    @staticmethod
+    def count_low_stock():
+        return db.session.execute(LOW_STOCK_COUNT).scalar()
+
+    @staticmethod
+    def get_low_stock(limit=DEFAULT_WATCHLIST_LIMIT):
+        """Productos de la lista de stock bajo, primero los más alejados del umbral."""
+        rows = db.session.execute(
+            select(LowStockWatch.product_id, Product.name, LowStockWatch.stock, LowStockWatch.threshold,
+                   LowStockWatch.since)
+            .join(Product, Product.id == LowStockWatch.product_id)
+            .order_by((LowStockWatch.stock - LowStockWatch.threshold).asc(), LowStockWatch.product_id)
+            .limit(limit)
+        ).all()
+        return {
+            'success': True,
+            'products': [
+                {'id': row.product_id, 'name': row.name, 'stock': row.stock, 'threshold': row.threshold,
+                 'since': row.since.isoformat()}
+                for row in rows
+            ],
+            'total': StockController.count_low_stock(),
+        }
+
+    @staticmethod
+    def get_alerts(after_id=None, limit=None, low_stock_count=None):
+        """Alertas de cruce del umbral posteriores a `after_id`, de la más antigua a la más nueva.
+
+        Pensado para consultas periódicas: el cliente guarda `last_id` y lo
+        envía como `after` en la siguiente, que solo recorre la clave primaria.
+        Sin `after_id` devuelve las `limit` más recientes. `low_stock_count`
+        evita repetir el COUNT si quien llama ya lo tiene (p. ej. de `get_low_stock`).
+        """
+        limit = clamp_alerts_limit(limit)
+        rows = db.session.execute(alerts_statement(after_id, limit)).scalars().all()
+        if low_stock_count is None:
+            low_stock_count = StockController.count_low_stock()
+        return alerts_result(rows, after_id, limit, low_stock_count)
+
+    @staticmethod
+    def rebuild_watchlist():
+        """Reconstruye la lista de stock bajo desde product en una transacción."""
+        total = rebuild_low_stock_watchlist(db.session.connection())
+        db.session.commit()
+        return {'success': True, 'message': 'Lista de stock bajo reconstruida', 'products': total}
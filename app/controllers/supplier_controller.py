@@ -1,4 +1,35 @@
-from app.models import db, Supplier
+from sqlalchemy import exists, func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, Product, Supplier, constraint_violation
+from app.snapshot import read_session
+
+EXPORT_FIELDS = ['id', 'name', 'contact_person', 'phone', 'email']
+EXPORT_YIELD_PER = 1000
+CREATE_MESSAGES = {
+    'supplier.name': 'Ya existe un proveedor con ese nombre',
+    'supplier.email': 'Ya existe un proveedor con ese email',
+}
+UPDATE_MESSAGES = {
+    'supplier.name': 'Ya existe otro proveedor con ese nombre',
+    'supplier.email': 'Ya existe otro proveedor con ese email',
+}
+
+
+def _save(supplier, messages):
+    """Flush + commit en un solo viaje; las restricciones UNIQUE validan la escritura.
+
+    Devuelve (dict del proveedor, None) o (None, resultado de error).
+    """
+    try:
+        db.session.flush()
+        data = supplier.to_dict()
+        db.session.commit()
+    except IntegrityError as exc:
+        db.session.rollback()
+        kind, detail = constraint_violation(exc)
+        return None, {'success': False, 'message': messages.get(detail, 'No se pudo guardar el proveedor')}
+    return data, None
 
 class SupplierController:
 
@@ -7,6 +38,44 @@ class SupplierController:
         suppliers = Supplier.query.all()
         return {'success': True, 'suppliers': [s.to_dict() for s in suppliers]}
 
+    @staticmethod
+    def get_suppliers_with_stats():
+        """Proveedores con cantidad de productos, stock total y valor del stock.
+
+        Un único LEFT JOIN + GROUP BY: el costo no depende de cuántos
+        productos tenga cada proveedor.
+        """
+        stmt = (
+            select(
+                Supplier,
+                func.count(Product.id).label('product_count'),
+                func.coalesce(func.sum(Product.stock), 0).label('total_stock'),
+                func.coalesce(func.sum(Product.stock * Product.price), 0).label('stock_value'),
+            )
+            .outerjoin(Product, Product.supplier_id == Supplier.id)
+            .group_by(Supplier.id)
+            .order_by(Supplier.id)
+        )
+        suppliers = []
+        with read_session() as reader:
+            for supplier, product_count, total_stock, stock_value in reader.execute(stmt):
+                data = supplier.to_dict()
+                data.update(product_count=product_count, total_stock=total_stock, stock_value=float(stock_value))
+                suppliers.append(data)
+        return {'success': True, 'suppliers': suppliers}
+
+    @staticmethod
+    def iter_export_rows():
+        # Cursor de servidor en bloques: memoria constante sin importar el tamaño
+        stmt = (
+            select(Supplier.id, Supplier.name, Supplier.contact_person, Supplier.phone, Supplier.email)
+            .order_by(Supplier.id)
+            .execution_options(yield_per=EXPORT_YIELD_PER)
+        )
+        with read_session() as reader:
+            for row in reader.execute(stmt):
+                yield row._asdict()
+
     @staticmethod
     def get_supplier_by_id(supplier_id):
         supplier = Supplier.query.get(supplier_id)
@@ -16,20 +85,17 @@ class SupplierController:
 
     @staticmethod
     def create_supplier(name, contact_person=None, phone=None, email=None):
-        if Supplier.query.filter_by(name=name).first():
-            return {'success': False, 'message': 'Ya existe un proveedor con ese nombre'}
-        if email and Supplier.query.filter_by(email=email).first():
-            return {'success': False, 'message': 'Ya existe un proveedor con ese email'}
-
         new_supplier = Supplier(
             name=name,
             contact_person=contact_person,
             phone=phone,
-            email=email
+            email=email or None  # '' del formulario violaría UNIQUE con otros vacíos
         )
         db.session.add(new_supplier)
-        db.session.commit()
-        return {'success': True, 'message': 'Proveedor creado exitosamente', 'supplier': new_supplier.to_dict()}
+        data, error = _save(new_supplier, CREATE_MESSAGES)
+        if error:
+            return error
+        return {'success': True, 'message': 'Proveedor creado exitosamente', 'supplier': data}
 
     @staticmethod
     def update_supplier(supplier_id, name=None, contact_person=None, phone=None, email=None):
@@ -44,20 +110,20 @@ class SupplierController:
         if phone is not None:
             supplier.phone = phone
         if email is not None:
-            if email and Supplier.query.filter(Supplier.email == email, Supplier.id != supplier_id).first():
-                return {'success': False, 'message': 'Ya existe otro proveedor con ese email'}
-            supplier.email = email
+            supplier.email = email or None
 
-        db.session.commit()
-        return {'success': True, 'message': 'Proveedor actualizado exitosamente', 'supplier': supplier.to_dict()}
+        data, error = _save(supplier, UPDATE_MESSAGES)
+        if error:
+            return error
+        return {'success': True, 'message': 'Proveedor actualizado exitosamente', 'supplier': data}
 
     @staticmethod
     def delete_supplier(supplier_id):
         supplier = Supplier.query.get(supplier_id)
         if not supplier:
             return {'success': False, 'message': 'Proveedor no encontrado'}
-        # Opcional: Verificar si hay productos asociados antes de eliminar un proveedor
-        if supplier.products:
+        # Verificar con EXISTS si hay productos asociados (sin cargarlos)
+        if db.session.query(exists().where(Product.supplier_id == supplier_id)).scalar():
             return {'success': False, 'message': 'No se puede eliminar el proveedor porque tiene productos asociados.'}
 
         db.session.delete(supplier)
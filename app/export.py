@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+import zlib
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+ROWS_PER_CHUNK = 500
+
+
+def serialize_rows(rows, fmt, fieldnames):
+    """Convierte un iterable de dicts en trozos de texto CSV o NDJSON.
+
+    Se agrupan ROWS_PER_CHUNK filas por trozo para no emitir un write por
+    fila; la memoria usada no depende del número total de filas.
+    """
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(json.dumps(row, ensure_ascii=False))
+            buffer.write('\n')
+
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_chunks(chunks, compress=False):
+    """Codifica a UTF-8 y, opcionalmente, comprime en gzip de forma incremental."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def client_accepts_gzip(request):
+    if request.args.get('gzip') in ('1', 'true'):
+        return True
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
@@ -1,3 +1,105 @@
+import os
+
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+db = SQLAlchemy()
+
+# Bind opcional con la copia de solo lectura para lecturas largas (app/snapshot.py)
+SNAPSHOT_BIND = 'snapshot'
+
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def sqlite_engine_options(app):
+    """Opciones de engine compatibles con la URI configurada.
+
+    SQLite en memoria usa un pool de una sola conexión que no acepta las
+    opciones de QueuePool, así que se descartan en ese caso.
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        for key in POOL_OPTIONS:
+            options.pop(key, None)
+    return options
+
+
+def resolve_sqlite_paths(app):
+    """Convierte las rutas relativas de SQLite en absolutas dentro de instance/.
+
+    Flask-SQLAlchemy haría lo mismo, pero creando instance/ al inicializarse;
+    así `create_app` no toca el disco y el directorio lo crea `init_db`.
+    """
+    def resolve(uri):
+        if not isinstance(uri, str) or not uri.startswith('sqlite'):
+            return uri
+        url = make_url(uri)
+        if url.database in (None, '', ':memory:') or url.query.get('uri') or os.path.isabs(url.database):
+            return uri
+        return url.set(database=os.path.join(app.instance_path, url.database)).render_as_string(hide_password=False)
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = resolve(app.config.get('SQLALCHEMY_DATABASE_URI'))
+    binds = app.config.get('SQLALCHEMY_BINDS')
+    if binds:
+        app.config['SQLALCHEMY_BINDS'] = {key: resolve(uri) for key, uri in binds.items()}
+
+
+def configure_sqlite_pragmas(app):
+    """Aplica los PRAGMA del perfil de SQLite a cada conexión nueva del pool."""
+    pragmas = [
+        ('journal_mode', app.config.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', app.config.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', app.config.get('SQLITE_BUSY_TIMEOUT_MS')),
+        ('mmap_size', app.config.get('SQLITE_MMAP_SIZE')),
+        ('cache_size', app.config.get('SQLITE_CACHE_SIZE')),
+        ('foreign_keys', app.config.get('SQLITE_FOREIGN_KEYS')),
+    ]
+    pragmas = [(name, value) for name, value in pragmas if value is not None]
+
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            # El snapshot es de solo lectura y tiene su propio perfil
+            if engine.dialect.name != 'sqlite' or bind_key == SNAPSHOT_BIND:
+                continue
+
+            @event.listens_for(engine, 'connect')
+            def _set_sqlite_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas:
+                    cursor.execute(f'PRAGMA {name}={value}')
+                cursor.close()
+
+
+class LazyFileSystemBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache que crea su directorio en la primera escritura.
+
+    Leer de un directorio inexistente ya es un fallo de cache para Jinja, así
+    que crear la aplicación (CLI, tests, workers) no toca el disco.
+    """
+
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def configure_template_cache(app):
+    """Guarda las plantillas compiladas en disco para no recompilarlas en cada worker.
+
+    `JINJA_BYTECODE_CACHE_DIR='none'` lo desactiva; por defecto usa
+    instance/jinja_cache.
+    """
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    if directory == 'none':
+        return
+    app.jinja_env.bytecode_cache = LazyFileSystemBytecodeCache(directory)
+
 
-db = SQLAlchemy()
\ No newline at end of file
+def precompile_templates(app):
+    """Compila todas las plantillas (llena el cache de bytecode y el de la instancia)."""
+    templates = app.jinja_env.list_templates(extensions=['html'])
+    for name in templates:
+        app.jinja_env.get_template(name)
+    return len(templates)
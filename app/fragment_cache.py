@@ -0,0 +1,214 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import get_table_version
+
+DEFAULTS = {
+    'FRAGMENT_CACHE_BACKEND': 'memory',  # 'memory', 'file' o 'none'
+    'FRAGMENT_CACHE_DIR': None,
+    'FRAGMENT_CACHE_MAX_ENTRIES': 512,
+    'FRAGMENT_CACHE_MAX_BYTES': 32 * 1024 * 1024,
+    'FRAGMENT_CACHE_VERSION_TTL': 1.0,
+}
+
+
+class MemoryLRUBackend:
+    """LRU en memoria del proceso, acotado por número de entradas y bytes."""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.encode('utf-8'))
+            self._data[key] = value
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted.encode('utf-8'))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+
+class FileBackend:
+    """Cache compartido entre workers: un archivo por entrada en un directorio.
+
+    Las escrituras son atómicas (archivo temporal + os.replace). La expulsión
+    borra los archivos con acceso más antiguo y se hace cada EVICT_EVERY
+    escrituras para no recorrer el directorio en cada una.
+    """
+
+    EVICT_EVERY = 32
+
+    def __init__(self, directory, max_entries, max_bytes):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.html')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                value = fh.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # marca de uso para la expulsión LRU
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            fh.write(value)
+        os.replace(tmp_path, path)
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.html'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            count -= 1
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.html'):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+class FragmentCache:
+    """Cache de fragmentos HTML con clave versionada por tabla.
+
+    La clave incluye la versión de cada tabla de la que depende el fragmento
+    (ver `TableVersion`), así cualquier alta, edición o baja invalida los
+    fragmentos sin borrarlos explícitamente. Las versiones se memorizan
+    FRAGMENT_CACHE_VERSION_TTL segundos, de modo que un acierto no toca la
+    base; los commits del propio proceso las olvidan al instante.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _config(self, key):
+        return current_app.config.get(key, DEFAULTS[key])
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    kind = self._config('FRAGMENT_CACHE_BACKEND')
+                    max_entries = self._config('FRAGMENT_CACHE_MAX_ENTRIES')
+                    max_bytes = self._config('FRAGMENT_CACHE_MAX_BYTES')
+                    if kind == 'file':
+                        directory = self._config('FRAGMENT_CACHE_DIR') or os.path.join(current_app.instance_path, 'fragment_cache')
+                        self._backend = FileBackend(directory, max_entries, max_bytes)
+                    elif kind == 'memory':
+                        self._backend = MemoryLRUBackend(max_entries, max_bytes)
+                    else:
+                        self._backend = False
+        return self._backend
+
+    def _table_version(self, name):
+        ttl = self._config('FRAGMENT_CACHE_VERSION_TTL')
+        now = time.monotonic()
+        cached = self._versions.get(name)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        row = get_table_version(name)
+        version = row.version if row else 0
+        self._versions[name] = (version, now + ttl)
+        return version
+
+    def forget_versions(self):
+        self._versions.clear()
+
+    def render(self, name, tables, key, render, cacheable=None):
+        """Devuelve el fragmento cacheado o lo genera con `render()` y lo guarda.
+
+        Si `cacheable()` devuelve False el fragmento generado no se guarda
+        (p. ej. porque se leyó de una copia atrasada respecto de `tables`).
+        """
+        backend = self.backend
+        if not backend:
+            return render()
+        versions = ','.join(f'{table}:{self._table_version(table)}' for table in tables)
+        full_key = f'{name}|{versions}|{key}'
+        html = backend.get(full_key)
+        if html is not None:
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = render()
+        if cacheable is None or cacheable():
+            backend.set(full_key, html)
+        return html
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+fragment_cache = FragmentCache()
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_versions_after_commit(session):
+    fragment_cache.forget_versions()
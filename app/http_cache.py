@@ -0,0 +1,84 @@
+import gzip
+import hashlib
+
+from flask import current_app, jsonify, request
+
+from app.models import get_table_version
+from app.snapshot import read_snapshot
+
+DEFAULT_GZIP_MIN_SIZE = 1024
+
+
+def describe_versions(table_names, rows):
+    """Versiones y última modificación a partir de las filas de table_versions (`rows`: nombre -> fila)."""
+    versions = []
+    last_modified = None
+    for name in table_names:
+        row = rows.get(name)
+        versions.append(f'{name}:{row.version if row else 0}')
+        if row and (last_modified is None or row.updated_at > last_modified):
+            last_modified = row.updated_at
+    return versions, last_modified
+
+
+def _table_state(table_names):
+    """Versiones y última modificación de las tablas de las que depende una respuesta."""
+    return describe_versions(table_names, {name: get_table_version(name) for name in table_names})
+
+
+def version_etag(versions, full_path):
+    """ETag de la respuesta: las versiones de tabla más la ruta con su query string."""
+    key = '|'.join(versions + [full_path])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+    """True si el cliente ya tiene la versión actual (`if_none_match`: ETags de werkzeug)."""
+    if if_none_match:
+        return if_none_match.contains_weak(etag)
+    since = if_modified_since
+    return bool(since and last_modified and last_modified.replace(microsecond=0) <= since.replace(tzinfo=None))
+
+
+def conditional_json(table_names, build, status=200):
+    """Respuesta JSON con ETag/Last-Modified derivados de las versiones de tabla.
+
+    Si el cliente ya tiene la versión actual (If-None-Match o
+    If-Modified-Since) se devuelve 304 sin llamar a `build`, es decir, sin
+    consultar ni serializar las filas.
+    """
+    versions, last_modified = _table_state(table_names)
+    etag = version_etag(versions, request.full_path)
+
+    if is_not_modified(etag, last_modified, request.if_none_match, request.if_modified_since):
+        response = current_app.response_class(status=304)
+    else:
+        result = build()
+        response = jsonify(result)
+        response.status_code = status if result.get('success', True) else 404
+        if read_snapshot.served_stale(table_names):
+            # Datos de una copia atrasada: sin validadores, o el cliente los
+            # conservaría como vigentes para la versión actual
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def gzip_response(response):
+    """Comprime respuestas JSON grandes si el cliente acepta gzip (usar en after_request)."""
+    min_size = current_app.config.get('API_GZIP_MIN_SIZE', DEFAULT_GZIP_MIN_SIZE)
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+
+DEFAULT_SAMPLE_RATE = 1.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos, en el formato de Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class RequestMetrics:
+    """Métricas por endpoint: peticiones, latencia, sentencias SQL y tamaño de respuesta.
+
+    El contador de peticiones cubre todas las peticiones; los histogramas
+    solo las muestreadas (`METRICS_SAMPLE_RATE`), que son las únicas que
+    escuchan los eventos del engine. Los valores son por proceso: con varios
+    workers de gunicorn cada uno expone los suyos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._series = {}
+        self.started_at = time.time()
+
+    def _series_for(self, key):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {
+                'latency': Histogram(LATENCY_BUCKETS),
+                'sql_count': Histogram(SQL_COUNT_BUCKETS),
+                'sql_seconds': Histogram(LATENCY_BUCKETS),
+                'response_bytes': Histogram(SIZE_BUCKETS),
+            }
+        return series
+
+    def record_request(self, endpoint, method, status):
+        key = (endpoint, method, status)
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def record_sample(self, endpoint, method, latency, sql_count, sql_seconds, response_bytes):
+        with self._lock:
+            series = self._series_for((endpoint, method))
+            series['latency'].observe(latency)
+            series['sql_count'].observe(sql_count)
+            series['sql_seconds'].observe(sql_seconds)
+            if response_bytes is not None:
+                series['response_bytes'].observe(response_bytes)
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._series.clear()
+            self.started_at = time.time()
+
+    def render(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            series = sorted(self._series.items())
+            lines = [
+                '# HELP app_http_requests_total Peticiones atendidas por endpoint, método y estado.',
+                '# TYPE app_http_requests_total counter',
+            ]
+            for (endpoint, method, status), count in requests:
+                lines.append(f'app_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            for name, help_text, attr in (
+                ('app_http_request_duration_seconds', 'Latencia de las peticiones muestreadas.', 'latency'),
+                ('app_http_request_sql_statements', 'Sentencias SQL por petición muestreada.', 'sql_count'),
+                ('app_http_request_sql_duration_seconds', 'Tiempo en SQL por petición muestreada.', 'sql_seconds'),
+                ('app_http_response_size_bytes', 'Tamaño de las respuestas muestreadas (sin streaming).', 'response_bytes'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (endpoint, method), histograms in series:
+                    histogram = histograms[attr]
+                    if histogram.count:
+                        lines.extend(histogram.lines(name, f'endpoint="{endpoint}",method="{method}"'))
+
+            lines.append('# HELP app_process_start_time_seconds Inicio de la recolección en este proceso.')
+            lines.append('# TYPE app_process_start_time_seconds gauge')
+            lines.append(f'app_process_start_time_seconds {self.started_at:.3f}')
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def _after_request(response):
+    started = g.pop('_metrics_started', None)
+    if started is None:
+        return response
+    endpoint = request.endpoint or 'unmatched'
+    request_metrics.record_request(endpoint, request.method, response.status_code)
+    sql = g.pop('_metrics_sql', None)
+    if sql is not None:
+        # En respuestas en streaming la latencia cubre hasta las cabeceras
+        size = None if response.is_streamed else response.content_length
+        request_metrics.record_sample(endpoint, request.method, time.perf_counter() - started,
+                                      sql[0], sql[1], size)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('_metrics_sql') is not None:
+        conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_metrics_query_start')
+    if starts and has_request_context():
+        sql = g.get('_metrics_sql')
+        elapsed = time.perf_counter() - starts.pop()
+        if sql is not None:
+            sql[0] += 1
+            sql[1] += elapsed
+
+
+def init_metrics(app):
+    """Registra la instrumentación por petición si `METRICS_ENABLED` está activo."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    rate = float(app.config.get('METRICS_SAMPLE_RATE', DEFAULT_SAMPLE_RATE))
+
+    @app.before_request
+    def _metrics_before_request():
+        g._metrics_started = time.perf_counter()
+        if rate >= 1 or (rate > 0 and random.random() < rate):
+            g._metrics_sql = [0, 0.0]  # [sentencias, segundos]
+
+    app.after_request(_after_request)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
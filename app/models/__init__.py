@@ -1,12 +1,21 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
 from app.extensions import db
 
+# Umbral de reposición por defecto de los productos nuevos
+DEFAULT_REORDER_THRESHOLD = 10
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False) # Hice username unique
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
     # Nuevo campo para el rol del usuario
-    role = db.Column(db.String(20), default='user', nullable=False) # 'admin', 'subadmin', 'user'
+    role = db.Column(db.String(20), default='user', nullable=False, index=True) # 'admin', 'subadmin', 'user'
 
     def to_dict(self):
         return {
@@ -21,11 +30,21 @@ class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     description = db.Column(db.Text, nullable=True)
-    price = db.Column(db.Float, nullable=False)
-    stock = db.Column(db.Integer, nullable=False, default=0)
+    price = db.Column(db.Float, nullable=False, index=True)
+    stock = db.Column(db.Integer, nullable=False, default=0, index=True)
+    # Con stock <= reorder_threshold el producto entra en low_stock_watchlist
+    reorder_threshold = db.Column(db.Integer, nullable=False, default=DEFAULT_REORDER_THRESHOLD,
+                                  server_default=str(DEFAULT_REORDER_THRESHOLD))
     # Relación con Supplier
-    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=True) # Un producto puede no tener un proveedor
-    supplier = db.relationship('Supplier', backref='products')
+    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=True, index=True) # Un producto puede no tener un proveedor
+    # passive_deletes: al borrar un proveedor no se carga su lista de productos
+    # (el borrado solo se permite cuando no tiene productos)
+    supplier = db.relationship('Supplier', backref=db.backref('products', passive_deletes=True))
+    # Versión de la fila: el ORM la incluye en el WHERE de cada UPDATE y lanza
+    # StaleDataError si otro proceso la modificó (actualización perdida)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __mapper_args__ = {'version_id_col': version}
 
     def to_dict(self):
         return {
@@ -34,6 +53,7 @@ class Product(db.Model):
             "description": self.description,
             "price": self.price,
             "stock": self.stock,
+            "reorder_threshold": self.reorder_threshold,
             "supplier": self.supplier.name if self.supplier else None # Mostrar nombre del proveedor
         }
 
@@ -53,3 +73,498 @@ class Supplier(db.Model):
             "phone": self.phone,
             "email": self.email
         }
+
+
+def constraint_violation(exc):
+    """Interpreta un IntegrityError de SQLite.
+
+    Devuelve ('unique', 'tabla.columna'), ('foreign_key', None) u otro
+    ('other', mensaje) para que los controladores traduzcan el error al
+    mensaje de usuario sin hacer SELECT previos.
+    """
+    message = str(getattr(exc, 'orig', exc))
+    if message.startswith('UNIQUE constraint failed:'):
+        # Puede listar varias columnas: "UNIQUE constraint failed: user.username"
+        return 'unique', message.split(':', 1)[1].split(',')[0].strip()
+    if 'FOREIGN KEY constraint failed' in message:
+        return 'foreign_key', None
+    return 'other', message
+
+
+# Contadores materializados: una sola fila con el total de cada entidad.
+# Se mantienen con eventos de inserción/borrado del ORM para que los
+# dashboards no tengan que hacer COUNT(*) sobre tablas completas.
+class EntityCounts(db.Model):
+    __tablename__ = 'entity_counts'
+    id = db.Column(db.Integer, primary_key=True)
+    products = db.Column(db.Integer, nullable=False, default=0)
+    suppliers = db.Column(db.Integer, nullable=False, default=0)
+    users = db.Column(db.Integer, nullable=False, default=0)
+
+    SINGLETON_ID = 1
+
+    def to_dict(self):
+        return {
+            "products": self.products,
+            "suppliers": self.suppliers,
+            "users": self.users
+        }
+
+
+COUNTED_MODELS = {'products': Product, 'suppliers': Supplier, 'users': User}
+
+
+def compute_entity_counts(connection):
+    """Recalcula los totales con COUNT(*) (usado en la reconciliación)."""
+    return {
+        column: connection.execute(select(func.count()).select_from(model.__table__)).scalar()
+        for column, model in COUNTED_MODELS.items()
+    }
+
+
+def bump_entity_counter(connection, column, delta):
+    """Suma `delta` al contador; las escrituras masivas con Core (que no
+    disparan eventos del ORM) deben llamarla explícitamente."""
+    table = EntityCounts.__table__
+    result = connection.execute(
+        table.update()
+        .where(table.c.id == EntityCounts.SINGLETON_ID)
+        .values({column: table.c[column] + delta})
+    )
+    if result.rowcount == 0:
+        # Primera escritura en una base sin fila de contadores: partir de los
+        # totales reales (la fila actual ya está incluida en la transacción)
+        connection.execute(table.insert().values(id=EntityCounts.SINGLETON_ID, **compute_entity_counts(connection)))
+
+
+def _register_counter_events(model, column):
+    @event.listens_for(model, 'after_insert')
+    def _after_insert(mapper, connection, target):
+        bump_entity_counter(connection, column, 1)
+
+    @event.listens_for(model, 'after_delete')
+    def _after_delete(mapper, connection, target):
+        bump_entity_counter(connection, column, -1)
+
+
+for _column, _model in COUNTED_MODELS.items():
+    _register_counter_events(_model, _column)
+
+
+# Versión por tabla: se incrementa en cada flush que crea, modifica o borra
+# filas de la tabla. Sirve para ETag/Last-Modified y para invalidar caches
+# sin consultar las filas.
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "version": self.version,
+            "updated_at": self.updated_at.isoformat()
+        }
+
+
+VERSIONED_MODELS = (User, Product, Supplier)
+# Columnas que ningún cache ni ETag lee: cambiar solo estas no incrementa la
+# versión (p. ej. el rehash de la contraseña al iniciar sesión no vacía el
+# cache de roles de todos los procesos)
+UNVERSIONED_COLUMNS = {User: {'password'}}
+
+
+def bump_table_version(connection, name):
+    """Incrementa la versión de `name`; las escrituras masivas con Core deben
+    llamarla explícitamente porque no pasan por el flush del ORM."""
+    table = TableVersion.__table__
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = sqlite_insert(table).values(name=name, version=1, updated_at=now)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={'version': table.c.version + 1, 'updated_at': now},
+    ))
+
+
+def get_table_version(name):
+    """Devuelve la fila de versión de `name` (o None si la tabla nunca cambió)."""
+    return db.session.get(TableVersion, name)
+
+
+def _changes_versioned_columns(obj):
+    state = inspect(obj)
+    ignored = UNVERSIONED_COLUMNS.get(type(obj), ())
+    return any(state.attrs[attr.key].history.has_changes()
+               for attr in state.mapper.column_attrs if attr.key not in ignored)
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_versions_after_flush(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, VERSIONED_MODELS) and (obj in session.new or obj in session.deleted
+                                                   or _changes_versioned_columns(obj)):
+            changed.add(obj.__table__.name)
+    if changed:
+        connection = session.connection()
+        for name in sorted(changed):
+            bump_table_version(connection, name)
+
+
+# Libro de movimientos de stock (ventas y reposiciones), solo inserción, y
+# acumulados de ventas por día y por producto que se actualizan en la misma
+# transacción que agrega las entradas (ver apply_sales_rollups). Los paneles
+# leen los acumulados en lugar de sumar el libro completo.
+MOVEMENT_KINDS = ('sale', 'restock')
+
+
+class StockMovement(db.Model):
+    __tablename__ = 'stock_movements'
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    day = db.Column(db.Date, nullable=False, index=True)  # día UTC de created_at
+    # Al borrar el producto la entrada se conserva con el nombre copiado
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='SET NULL'), nullable=True, index=True)
+    product_name = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)  # unidades, siempre positivas
+    unit_price = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.Float, nullable=False)  # importe de venta (0 en reposiciones)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "product_id": self.product_id,
+            "product_name": self.product_name,
+            "kind": self.kind,
+            "quantity": self.quantity,
+            "unit_price": self.unit_price,
+            "amount": self.amount
+        }
+
+
+class DailySales(db.Model):
+    __tablename__ = 'sales_daily'
+    day = db.Column(db.Date, primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    sales = db.Column(db.Integer, nullable=False, default=0)  # entradas de venta
+
+
+class ProductSales(db.Model):
+    __tablename__ = 'sales_by_product'
+    # Sin ventas que atribuir si el producto se borra
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0, index=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    last_sale_at = db.Column(db.DateTime, nullable=True)
+
+
+def apply_sales_rollups(connection, entries):
+    """Suma las entradas de venta nuevas a los acumulados diario y por producto.
+
+    `entries` son los diccionarios insertados en `stock_movements`. Se
+    agregan en memoria y se aplican con un upsert executemany por tabla,
+    dentro de la transacción de `connection`.
+    """
+    daily, by_product = {}, {}
+    for entry in entries:
+        if entry['kind'] != 'sale':
+            continue
+        day = daily.setdefault(entry['day'], {'day': entry['day'], 'revenue': 0.0, 'units': 0, 'sales': 0})
+        day['revenue'] += entry['amount']
+        day['units'] += entry['quantity']
+        day['sales'] += 1
+        if entry['product_id'] is not None:
+            product = by_product.setdefault(entry['product_id'], {
+                'product_id': entry['product_id'], 'revenue': 0.0, 'units': 0, 'last_sale_at': entry['created_at']})
+            product['revenue'] += entry['amount']
+            product['units'] += entry['quantity']
+            product['last_sale_at'] = max(product['last_sale_at'], entry['created_at'])
+
+    if daily:
+        table = DailySales.__table__
+        stmt = sqlite_insert(table)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.day],
+            set_={'revenue': table.c.revenue + stmt.excluded.revenue,
+                  'units': table.c.units + stmt.excluded.units,
+                  'sales': table.c.sales + stmt.excluded.sales},
+        ), list(daily.values()))
+    if by_product:
+        table = ProductSales.__table__
+        stmt = sqlite_insert(table)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.product_id],
+            set_={'revenue': table.c.revenue + stmt.excluded.revenue,
+                  'units': table.c.units + stmt.excluded.units,
+                  'last_sale_at': func.max(func.coalesce(table.c.last_sale_at, stmt.excluded.last_sale_at),
+                                           stmt.excluded.last_sale_at)},
+        ), list(by_product.values()))
+
+
+def recompute_sales_rollups(connection):
+    """Reconstruye ambos acumulados desde el libro (backfill o reconciliación)."""
+    connection.execute(text("DELETE FROM sales_daily"))
+    connection.execute(text("""
+        INSERT INTO sales_daily (day, revenue, units, sales)
+        SELECT day, sum(amount), sum(quantity), count(*)
+        FROM stock_movements WHERE kind = 'sale' GROUP BY day
+    """))
+    connection.execute(text("DELETE FROM sales_by_product"))
+    connection.execute(text("""
+        INSERT INTO sales_by_product (product_id, revenue, units, last_sale_at)
+        SELECT product_id, sum(amount), sum(quantity), max(created_at)
+        FROM stock_movements WHERE kind = 'sale' AND product_id IS NOT NULL GROUP BY product_id
+    """))
+    return {
+        'days': connection.execute(text("SELECT count(*) FROM sales_daily")).scalar(),
+        'products': connection.execute(text("SELECT count(*) FROM sales_by_product")).scalar(),
+    }
+
+
+# Registro de auditoría de las modificaciones hechas por la aplicación.
+# Solo se agregan filas (lo escribe en lotes app.audit); los triggers de
+# AUDIT_LOG_DDL rechazan UPDATE y DELETE.
+class AuditLog(db.Model):
+    __tablename__ = 'audit_log'
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)
+    actor = db.Column(db.String(80), nullable=True)
+    action = db.Column(db.String(20), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=True)
+    details = db.Column(db.Text, nullable=True)  # JSON
+    ip = db.Column(db.String(45), nullable=True)
+    path = db.Column(db.String(200), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_audit_log_entity', 'entity', 'entity_id'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "actor_id": self.actor_id,
+            "actor": self.actor,
+            "action": self.action,
+            "entity": self.entity,
+            "entity_id": self.entity_id,
+            "details": self.details,
+            "ip": self.ip,
+            "path": self.path
+        }
+
+
+AUDIT_LOG_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS audit_log_no_update BEFORE UPDATE ON audit_log BEGIN
+        SELECT RAISE(ABORT, 'audit_log es de solo inserción');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS audit_log_no_delete BEFORE DELETE ON audit_log BEGIN
+        SELECT RAISE(ABORT, 'audit_log es de solo inserción');
+    END""",
+]
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_audit_log_guards(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in AUDIT_LOG_DDL:
+            connection.execute(text(statement))
+
+
+# Búsqueda de texto completo: tabla virtual FTS5 con rowid = product.id.
+# Los triggers la mantienen sincronizada también con inserciones masivas de
+# Core (importación), que no pasan por los eventos del ORM.
+PRODUCT_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, supplier,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description, supplier)
+        VALUES (new.id, new.name, coalesce(new.description, ''),
+                coalesce((SELECT name FROM supplier WHERE id = new.supplier_id), ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description, supplier_id ON product BEGIN
+        UPDATE product_fts SET
+            name = new.name,
+            description = coalesce(new.description, ''),
+            supplier = coalesce((SELECT name FROM supplier WHERE id = new.supplier_id), '')
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_supplier_au AFTER UPDATE OF name ON supplier BEGIN
+        UPDATE product_fts SET supplier = new.name
+        WHERE rowid IN (SELECT id FROM product WHERE supplier_id = new.id);
+    END""",
+]
+
+
+def ensure_product_search_index(connection):
+    """Crea la tabla FTS5 y sus triggers si no existen (idempotente)."""
+    for statement in PRODUCT_FTS_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_product_search_index(connection):
+    """Repuebla el índice FTS5 desde las tablas de productos y proveedores."""
+    ensure_product_search_index(connection)
+    connection.execute(text("DELETE FROM product_fts"))
+    connection.execute(text("""
+        INSERT INTO product_fts(rowid, name, description, supplier)
+        SELECT p.id, p.name, coalesce(p.description, ''), coalesce(s.name, '')
+        FROM product p LEFT JOIN supplier s ON s.id = p.supplier_id
+    """))
+    connection.execute(text("INSERT INTO product_fts(product_fts) VALUES ('optimize')"))
+    return connection.execute(text("SELECT count(*) FROM product_fts")).scalar()
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_product_search_index(target, connection, **kw):
+    if connection.dialect.name != 'sqlite':
+        return
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'")).first()
+    if exists is None:
+        # Base existente sin índice: poblarlo ya, o la búsqueda no encontraría nada
+        rebuild_product_search_index(connection)
+    else:
+        ensure_product_search_index(connection)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _add_missing_columns(target, connection, **kw):
+    # create_all no altera tablas existentes: agregar columnas nuevas que
+    # tengan server_default o admitan NULL (migración mínima para SQLite)
+    if connection.dialect.name != 'sqlite':
+        return
+    for model_table in target.sorted_tables:
+        existing = {row[1] for row in connection.execute(text(f'PRAGMA table_info("{model_table.name}")'))}
+        for col in model_table.columns:
+            if col.name in existing or (not col.nullable and col.server_default is None):
+                continue
+            ddl = f'ALTER TABLE "{model_table.name}" ADD COLUMN "{col.name}" {col.type.compile(connection.dialect)}'
+            if col.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {col.server_default.arg}" if not col.nullable else f" DEFAULT {col.server_default.arg}"
+            connection.execute(text(ddl))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_missing_indexes(target, connection, **kw):
+    # create_all no agrega índices nuevos a tablas que ya existen
+    for model_table in target.sorted_tables:
+        for index in model_table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_product_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text("DROP TABLE IF EXISTS product_fts"))
+
+
+# Lista de stock bajo: una fila por producto con stock <= reorder_threshold.
+# La mantienen los triggers de LOW_STOCK_DDL en cada INSERT/UPDATE de
+# product (ORM, UPDATE condicionales de Core e importación), así la página
+# de stock bajo y el contador leen solo esta tabla y no recorren el catálogo.
+class LowStockWatch(db.Model):
+    __tablename__ = 'low_stock_watchlist'
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    stock = db.Column(db.Integer, nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)
+    since = db.Column(db.DateTime, nullable=False)
+
+
+STOCK_ALERT_KINDS = ('low', 'restored')
+
+
+# Cruces del umbral en ambos sentidos, solo se agregan filas. Los
+# administradores consultan las nuevas con `id > último visto`.
+class StockAlert(db.Model):
+    __tablename__ = 'stock_alerts'
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    product_id = db.Column(db.Integer, nullable=True)  # sin FK: la alerta sobrevive al producto
+    product_name = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # 'low' | 'restored'
+    stock = db.Column(db.Integer, nullable=False)
+    threshold = db.Column(db.Integer, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "product_id": self.product_id,
+            "product_name": self.product_name,
+            "kind": self.kind,
+            "stock": self.stock,
+            "threshold": self.threshold
+        }
+
+
+LOW_STOCK_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS product_low_stock_ai AFTER INSERT ON product
+    WHEN new.stock <= new.reorder_threshold BEGIN
+        INSERT OR REPLACE INTO low_stock_watchlist (product_id, stock, threshold, since)
+        VALUES (new.id, new.stock, new.reorder_threshold, datetime('now'));
+        INSERT INTO stock_alerts (created_at, product_id, product_name, kind, stock, threshold)
+        VALUES (datetime('now'), new.id, new.name, 'low', new.stock, new.reorder_threshold);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_low_stock_enter AFTER UPDATE OF stock, reorder_threshold ON product
+    WHEN new.stock <= new.reorder_threshold AND old.stock > old.reorder_threshold BEGIN
+        INSERT OR REPLACE INTO low_stock_watchlist (product_id, stock, threshold, since)
+        VALUES (new.id, new.stock, new.reorder_threshold, datetime('now'));
+        INSERT INTO stock_alerts (created_at, product_id, product_name, kind, stock, threshold)
+        VALUES (datetime('now'), new.id, new.name, 'low', new.stock, new.reorder_threshold);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_low_stock_leave AFTER UPDATE OF stock, reorder_threshold ON product
+    WHEN new.stock > new.reorder_threshold AND old.stock <= old.reorder_threshold BEGIN
+        DELETE FROM low_stock_watchlist WHERE product_id = new.id;
+        INSERT INTO stock_alerts (created_at, product_id, product_name, kind, stock, threshold)
+        VALUES (datetime('now'), new.id, new.name, 'restored', new.stock, new.reorder_threshold);
+    END""",
+    # Sigue bajo el umbral: solo se actualizan los valores mostrados, sin alerta
+    """CREATE TRIGGER IF NOT EXISTS product_low_stock_stay AFTER UPDATE OF stock, reorder_threshold ON product
+    WHEN new.stock <= new.reorder_threshold AND old.stock <= old.reorder_threshold BEGIN
+        UPDATE low_stock_watchlist SET stock = new.stock, threshold = new.reorder_threshold
+        WHERE product_id = new.id;
+    END""",
+]
+
+
+def ensure_low_stock_triggers(connection):
+    """Crea los triggers de la lista de stock bajo si no existen (idempotente)."""
+    for statement in LOW_STOCK_DDL:
+        connection.execute(text(statement))
+
+
+def rebuild_low_stock_watchlist(connection):
+    """Repuebla la lista desde product (backfill o reconciliación); no genera alertas."""
+    ensure_low_stock_triggers(connection)
+    connection.execute(text("DELETE FROM low_stock_watchlist"))
+    connection.execute(text("""
+        INSERT INTO low_stock_watchlist (product_id, stock, threshold, since)
+        SELECT id, stock, reorder_threshold, datetime('now')
+        FROM product WHERE stock <= reorder_threshold
+    """))
+    return connection.execute(text("SELECT count(*) FROM low_stock_watchlist")).scalar()
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_low_stock_watchlist(target, connection, **kw):
+    # Registrado después de _add_missing_columns: en bases existentes los
+    # triggers necesitan la columna reorder_threshold ya agregada
+    if connection.dialect.name != 'sqlite':
+        return
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'product_low_stock_ai'")).first()
+    if exists is None:
+        rebuild_low_stock_watchlist(connection)
@@ -0,0 +1,116 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+DEFAULTS = {
+    'PASSWORD_HASH_ALGORITHM': 'scrypt',
+    'PASSWORD_HASH_ITERATIONS': 600000,
+    'PASSWORD_HASH_WORKERS': 2,
+    'PASSWORD_HASH_MAX_CONCURRENT': 4,
+    'PASSWORD_HASH_TIMEOUT': 10,
+}
+
+
+SCRYPT_DEFAULTS = (2 ** 15, 8, 1)  # n, r, p: los de Werkzeug
+
+
+def canonical_method(method, pbkdf2_iterations=DEFAULT_PBKDF2_ITERATIONS):
+    """Prefijo completo que Werkzeug escribe en el hash para `method`.
+
+    Werkzeug acepta métodos abreviados ('scrypt', 'pbkdf2:sha256') pero
+    siempre guarda algoritmo y parámetros ('scrypt:32768:8:1',
+    'pbkdf2:sha256:600000'); para comparar hay que completar los que faltan.
+    """
+    algorithm, *args = method.split(':')
+    if algorithm == 'scrypt':
+        return 'scrypt:' + ':'.join(str(value) for value in (args or SCRYPT_DEFAULTS))
+    if algorithm == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else pbkdf2_iterations
+        return f'pbkdf2:{hash_name}:{iterations}'
+    return method
+
+
+class PasswordHasherBusy(Exception):
+    """Se alcanzó el límite de operaciones de hash concurrentes."""
+
+
+class PasswordHasher:
+    """Servicio de hashing de contraseñas fuera del hilo de la petición.
+
+    Las llamadas a Werkzeug se ejecutan en un pool de procesos acotado para no
+    bloquear los workers síncronos de gunicorn. Un semáforo no bloqueante
+    limita las operaciones en curso: si está lleno se lanza
+    `PasswordHasherBusy` en lugar de encolar hasta el timeout del worker.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _config(self, key):
+        try:
+            return current_app.config.get(key, DEFAULTS[key])
+        except RuntimeError:
+            return DEFAULTS[key]
+
+    @property
+    def method(self):
+        # PASSWORD_HASH_ITERATIONS solo aplica a pbkdf2 sin iteraciones explícitas
+        return canonical_method(self._config('PASSWORD_HASH_ALGORITHM'), self._config('PASSWORD_HASH_ITERATIONS'))
+
+    def _ensure_started(self):
+        if self._semaphore is not None:
+            return
+        with self._lock:
+            if self._semaphore is None:
+                workers = self._config('PASSWORD_HASH_WORKERS')
+                if workers > 0:
+                    # 'spawn' evita heredar conexiones e hilos del worker web
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                    )
+                self._semaphore = threading.BoundedSemaphore(self._config('PASSWORD_HASH_MAX_CONCURRENT'))
+
+    def _run(self, fn, *args):
+        self._ensure_started()
+        if not self._semaphore.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            if self._executor is None:
+                return fn(*args)
+            future = self._executor.submit(fn, *args)
+            try:
+                return future.result(timeout=self._config('PASSWORD_HASH_TIMEOUT'))
+            except FutureTimeoutError:
+                future.cancel()
+                raise PasswordHasherBusy()
+        finally:
+            self._semaphore.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Formato de Werkzeug: "<método>:<parámetros>$<salt>$<hash>"
+        return canonical_method(password_hash.split('$', 1)[0]) != self.method
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+
+password_hasher = PasswordHasher()
+atexit.register(password_hasher.shutdown)
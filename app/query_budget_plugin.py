@@ -0,0 +1,63 @@
+"""Plugin de pytest para fijar presupuestos de consultas SQL por test o por ruta.
+
+Se activa con `pytest -p app.query_budget_plugin` o declarando
+`pytest_plugins = ['app.query_budget_plugin']` en un conftest.py. Requiere un
+fixture `app` que devuelva la aplicación de Flask.
+
+Marcador, el presupuesto cubre todo el test:
+
+    @pytest.mark.query_budget(max_statements=6, max_repeats=2)
+    def test_listado(client):
+        client.get('/admin/products')
+
+Fixture, para acotar bloques concretos:
+
+    def test_listado(client, query_budget):
+        with query_budget(max_statements=6, max_repeats=2) as log:
+            client.get('/admin/products')
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from app.extensions import db
+from app.query_diagnostics import check_budget, track_queries
+
+
+def _engine(app):
+    with app.app_context():
+        return db.engine
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_statements=None, max_repeats=None): falla si el test supera el presupuesto de SQL',
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        return (yield)
+    app = item.funcargs.get('app')
+    if app is None:
+        raise pytest.UsageError(f'{item.nodeid}: query_budget necesita el fixture `app`')
+    with track_queries(_engine(app)) as log:
+        result = yield
+    check_budget(log, label=item.nodeid, **marker.kwargs)
+    return result
+
+
+@pytest.fixture
+def query_budget(request):
+    engine = _engine(request.getfixturevalue('app'))
+
+    @contextmanager
+    def budget(max_statements=None, max_repeats=None):
+        with track_queries(engine) as log:
+            yield log
+        check_budget(log, max_statements, max_repeats, label=request.node.nodeid)
+
+    return budget
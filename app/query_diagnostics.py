@@ -0,0 +1,199 @@
+import os
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+
+DEFAULTS = {
+    'QUERY_DIAGNOSTICS_MODE': 'warn',
+    'QUERY_DIAGNOSTICS_REPEAT_THRESHOLD': 5,
+    'QUERY_DIAGNOSTICS_SLOW_MS': 100,
+}
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(APP_DIR)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Una petición o bloque medido superó el presupuesto de sentencias SQL."""
+
+
+def fingerprint(statement):
+    """Forma de una sentencia: sin literales y con las listas IN colapsadas.
+
+    Dos sentencias con la misma forma y distintos parámetros (el patrón de un
+    N+1) producen el mismo fingerprint.
+    """
+    text = _SPACE_RE.sub(' ', statement.strip())
+    text = _STRING_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    return _IN_LIST_RE.sub('(?, ...)', text)
+
+
+def call_site():
+    """Frame más interno del proyecto (código de app/ o plantilla) que originó la sentencia."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(APP_DIR) and filename != os.path.abspath(__file__):
+            return f'{os.path.relpath(filename, PROJECT_DIR)}:{frame.lineno} ({frame.name})'
+    return 'desconocido'
+
+
+class QueryLog:
+    """Sentencias de una petición o de un bloque `track_queries`.
+
+    Guarda cuántas veces se repite cada fingerprint y, al cruzar el umbral,
+    dónde se originó la repetición. Las sentencias lentas se guardan con su
+    call site.
+    """
+
+    def __init__(self, repeat_threshold, slow_ms):
+        self.repeat_threshold = repeat_threshold
+        self.slow_ms = slow_ms
+        self.counts = Counter()
+        self.total = 0
+        self.elapsed = 0.0
+        self.repeated = {}  # fingerprint -> call site de la primera repetición fuera de umbral
+        self.slow = []  # (ms, sentencia, call site)
+
+    def record(self, statement, elapsed):
+        if statement.lstrip()[:6].upper() == 'PRAGMA':
+            return
+        key = fingerprint(statement)
+        self.counts[key] += 1
+        self.total += 1
+        self.elapsed += elapsed
+        if self.counts[key] == self.repeat_threshold + 1:
+            self.repeated[key] = call_site()
+        elapsed_ms = elapsed * 1000
+        if self.slow_ms is not None and elapsed_ms >= self.slow_ms:
+            self.slow.append((elapsed_ms, statement, call_site()))
+
+    def max_repeat(self):
+        return max(self.counts.values(), default=0)
+
+    def problems(self):
+        """Descripción legible de las sentencias repetidas por encima del umbral."""
+        return [
+            f'{self.counts[key]}x desde {site}: {key[:200]}'
+            for key, site in self.repeated.items()
+        ]
+
+
+_local = threading.local()
+
+
+def _active_logs():
+    logs = list(getattr(_local, 'logs', ()))
+    if has_request_context():
+        request_log = g.get('_query_log')
+        if request_log is not None:
+            logs.append(request_log)
+    return logs
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_diagnostics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_diagnostics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for log in _active_logs():
+        log.record(statement, elapsed)
+
+
+def install(engine):
+    """Engancha los listeners de diagnóstico al engine (idempotente)."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+@contextmanager
+def track_queries(engine=None, repeat_threshold=None, slow_ms=None):
+    """Registra las sentencias ejecutadas en este hilo durante el bloque.
+
+    Sirve para tests y benchmarks: el cliente de pruebas de Flask atiende
+    las peticiones en el mismo hilo, así que el log cubre todas las rutas
+    llamadas dentro del bloque.
+    """
+    install(engine if engine is not None else db.engine)
+    log = QueryLog(
+        repeat_threshold if repeat_threshold is not None else DEFAULTS['QUERY_DIAGNOSTICS_REPEAT_THRESHOLD'],
+        slow_ms,
+    )
+    stack = _local.__dict__.setdefault('logs', [])
+    stack.append(log)
+    try:
+        yield log
+    finally:
+        stack.remove(log)
+
+
+def check_budget(log, max_statements=None, max_repeats=None, label='bloque medido'):
+    """Lanza `QueryBudgetExceeded` si el log supera alguno de los límites dados."""
+    errors = []
+    if max_statements is not None and log.total > max_statements:
+        errors.append(f'{log.total} sentencias (máximo {max_statements})')
+    if max_repeats is not None and log.max_repeat() > max_repeats:
+        worst, count = log.counts.most_common(1)[0]
+        errors.append(f'{count} repeticiones de la misma sentencia (máximo {max_repeats}): {worst[:200]}')
+    if errors:
+        raise QueryBudgetExceeded(f'Presupuesto de consultas superado en {label}: ' + '; '.join(errors))
+
+
+def _report(log, label):
+    logger = current_app.logger
+    for elapsed_ms, statement, site in log.slow:
+        logger.warning('Consulta lenta (%.1f ms) en %s desde %s: %s', elapsed_ms, label, site, ' '.join(statement.split())[:500])
+    problems = log.problems()
+    if problems:
+        message = f'Posible N+1 en {label} ({log.total} sentencias): ' + ' | '.join(problems)
+        if current_app.config.get('QUERY_DIAGNOSTICS_MODE', DEFAULTS['QUERY_DIAGNOSTICS_MODE']) == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def init_query_diagnostics(app):
+    """Activa el detector por petición si `QUERY_DIAGNOSTICS_ENABLED` está activo.
+
+    Pensado para desarrollo y staging: cada petición registra sus sentencias,
+    avisa de las formas repetidas más de `QUERY_DIAGNOSTICS_REPEAT_THRESHOLD`
+    veces y de las que tardan más de `QUERY_DIAGNOSTICS_SLOW_MS`. Con
+    `QUERY_DIAGNOSTICS_MODE='raise'` la petición falla en lugar de avisar.
+    """
+    if not app.config.get('QUERY_DIAGNOSTICS_ENABLED'):
+        return
+    threshold = int(app.config.get('QUERY_DIAGNOSTICS_REPEAT_THRESHOLD', DEFAULTS['QUERY_DIAGNOSTICS_REPEAT_THRESHOLD']))
+    slow_ms = float(app.config.get('QUERY_DIAGNOSTICS_SLOW_MS', DEFAULTS['QUERY_DIAGNOSTICS_SLOW_MS']))
+
+    @app.before_request
+    def _start_query_log():
+        g._query_log = QueryLog(threshold, slow_ms)
+
+    @app.after_request
+    def _check_query_log(response):
+        log = g.pop('_query_log', None)
+        if log is not None:
+            response.headers['X-Query-Count'] = str(log.total)
+            _report(log, f'{request.method} {request.path} ({request.endpoint})')
+        return response
+
+    with app.app_context():
+        for engine in db.engines.values():
+            install(engine)
@@ -0,0 +1,141 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import User, get_table_version
+
+DEFAULT_TTL = 30
+DEFAULT_VERSION_TTL = 1.0
+
+
+class RoleCache:
+    """Cache por proceso de user_id -> rol, válido para una versión de la tabla `user`.
+
+    Cada worker de gunicorn (y la API asíncrona) tiene su propia copia. Toda
+    escritura en `user` incrementa su versión en `table_versions` (ver
+    `bump_table_version`); el proceso la relee como mucho cada
+    ROLE_CACHE_VERSION_TTL segundos, igual que el cache de fragmentos, y si
+    cambió descarta todos sus roles. Un acierto no toca la base, y un usuario
+    degradado o eliminado en otro worker pierde el acceso en cuanto vence ese
+    plazo; los commits del propio proceso olvidan la versión al instante.
+    ROLE_CACHE_TTL solo limita cuánto vive una entrada sin cambios en la tabla.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._version = None
+        self._version_expires = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _config(self, key, default):
+        try:
+            return current_app.config.get(key, default)
+        except RuntimeError:
+            return default
+
+    def _ttl(self):
+        return self._config('ROLE_CACHE_TTL', DEFAULT_TTL)
+
+    def get_role(self, user_id, loader):
+        """Devuelve el rol cacheado o lo carga con `loader(user_id)`.
+
+        `loader` debe devolver el rol o None si el usuario no existe; los
+        usuarios inexistentes no se cachean.
+        """
+        version = self.cached_version()
+        if version is None:
+            version = load_user_table_version()
+            self.remember_version(version)
+        role = self.lookup(user_id, version)
+        if role is None:
+            role = loader(user_id)
+            self.remember(user_id, role, version)
+        return role
+
+    def cached_version(self):
+        """Última versión leída de la tabla `user` si no venció, o None (hay que releerla)."""
+        with self._lock:
+            if self._version is not None and self._version_expires > time.monotonic():
+                return self._version
+        return None
+
+    def remember_version(self, version, ttl=None):
+        """Memoriza la versión recién leída durante `ttl` segundos (por defecto ROLE_CACHE_VERSION_TTL)."""
+        ttl = self._config('ROLE_CACHE_VERSION_TTL', DEFAULT_VERSION_TTL) if ttl is None else ttl
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._version_expires = time.monotonic() + ttl
+
+    def forget_version(self):
+        with self._lock:
+            self._version_expires = 0.0
+
+    def lookup(self, user_id, version):
+        """Rol cacheado de `user_id` si sigue vigente para `version` de la tabla `user`, o None.
+
+        Cuenta como acierto o fallo; con una versión distinta de la última
+        vista se vacía el cache.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return None
+
+    def remember(self, user_id, role, version, ttl=None):
+        """Guarda el rol recién cargado; para loaders que no encajan en `get_role` (p. ej. async)."""
+        ttl = self._ttl() if ttl is None else ttl
+        if role is not None and ttl > 0:
+            with self._lock:
+                # Si otra petición ya vio una versión nueva, este rol puede ser viejo
+                if version == self._version:
+                    self._entries[user_id] = (role, time.monotonic() + ttl)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._version_expires = 0.0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+def load_user_role(user_id):
+    """Loader por defecto para `RoleCache.get_role`: lee el rol desde la base."""
+    user = User.query.get(user_id)
+    return user.role if user else None
+
+
+def load_user_table_version():
+    """Versión actual de la tabla `user` (0 si nunca cambió)."""
+    row = get_table_version(User.__tablename__)
+    return row.version if row else 0
+
+
+role_cache = RoleCache()
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_version_after_commit(session):
+    role_cache.forget_version()
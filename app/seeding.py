@@ -0,0 +1,222 @@
+import multiprocessing
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import repeat
+
+from flask import current_app
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+
+from app.models import (Product, StockMovement, Supplier, User, bump_entity_counter, bump_table_version,
+                        rebuild_low_stock_watchlist, rebuild_product_search_index, recompute_sales_rollups)
+from app.password_hasher import password_hasher
+
+DEFAULT_BATCH_SIZE = 20000
+HASH_MODES = ('shared', 'pool')
+SYNTHETIC_PASSWORD = 'seed123'
+WORDS = ['vape', 'pod', 'kit', 'mango', 'menta', 'fresa', 'uva', 'sandía', 'hielo', 'tabaco',
+         'batería', 'resistencia', 'coil', 'líquido', 'sales', 'nicotina', 'tanque', 'boquilla']
+
+# Solo durante la carga: sin fsync por commit y con más cache de páginas.
+# Un corte de luz a mitad de la carga puede dejar la base inconsistente.
+RELAXED_PRAGMAS = [
+    ('synchronous', 'OFF'),
+    ('cache_size', -262144),
+    ('temp_store', 'MEMORY'),
+]
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Progress:
+    """Imprime filas insertadas y filas/s por tabla después de cada lote."""
+
+    def __init__(self, echo=print):
+        self.echo = echo
+        self.started = time.perf_counter()
+        self.total = 0
+
+    def table_started(self, name, expected):
+        self.table = name
+        self.expected = expected
+        self.done = 0
+        self.table_started_at = time.perf_counter()
+
+    def batch_inserted(self, rows):
+        self.done += rows
+        self.total += rows
+        elapsed = max(time.perf_counter() - self.table_started_at, 1e-9)
+        self.echo(f'   {self.table}: {self.done:,}/{self.expected:,} filas ({self.done / elapsed:,.0f} filas/s)')
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return f'{self.total:,} filas en {elapsed:.1f}s ({self.total / elapsed:,.0f} filas/s)'
+
+
+@contextmanager
+def relaxed_pragmas(connection):
+    """Relaja la durabilidad de SQLite durante la carga y restaura el perfil configurado."""
+    if connection.dialect.name != 'sqlite':
+        yield
+        return
+    for name, value in RELAXED_PRAGMAS:
+        connection.exec_driver_sql(f'PRAGMA {name}={value}')
+    connection.commit()
+    try:
+        yield
+    finally:
+        restore = [
+            ('synchronous', current_app.config.get('SQLITE_SYNCHRONOUS') or 'FULL'),
+            ('cache_size', current_app.config.get('SQLITE_CACHE_SIZE') or -2000),
+            ('temp_store', 'DEFAULT'),
+        ]
+        for name, value in restore:
+            connection.exec_driver_sql(f'PRAGMA {name}={value}')
+        connection.commit()
+
+
+def hash_passwords(usernames, password, mode, workers=None):
+    """Hashes de las contraseñas de los usuarios sintéticos.
+
+    'shared' calcula un único hash y lo reutiliza (todas las filas quedan con
+    la misma sal); 'pool' calcula uno por usuario repartiendo el trabajo en
+    un pool de procesos, más lento pero con sales distintas como en producción.
+    """
+    if mode == 'shared':
+        return repeat(password_hasher.hash(password), len(usernames))
+    method = password_hasher.method
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(generate_password_hash, repeat(password, len(usernames)),
+                                 repeat(method), chunksize=256))
+
+
+def _next_id(connection, model):
+    return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _has_trigger(connection, name):
+    if connection.dialect.name != 'sqlite':
+        return False
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)
+    ).first() is not None
+
+
+def _insert(connection, model, rows, expected, batch_size, progress):
+    progress.table_started(model.__tablename__, expected)
+    for batch in _batched(rows, batch_size):
+        connection.execute(insert(model), batch)
+        progress.batch_inserted(len(batch))
+
+
+def seed_synthetic(connection, users=0, suppliers=0, products=0, sales=0, sales_days=365, seed=42,
+                   batch_size=DEFAULT_BATCH_SIZE, hash_mode='shared', password=SYNTHETIC_PASSWORD,
+                   extra_users=(), progress=None):
+    """Inserta datos sintéticos deterministas con INSERT executemany de Core.
+
+    Todo ocurre en la transacción de `connection`. Los nombres se numeran a
+    partir del siguiente id de cada tabla, así una segunda carga agrega filas
+    en lugar de chocar con los UNIQUE. `extra_users` son tuplas
+    (username, rol, contraseña) que se insertan antes de los sintéticos.
+    Como Core no dispara los eventos del ORM, los contadores y las versiones
+    de tabla se actualizan aquí, y el índice FTS y la lista de stock bajo se
+    reconstruyen una sola vez al final en lugar de fila por fila. Las `sales` ventas históricas se
+    reparten en los últimos `sales_days` días (sin tocar el stock) y los
+    acumulados de ventas se recalculan al final.
+    """
+    progress = progress or Progress()
+    rng = random.Random(seed)
+
+    first_user = _next_id(connection, User)
+    usernames = [f'user{first_user + i:07d}' for i in range(users)]
+    user_rows = [{'username': name, 'email': f'{name}@seed.local', 'password': password_hasher.hash(secret), 'role': role}
+                 for name, role, secret in extra_users]
+    for name, password_hash in zip(usernames, hash_passwords(usernames, password, hash_mode)):
+        user_rows.append({'username': name, 'email': f'{name}@seed.local', 'password': password_hash,
+                          'role': rng.choice(['user', 'user', 'user', 'subadmin'])})
+
+    first_supplier = _next_id(connection, Supplier)
+    supplier_rows = [{'name': f'Proveedor {first_supplier + i:06d}', 'contact_person': f'Contacto {first_supplier + i}',
+                      'phone': f'09{rng.randrange(10**8):08d}', 'email': f'proveedor{first_supplier + i}@seed.local'}
+                     for i in range(suppliers)]
+    # Los productos se reparten entre los proveedores existentes y los nuevos
+    supplier_ids = list(connection.execute(select(Supplier.id)).scalars())
+    supplier_ids += range(first_supplier, first_supplier + suppliers)
+
+    first_product = _next_id(connection, Product)
+
+    def product_rows():
+        for i in range(first_product, first_product + products):
+            words = rng.sample(WORDS, 3)
+            yield {
+                'name': f'{words[0].capitalize()} {words[1]} {i:08d}',
+                'description': f'{words[2]} {rng.choice(WORDS)} {rng.choice(WORDS)}',
+                'price': round(rng.uniform(1, 200), 2),
+                'stock': rng.randrange(0, 120),
+                'supplier_id': rng.choice(supplier_ids) if supplier_ids and rng.random() < 0.9 else None,
+            }
+
+    search_index = _has_trigger(connection, 'product_fts_ai')
+    if search_index and products:
+        connection.exec_driver_sql('DROP TRIGGER product_fts_ai')
+    watchlist = _has_trigger(connection, 'product_low_stock_ai')
+    if watchlist and products:
+        connection.exec_driver_sql('DROP TRIGGER product_low_stock_ai')
+
+    _insert(connection, User, user_rows, len(user_rows), batch_size, progress)
+    _insert(connection, Supplier, supplier_rows, suppliers, batch_size, progress)
+    _insert(connection, Product, product_rows(), products, batch_size, progress)
+
+    if sales:
+        catalog = connection.execute(select(Product.id, Product.name, Product.price)).all()
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        def sale_rows():
+            for _ in range(sales):
+                product = rng.choice(catalog)
+                created_at = now - timedelta(seconds=rng.randrange(sales_days * 86400))
+                quantity = rng.randint(1, 5)
+                yield {'created_at': created_at, 'day': created_at.date(), 'product_id': product.id,
+                       'product_name': product.name, 'kind': 'sale', 'quantity': quantity,
+                       'unit_price': product.price, 'amount': round(product.price * quantity, 2)}
+
+        _insert(connection, StockMovement, sale_rows() if catalog else [], sales if catalog else 0,
+                batch_size, progress)
+        recompute_sales_rollups(connection)
+
+    for column, model, inserted in (('users', User, len(user_rows)), ('suppliers', Supplier, suppliers),
+                                    ('products', Product, products)):
+        if inserted:
+            bump_entity_counter(connection, column, inserted)
+            bump_table_version(connection, model.__tablename__)
+
+    if search_index and products:
+        # Recrea el trigger y repuebla el índice en una sola pasada
+        rebuild_product_search_index(connection)
+    if watchlist and products:
+        # Igual con la lista de stock bajo (la carga inicial no genera alertas)
+        rebuild_low_stock_watchlist(connection)
+
+    return {'users': len(user_rows), 'suppliers': suppliers, 'products': products, 'sales': sales}
+
+
+def seed_database(engine, relax=True, **options):
+    """Ejecuta `seed_synthetic` en una única transacción, con PRAGMA relajados si `relax`."""
+    with engine.connect() as connection:
+        with relaxed_pragmas(connection) if relax else nullcontext():
+            with connection.begin():
+                return seed_synthetic(connection, **options)
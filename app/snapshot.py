@@ -0,0 +1,272 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_app_context, has_request_context, session as web_session
+from sqlalchemy import event, exc, select
+from sqlalchemy.orm import Session
+
+from app.extensions import SNAPSHOT_BIND, db
+from app.models import TableVersion, get_table_version
+
+DEFAULTS = {
+    'SNAPSHOT_MAX_STALENESS': 30.0,
+    'SNAPSHOT_REFRESH_INTERVAL': 10.0,
+    'SNAPSHOT_LOCK_TIMEOUT': 600.0,
+}
+# Marca en la sesión del usuario: momento de su última escritura confirmada
+WROTE_AT_KEY = 'snapshot_wrote_at'
+
+
+class ReadSnapshot:
+    """Copia de solo lectura de la base para lecturas largas (bind `snapshot`).
+
+    La copia se genera con la API de backup online de SQLite en un archivo
+    temporal que reemplaza al anterior con os.replace, así los lectores nunca
+    ven una copia a medias ni bloquean a los escritores de la base principal.
+    La fecha de modificación del archivo es el inicio del backup: todo lo
+    confirmado antes está en la copia.
+
+    Se usa solo si tiene menos de SNAPSHOT_MAX_STALENESS segundos y si el
+    usuario no escribió nada después (leer sus propias escrituras); si no,
+    las lecturas van a la base principal. Pasados SNAPSHOT_REFRESH_INTERVAL
+    segundos la siguiente lectura la renueva en segundo plano.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.config = dict(DEFAULTS)
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._versions = (None, {})
+        self.refreshes = 0
+        self.errors = 0
+        self.last_refresh_ms = None
+
+    def init_app(self, app):
+        self.app = app
+        self.config = {key: app.config.get(key, default) for key, default in DEFAULTS.items()}
+        if SNAPSHOT_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+            return
+        with app.app_context():
+            _configure_snapshot_engine(db.engines[SNAPSHOT_BIND], app)
+
+    @property
+    def enabled(self):
+        return self.app is not None and SNAPSHOT_BIND in (self.app.config.get('SQLALCHEMY_BINDS') or {})
+
+    @property
+    def engine(self):
+        return db.engines[SNAPSHOT_BIND]
+
+    @property
+    def path(self):
+        return self.engine.url.database
+
+    def taken_at(self):
+        """Inicio del backup de la copia actual (epoch), None si todavía no existe."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        # Vacío: lo creó SQLite al abrir el bind (p. ej. create_all), no un backup
+        return stat.st_mtime if stat.st_size else None
+
+    def age(self):
+        taken_at = self.taken_at()
+        return max(time.time() - taken_at, 0.0) if taken_at is not None else None
+
+    def refresh(self):
+        """Copia la base principal con la API de backup y reemplaza el snapshot.
+
+        Devuelve False sin copiar si otro proceso ya está renovándolo.
+        """
+        path = self.path
+        lock_path = f'{path}.lock'
+        if not _acquire_lock(lock_path, self.config['SNAPSHOT_LOCK_TIMEOUT']):
+            return False
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        started = time.time()
+        try:
+            source = db.engine.raw_connection()
+            try:
+                target = sqlite3.connect(tmp_path)
+                try:
+                    # Una sola pasada: el backup lee una instantánea consistente
+                    # (en WAL no bloquea a los escritores) y no se reinicia
+                    source.driver_connection.backup(target)
+                    target.execute('PRAGMA journal_mode=DELETE')
+                finally:
+                    target.close()
+            finally:
+                source.close()
+            os.utime(tmp_path, (started, started))
+            os.replace(tmp_path, path)
+        except Exception:
+            self.errors += 1
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            os.remove(lock_path)
+        self.refreshes += 1
+        self.last_refresh_ms = (time.time() - started) * 1000
+        return True
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name='snapshot-refresh', daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            with self.app.app_context():
+                self.refresh()
+        except Exception as error:  # la próxima lectura lo reintenta
+            self.app.logger.error('No se pudo renovar el snapshot de lectura: %s', error)
+        finally:
+            self._refreshing = False
+
+    def usable(self):
+        """True si la petición actual puede leer del snapshot."""
+        if not self.enabled:
+            return False
+        taken_at = self.taken_at()
+        age = time.time() - taken_at if taken_at is not None else None
+        if age is None or age > self.config['SNAPSHOT_REFRESH_INTERVAL']:
+            self._refresh_in_background()
+        if age is None or age > self.config['SNAPSHOT_MAX_STALENESS']:
+            return False
+        if has_request_context():
+            wrote_at = web_session.get(WROTE_AT_KEY)
+            if wrote_at is not None and taken_at <= wrote_at:
+                return False
+        return True
+
+    def snapshot_versions(self):
+        """Versiones de tabla contenidas en la copia actual (memorizadas por archivo)."""
+        stat = os.stat(self.path)
+        generation = (stat.st_ino, stat.st_mtime)
+        cached_generation, versions = self._versions
+        if cached_generation != generation:
+            with Session(self.engine) as reader:
+                versions = dict(reader.execute(select(TableVersion.name, TableVersion.version)).all())
+            self._versions = (generation, versions)
+        return versions
+
+    def served_stale(self, tables):
+        """True si la petición leyó del snapshot y este está atrasado para `tables`.
+
+        Los caches con clave por versión de tabla (fragmentos HTML, ETag) no
+        deben guardar esas respuestas bajo la versión actual de la base.
+        """
+        if not (has_app_context() and g.get('read_snapshot_used')):
+            return False
+        versions = self.snapshot_versions()
+        for name in tables:
+            row = get_table_version(name)
+            if versions.get(name, 0) != (row.version if row else 0):
+                return True
+        return False
+
+    def stats(self):
+        age = self.age() if self.enabled else None
+        return {
+            'enabled': self.enabled,
+            'age': round(age, 1) if age is not None else None,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'last_refresh_ms': round(self.last_refresh_ms, 1) if self.last_refresh_ms is not None else None,
+        }
+
+
+read_snapshot = ReadSnapshot()
+
+
+def _acquire_lock(path, timeout):
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # Un lock más viejo que `timeout` quedó de un proceso que murió a mitad
+        try:
+            if time.time() - os.stat(path).st_mtime < timeout:
+                return False
+            os.remove(path)
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            return False
+    os.close(fd)
+    return True
+
+
+def _configure_snapshot_engine(engine, app):
+    pragmas = [
+        ('query_only', 'ON'),
+        ('mmap_size', app.config.get('SQLITE_MMAP_SIZE')),
+        ('cache_size', app.config.get('SQLITE_CACHE_SIZE')),
+    ]
+    pragmas = [(name, value) for name, value in pragmas if value is not None]
+
+    @event.listens_for(engine, 'connect')
+    def _set_snapshot_pragmas(dbapi_connection, connection_record):
+        connection_record.info['snapshot_inode'] = _inode(engine.url.database)
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    @event.listens_for(engine, 'checkout')
+    def _discard_replaced_snapshot(dbapi_connection, connection_record, connection_proxy):
+        # La conexión sigue abierta sobre la copia anterior: el pool la
+        # descarta y abre otra sobre el archivo nuevo
+        if connection_record.info.get('snapshot_inode') != _inode(engine.url.database):
+            raise exc.DisconnectionError('snapshot renovado')
+
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except OSError:
+        return None
+
+
+@contextmanager
+def read_session():
+    """Sesión para lecturas largas: el snapshot si se puede usar, si no `db.session`.
+
+    Los objetos cargados pertenecen a esta sesión y no deben modificarse.
+    """
+    if not read_snapshot.usable():
+        yield db.session
+        return
+    g.read_snapshot_used = True
+    with Session(read_snapshot.engine) as session:
+        yield session
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_flush_write(session, flush_context):
+    session.info['snapshot_wrote'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_dml_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['snapshot_wrote'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_user_write(session):
+    # Las lecturas siguientes de este usuario van a la base principal hasta
+    # que un snapshot posterior a su escritura esté disponible
+    if session.info.pop('snapshot_wrote', False) and read_snapshot.enabled and has_request_context():
+        web_session[WROTE_AT_KEY] = time.time()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('snapshot_wrote', None)
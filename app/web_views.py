@@ -1,11 +1,24 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, abort
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, session, abort, stream_with_context
 from functools import wraps
 
+from markupsafe import Markup
+
 from app.controllers.auth_controller import AuthController
-from app.controllers.product_controller import ProductController
-from app.controllers.supplier_controller import SupplierController
+from app.controllers.product_controller import (ProductController, BULK_OPERATIONS, EXPORT_FIELDS as PRODUCT_EXPORT_FIELDS,
+                                                parse_bulk_value)
+from app.controllers.supplier_controller import SupplierController, EXPORT_FIELDS as SUPPLIER_EXPORT_FIELDS
+from app.controllers.stats_controller import StatsController
+from app.controllers.audit_controller import AuditController
+from app.controllers.sales_controller import SalesController
+from app.controllers.stock_controller import StockController
+from app import audit
 from app.models import Product, Supplier, User
+from app.export import EXPORT_FORMATS, serialize_rows, encode_chunks, client_accepts_gzip
 from app.extensions import db
+from app.fragment_cache import fragment_cache
+from app.metrics import request_metrics
+from app.role_cache import role_cache, load_user_role
+from app.snapshot import read_snapshot
 
 web_bp = Blueprint('web', __name__)
 
@@ -27,9 +40,9 @@ def role_required(roles):
                 flash('Debes iniciar sesión para acceder a esta página.', 'error')
                 return redirect(url_for('web.login'))
             
-            # Recuperar el usuario de la DB para obtener el rol actualizado
-            user = User.query.get(session['user_id'])
-            if not user or user.role not in roles:
+            # Rol desde el cache por proceso (se invalida al editar/eliminar usuarios)
+            role = role_cache.get_role(session['user_id'], load_user_role)
+            if role not in roles:
                 flash('No tienes permiso para acceder a esta página.', 'error')
                 abort(403)
             return f(*args, **kwargs)
@@ -37,6 +50,45 @@ def role_required(roles):
     return decorator
 
 
+# --- Utilidades de respuesta ---
+def _export_response(rows, fieldnames, basename):
+    """Respuesta en streaming (CSV/NDJSON, opcionalmente gzip) para las exportaciones."""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+    compress = client_accepts_gzip(request)
+    body = encode_chunks(serialize_rows(rows, fmt, fieldnames), compress=compress)
+    response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={basename}.{fmt}'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def _cached_table(name, tables, template, build_context):
+    """Fragmento HTML de una tabla de listado, cacheado por versión de las tablas.
+
+    La clave incluye la URL completa (filtros y página) y el rol, porque el
+    fragmento muestra acciones distintas según el rol. En un acierto no se
+    llama a `build_context`, es decir, no se consulta la base.
+    """
+    key = f"{request.full_path}|{session.get('user_role')}"
+    return Markup(fragment_cache.render(name, tables, key,
+                                        lambda: render_template(template, **build_context()),
+                                        cacheable=lambda: not read_snapshot.served_stale(tables)))
+
+
+def _low_stock_count():
+    """Total de la lista de stock bajo, en el cache de fragmentos.
+
+    La lista solo cambia por los triggers de `product`, así que la versión de
+    esa tabla basta como clave: con el cache vigente no se consulta la base.
+    """
+    return int(fragment_cache.render('low_stock_count', (Product.__tablename__,), '',
+                                     lambda: str(StockController.count_low_stock())))
+
+
 # --- Rutas de autenticación ---
 @web_bp.route('/')
 @login_required
@@ -54,11 +106,12 @@ def register():
         
         if result['success']:
             # Si es el primer usuario en la DB, hacerlo admin
-            if User.query.count() == 1:
+            if StatsController.get_entity_counts()['counts']['users'] == 1:
                 new_user = User.query.filter_by(username=username).first()
                 if new_user:
                     new_user.role = 'admin'
                     db.session.commit()
+                    role_cache.invalidate(new_user.id)
                     flash('Usuario registrado exitosamente como ADMIN (primer usuario).', 'success')
             else:
                 flash(result['message'], 'success')
@@ -109,9 +162,15 @@ def logout():
 @login_required
 @role_required(['admin'])
 def list_users():
-    result = AuthController.get_all_users()
-    users = result['users'] if result['success'] else []
-    return render_template('users.html', users=users)
+    role = request.args.get('role') or None
+    username_prefix = request.args.get('username') or None
+
+    def build_context():
+        result = AuthController.get_all_users(role=role, username_prefix=username_prefix)
+        return {'users': result['users'] if result['success'] else []}
+
+    table_html = _cached_table('users', (User.__tablename__,), '_users_table.html', build_context)
+    return render_template('users.html', table_html=table_html, role_filter=role, username_filter=username_prefix)
 
 @web_bp.route('/users/edit/<int:user_id>', methods=['GET', 'POST'])
 @login_required
@@ -175,17 +234,20 @@ def delete_user(user_id):
 @login_required
 @role_required(['admin', 'subadmin'])
 def admin_dashboard():
-    # Información general del sistema
-    total_products = Product.query.count()
-    total_suppliers = Supplier.query.count()
-    total_users = User.query.count()
-    simulated_sales = 12345.67
+    # Información general del sistema (contadores materializados)
+    counts = StatsController.get_entity_counts()['counts']
+    total_products = counts['products']
+    total_suppliers = counts['suppliers']
+    total_users = counts['users']
+    # Ventas desde los acumulados precalculados, no desde el libro
+    sales = SalesController.get_summary()
 
     return render_template('admin/dashboard.html',
                            total_products=total_products,
                            total_suppliers=total_suppliers,
                            total_users=total_users,
-                           simulated_sales=simulated_sales,
+                           sales=sales,
+                           low_stock_count=_low_stock_count(),
                            user_role=session.get('user_role'))
 
 
@@ -194,9 +256,29 @@ def admin_dashboard():
 @login_required
 @role_required(['admin', 'subadmin'])
 def admin_products_list():
-    result = ProductController.get_all_products()
-    products = result['products'] if result['success'] else []
-    return render_template('admin/products/list.html', products=products, user_role=session.get('user_role'))
+    after_id = request.args.get('after', type=int)
+    before_id = request.args.get('before', type=int)
+    per_page = request.args.get('per_page', type=int)
+    filters = ProductController.parse_filters(request.args)
+
+    user_role = session.get('user_role')
+
+    def build_context():
+        result = ProductController.get_products_page(after_id=after_id, before_id=before_id, per_page=per_page, **filters)
+        return {
+            'products': result['products'] if result['success'] else [],
+            'page': result,
+            'filters': filters,
+            'suppliers': db.session.query(Supplier.id, Supplier.name).order_by(Supplier.name).all(),
+            'bulk_operations': BULK_OPERATIONS,
+            'user_role': user_role,
+        }
+
+    table_html = _cached_table('products', (Product.__tablename__, Supplier.__tablename__),
+                               'admin/products/_table.html', build_context)
+    # Fuera del fragmento de la tabla: la insignia no depende de la página ni de los filtros
+    return render_template('admin/products/list.html', table_html=table_html, user_role=user_role,
+                           low_stock_count=_low_stock_count())
 
 @web_bp.route('/admin/products/create', methods=['GET', 'POST'])
 @login_required
@@ -208,10 +290,11 @@ def admin_products_create():
         description = request.form.get('description')
         price = float(request.form.get('price', 0))
         stock = int(request.form.get('stock', 0))
+        reorder_threshold = request.form.get('reorder_threshold', type=int)
         supplier_id = request.form.get('supplier_id')
         supplier_id = int(supplier_id) if supplier_id else None
 
-        result = ProductController.create_product(name, description, price, stock, supplier_id)
+        result = ProductController.create_product(name, description, price, stock, supplier_id, reorder_threshold)
         if result['success']:
             flash(result['message'], 'success')
             return redirect(url_for('web.admin_products_list'))
@@ -220,6 +303,81 @@ def admin_products_create():
     
     return render_template('admin/products/create_edit.html', form_title="Crear Producto", suppliers=suppliers)
 
+@web_bp.route('/admin/products/search')
+@login_required
+@role_required(['admin', 'subadmin'])
+def admin_products_search():
+    terms = request.args.get('q', '')
+    page = request.args.get('page', 1, type=int)
+    result = ProductController.search_products(terms, page=page)
+    if not result['success']:
+        flash(result['message'], 'error')
+        return redirect(url_for('web.admin_products_list'))
+    user_role = session.get('user_role')
+    # Proveedores solo para el formulario de acciones masivas (admin)
+    suppliers = db.session.query(Supplier.id, Supplier.name).order_by(Supplier.name).all() if user_role == 'admin' else []
+    return render_template('admin/products/list.html', products=result['products'], search=result, user_role=user_role,
+                           suppliers=suppliers, bulk_operations=BULK_OPERATIONS,
+                           low_stock_count=_low_stock_count())
+
+@web_bp.route('/admin/products/low-stock')
+@login_required
+@role_required(['admin', 'subadmin'])
+def admin_products_low_stock():
+    # Lee solo low_stock_watchlist y las últimas alertas, no el catálogo completo
+    watchlist = StockController.get_low_stock()
+    return render_template('admin/products/low_stock.html',
+                           watchlist=watchlist,
+                           alerts=StockController.get_alerts(low_stock_count=watchlist['total']),
+                           user_role=session.get('user_role'))
+
+@web_bp.route('/admin/products/export')
+@login_required
+@role_required(['admin'])
+def admin_products_export():
+    return _export_response(ProductController.iter_export_rows(), PRODUCT_EXPORT_FIELDS, 'productos')
+
+@web_bp.route('/admin/products/import', methods=['GET', 'POST'])
+@login_required
+@role_required(['admin'])
+def admin_products_import():
+    result = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Selecciona un archivo para importar.', 'error')
+        else:
+            fmt = request.form.get('format') or ('ndjson' if upload.filename.endswith(('.ndjson', '.jsonl')) else 'csv')
+            result = ProductController.import_products(upload.stream, fmt)
+            flash(result['message'], 'success' if result['success'] else 'error')
+            # INSERT masivo con Core: no pasa por el flush que audita el ORM
+            if result.get('imported'):
+                audit.record('import', 'product', details={'file': upload.filename, 'imported': result['imported']})
+
+    return render_template('admin/products/import.html', result=result)
+
+@web_bp.route('/admin/products/bulk', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def admin_products_bulk():
+    # Productos marcados en la tabla (scope=selected) o todos los del filtro actual (scope=filter)
+    operation = request.form.get('operation')
+    filters = ProductController.parse_filters(request.form)
+    value, error = parse_bulk_value(operation, request.form.get('new_supplier_id' if operation == 'supplier' else 'value'))
+    if error:
+        flash(error, 'error')
+    elif request.form.get('scope') == 'filter':
+        result = ProductController.bulk_update(operation, value, filters=filters)
+        flash(result['message'], 'success' if result['success'] else 'error')
+    else:
+        ids = request.form.getlist('ids', type=int)
+        if not ids:
+            flash('No seleccionaste ningún producto.', 'error')
+        else:
+            result = ProductController.bulk_update(operation, value, product_ids=ids)
+            flash(result['message'], 'success' if result['success'] else 'error')
+    return redirect(url_for('web.admin_products_list', **filters))
+
 @web_bp.route('/admin/products/edit/<int:product_id>', methods=['GET', 'POST'])
 @login_required
 @role_required(['admin', 'subadmin'])
@@ -237,10 +395,12 @@ def admin_products_edit(product_id):
         description = request.form.get('description')
         price = float(request.form.get('price', 0))
         stock = int(request.form.get('stock', 0))
+        reorder_threshold = request.form.get('reorder_threshold', type=int)
         supplier_id = request.form.get('supplier_id')
         supplier_id = int(supplier_id) if supplier_id else ''
 
-        result = ProductController.update_product(product_id, name, description, price, stock, supplier_id)
+        result = ProductController.update_product(product_id, name, description, price, stock, supplier_id,
+                                                  reorder_threshold)
         if result['success']:
             flash(result['message'], 'success')
             return redirect(url_for('web.admin_products_list'))
@@ -266,9 +426,20 @@ def admin_products_delete(product_id):
 @login_required
 @role_required(['admin'])
 def admin_suppliers_list():
-    result = SupplierController.get_all_suppliers()
-    suppliers = result['suppliers'] if result['success'] else []
-    return render_template('admin/suppliers/list.html', suppliers=suppliers, user_role=session.get('user_role'))
+    def build_context():
+        result = SupplierController.get_suppliers_with_stats()
+        return {'suppliers': result['suppliers'] if result['success'] else []}
+
+    # Depende también de product por los totales de cada proveedor
+    table_html = _cached_table('suppliers', (Supplier.__tablename__, Product.__tablename__),
+                               'admin/suppliers/_table.html', build_context)
+    return render_template('admin/suppliers/list.html', table_html=table_html, user_role=session.get('user_role'))
+
+@web_bp.route('/admin/suppliers/export')
+@login_required
+@role_required(['admin'])
+def admin_suppliers_export():
+    return _export_response(SupplierController.iter_export_rows(), SUPPLIER_EXPORT_FIELDS, 'proveedores')
 
 @web_bp.route('/admin/suppliers/create', methods=['GET', 'POST'])
 @login_required
@@ -327,18 +498,40 @@ def admin_suppliers_delete(supplier_id):
     return redirect(url_for('web.admin_suppliers_list'))
 
 
+# --- Registro de auditoría (keyset sobre id, del más reciente al más antiguo) ---
+@web_bp.route('/admin/audit')
+@login_required
+@role_required(['admin'])
+def admin_audit_log():
+    filters = {key: request.args.get(key) or None for key in ('entity', 'action', 'actor')}
+    page = AuditController.get_page(before_id=request.args.get('before', type=int),
+                                    per_page=request.args.get('per_page', type=int), **filters)
+    return render_template('admin/audit.html', page=page,
+                           filters={key: value for key, value in filters.items() if value})
+
+# --- Métricas de rendimiento (formato de exposición de Prometheus) ---
+@web_bp.route('/admin/metrics')
+@login_required
+@role_required(['admin'])
+def admin_metrics():
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # --- Ruta para información general del sistema ---
 @web_bp.route('/admin/system_info')
 @login_required
 @role_required(['admin'])
 def admin_system_info():
-    total_products = Product.query.count()
-    total_suppliers = Supplier.query.count()
-    total_users = User.query.count()
-    simulated_sales = 12345.67
+    counts = StatsController.get_entity_counts()['counts']
+    total_products = counts['products']
+    total_suppliers = counts['suppliers']
+    total_users = counts['users']
+    sales = SalesController.get_summary()
     
     return render_template('admin/system_info.html',
                            total_products=total_products,
                            total_suppliers=total_suppliers,
                            total_users=total_users,
-                           simulated_sales=simulated_sales)
\ No newline at end of file
+                           sales=sales,
+                           role_cache_stats=role_cache.stats(),
+                           fragment_cache_stats=fragment_cache.stats(),
+                           snapshot_stats=read_snapshot.stats())
\ No newline at end of file
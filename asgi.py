@@ -0,0 +1,11 @@
+"""Punto de entrada ASGI de la API de solo lectura (ver app/asgi.py).
+
+    gunicorn -c gunicorn_asgi.conf.py asgi:app  # varios workers: ASGI_BIND, ASGI_WORKERS, ASGI_KEEPALIVE
+    uvicorn asgi:app --timeout-keep-alive 75    # un solo proceso
+
+Comparte la base y el SECRET_KEY con la aplicación WSGI de run.py, que
+sigue atendiendo la web, el login y todas las escrituras.
+"""
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1 @@
+"""Benchmarks del sistema (se ejecutan como módulos: python -m benchmarks.<nombre>)."""
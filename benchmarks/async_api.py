@@ -0,0 +1,294 @@
+"""Compara la API de solo lectura síncrona (gunicorn + run.py) con la asíncrona (uvicorn + asgi.py).
+
+Uso:
+
+    python -m benchmarks.async_api --products 10000 --clients 32 --pollers 2000 --duration 10
+    python -m benchmarks.async_api --pollers 2000 --long-poll --output resultados.json
+
+Levanta los dos servidores como subprocesos sobre la misma base temporal,
+con el mismo número de workers (gunicorn sync y gunicorn con workers de uvicorn), e
+inicia sesión como admin. Contra cada uno corren a la vez:
+
+- `--pollers` clientes de sondeo que mantienen su conexión (keep-alive) y
+  consultan /api/v1/stock/alerts cada `--poll-interval` segundos; con
+  `--long-poll` envían además `wait=<--long-poll-wait>`: la API asíncrona
+  retiene la petición hasta que haya alertas o venza el plazo, la síncrona
+  lo ignora y sus clientes siguen sondeando cada `--poll-interval`.
+- `--clients` clientes activos que piden /api/v1/products sin pausa durante
+  `--duration` segundos.
+
+Informa throughput y latencia (p50/p99) de los clientes activos, sondeos
+atendidos, conexiones abiertas por los sondeos (una por sondeo si el
+servidor no admite keep-alive), conexiones vivas al final y errores o
+timeouts. El cliente HTTP es mínimo y corre en un solo event loop: los
+números sirven para comparar los dos servidores en la misma máquina.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.common import make_app
+from benchmarks.data import PASSWORD, generate
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRODUCTS_PATH = '/api/v1/products?per_page=20'
+ALERTS_PATH = '/api/v1/stock/alerts?after={after}'
+
+
+class Connection:
+    """Cliente HTTP/1.1 mínimo con keep-alive; reconecta si el servidor cierra."""
+
+    def __init__(self, port, cookie, timeout):
+        self.port = port
+        self.cookie = cookie
+        self.timeout = timeout
+        self.reader = self.writer = None
+        self.connects = 0
+
+    @property
+    def open(self):
+        return self.writer is not None and not self.reader.at_eof()
+
+    async def get(self, path):
+        return await asyncio.wait_for(self._get(path), self.timeout)
+
+    async def _get(self, path):
+        if not self.open:
+            self.close()
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+            self.connects += 1
+        self.writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {self.cookie}\r\n\r\n'.encode())
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        if 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        else:
+            await self.reader.read()
+        if headers.get('connection') == 'close':
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Tally:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.connects = 0
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        pick = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else None
+        return {
+            'requests': len(latencies),
+            'rps': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            'p99_ms': round(pick(0.99), 2) if latencies else None,
+            'errors': self.errors,
+            'connects': self.connects,
+        }
+
+
+async def _timed(connection, path, tally):
+    started = time.perf_counter()
+    try:
+        status = await connection.get(path)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, IndexError, ValueError):
+        connection.close()
+        tally.errors += 1
+        return
+    if status == 200:
+        tally.latencies.append(time.perf_counter() - started)
+    else:
+        tally.errors += 1
+
+
+async def _active_client(connection, tally, stop):
+    while not stop.is_set():
+        await _timed(connection, PRODUCTS_PATH, tally)
+    tally.connects += connection.connects
+
+
+async def _poller(connection, tally, stop, interval, path):
+    # Arranques repartidos en el intervalo, como clientes reales
+    await asyncio.sleep(random.uniform(0, interval))
+    while not stop.is_set():
+        started = time.perf_counter()
+        await _timed(connection, path, tally)
+        # Con long-poll el servidor ya esperó el intervalo; si respondió antes, se completa aquí
+        remaining = interval - (time.perf_counter() - started)
+        if remaining > 0:
+            try:
+                await asyncio.wait_for(stop.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def run_load(port, cookie, args, after_id):
+    stop = asyncio.Event()
+    polls, active = Tally(), Tally()
+    poll_path = ALERTS_PATH.format(after=after_id)
+    if args.long_poll:
+        poll_path += f'&wait={args.long_poll_wait:g}'
+    timeout = args.timeout + (args.long_poll_wait if args.long_poll else 0)
+    pollers = [Connection(port, cookie, timeout) for _ in range(args.pollers)]
+    poller_tasks = [asyncio.create_task(_poller(c, polls, stop, args.poll_interval, poll_path)) for c in pollers]
+    # Deja que los sondeos se establezcan antes de medir
+    await asyncio.sleep(min(args.poll_interval, 5))
+
+    clients = [Connection(port, cookie, args.timeout) for _ in range(args.clients)]
+    started = time.perf_counter()
+    client_tasks = [asyncio.create_task(_active_client(c, active, stop)) for c in clients]
+    await asyncio.sleep(args.duration)
+    held_open = sum(1 for c in pollers if c.open)
+    stop.set()
+    await asyncio.gather(*client_tasks)
+    elapsed = time.perf_counter() - started
+    for task in poller_tasks:
+        task.cancel()
+    await asyncio.gather(*poller_tasks, return_exceptions=True)
+    polls.connects = sum(c.connects for c in pollers)
+    for connection in pollers + clients:
+        connection.close()
+    return {'active': active.summary(elapsed), 'pollers': {**polls.summary(elapsed), 'held_open': held_open}}
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'El servidor del puerto {port} terminó al arrancar')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'El servidor del puerto {port} no respondió')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_servers(env, workers):
+    sync_port, async_port = _free_port(), _free_port()
+    commands = {
+        'sync': ([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                 {'GUNICORN_BIND': f'127.0.0.1:{sync_port}', 'GUNICORN_WORKERS': str(workers)}, sync_port),
+        'async': ([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_asgi.conf.py', 'asgi:app'],
+                  {'ASGI_BIND': f'127.0.0.1:{async_port}', 'ASGI_WORKERS': str(workers), 'ASGI_KEEPALIVE': '300'},
+                  async_port),
+    }
+    servers = {}
+    for name, (command, extra, port) in commands.items():
+        process = subprocess.Popen(command, cwd=PROJECT_DIR, env={**env, **extra},
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        servers[name] = (process, port)
+    try:
+        for process, port in servers.values():
+            _wait_for_port(port, process)
+    except RuntimeError:
+        stop_servers(servers)
+        raise
+    return servers
+
+
+def stop_servers(servers):
+    for process, _ in servers.values():
+        process.terminate()
+    for process, _ in servers.values():
+        process.wait()
+
+
+def login(port):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}/api/v1/auth/login', headers={'Content-Type': 'application/json'},
+        data=json.dumps({'username': 'admin', 'password': PASSWORD}).encode())
+    with urllib.request.urlopen(request) as response:
+        return response.headers['Set-Cookie'].split(';', 1)[0]
+
+
+def _raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API de solo lectura: gunicorn (sync) contra uvicorn (async).')
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--clients', type=int, default=32, help='Clientes activos sin pausa.')
+    parser.add_argument('--pollers', type=int, default=1000, help='Clientes de sondeo con conexión persistente.')
+    parser.add_argument('--poll-interval', type=float, default=5.0)
+    parser.add_argument('--long-poll', action='store_true', help='Los sondeos envían wait= (solo lo usa la API async).')
+    parser.add_argument('--long-poll-wait', type=float, default=25.0)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--timeout', type=float, default=10.0, help='Timeout por petición (s).')
+    parser.add_argument('--workers', type=int, default=2, help='Workers de cada servidor.')
+    parser.add_argument('--only', choices=('sync', 'async'))
+    parser.add_argument('--output', help='Guarda los resultados en JSON.')
+    args = parser.parse_args()
+
+    limit = _raise_fd_limit()
+    if limit < 2 * (args.pollers + args.clients) + 100:
+        parser.error(f'RLIMIT_NOFILE={limit} no alcanza para {args.pollers + args.clients} conexiones')
+
+    app = make_app()
+    with app.app_context():
+        generate(users=100, suppliers=50, products=args.products)
+    env = dict(os.environ, DATABASE_URL=app.config['SQLALCHEMY_DATABASE_URI'], SECRET_KEY=os.urandom(16).hex(),
+               PASSWORD_HASH_WORKERS='0', PASSWORD_HASH_ALGORITHM='pbkdf2:sha256', PASSWORD_HASH_ITERATIONS='1000',
+               JINJA_BYTECODE_CACHE_DIR='none', AUDIT_BACKEND='none',
+               METRICS_ENABLED='0')
+
+    servers = start_servers(env, args.workers)
+    results = {'args': vars(args)}
+    try:
+        cookie = login(servers['sync'][1])
+        for name in ('sync', 'async'):
+            if args.only and name != args.only:
+                continue
+            # Sin alertas nuevas: los sondeos devuelven listas vacías (el caso común)
+            results[name] = asyncio.run(run_load(servers[name][1], cookie, args, after_id=2 ** 31))
+    finally:
+        stop_servers(servers)
+
+    print(f"{'Servidor':<8}{'activos req/s':>14}{'p50 ms':>9}{'p99 ms':>9}{'errores':>9}"
+          f"{'sondeos':>9}{'p99 ms':>9}{'conexiones':>12}{'abiertas':>10}{'errores':>9}")
+    for name in ('sync', 'async'):
+        if name not in results:
+            continue
+        active, polls = results[name]['active'], results[name]['pollers']
+        print(f"{name:<8}{active['rps']:>14}{active['p50_ms'] or '-':>9}{active['p99_ms'] or '-':>9}{active['errors']:>9}"
+              f"{polls['requests']:>9}{polls['p99_ms'] or '-':>9}{polls['connects']:>12}"
+              f"{polls['held_open']:>10}{polls['errors']:>9}")
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
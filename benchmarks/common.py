@@ -0,0 +1,46 @@
+"""Utilidades compartidas por los benchmarks."""
+import os
+import tempfile
+
+from sqlalchemy import event
+
+from config import Config
+
+
+class BenchmarkConfig(Config):
+    # Hash barato y en el mismo proceso: se mide la aplicación, no el KDF
+    PASSWORD_HASH_WORKERS = 0
+    PASSWORD_HASH_ALGORITHM = 'pbkdf2:sha256'
+    PASSWORD_HASH_ITERATIONS = 1000
+
+
+class StatementCounter:
+    """Cuenta las sentencias enviadas al cursor (sin contar los PRAGMA de conexión)."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('PRAGMA'):
+            self.count += 1
+
+    def measure(self, fn):
+        self.count = 0
+        result = fn()
+        return self.count, result
+
+
+def make_app(config_class=BenchmarkConfig, **overrides):
+    """Crea la aplicación sobre una base SQLite temporal."""
+    from app import create_app, init_db
+
+    tmpdir = tempfile.mkdtemp(prefix='bench-')
+    # Base y plantillas compiladas fuera del árbol de trabajo (nada en instance/)
+    attrs = {'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmpdir, 'bench.db'),
+             'JINJA_BYTECODE_CACHE_DIR': os.path.join(tmpdir, 'jinja_cache')}
+    attrs.update(overrides)
+    config = type('TempBenchmarkConfig', (config_class,), attrs)
+    app = create_app(config)
+    init_db(app)
+    return app
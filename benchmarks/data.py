@@ -0,0 +1,53 @@
+"""Generador determinista de datos sintéticos (usuarios, proveedores y productos).
+
+Uso:
+
+    python -m benchmarks.data --users 1000 --suppliers 200 --products 100000
+
+Con la misma semilla produce siempre las mismas filas, así dos ejecuciones
+del benchmark sobre commits distintos miden exactamente los mismos datos.
+"""
+import argparse
+import time
+
+# Usuarios fijos con los que el benchmark inicia sesión
+FIXED_USERS = [('admin', 'admin'), ('subadmin', 'subadmin')]
+PASSWORD = 'bench123'
+
+
+def generate(users=100, suppliers=20, products=1000, seed=42):
+    """Inserta los datos en la base de la aplicación actual (requiere app context).
+
+    Delega en `app.seeding` (INSERT executemany de Core en una transacción y
+    un único hash de contraseña para los usuarios sintéticos).
+    """
+    from app.models import db
+    from app.seeding import Progress, seed_database
+
+    return seed_database(
+        db.engine, users=users, suppliers=suppliers, products=products, seed=seed,
+        extra_users=[(name, role, PASSWORD) for name, role in FIXED_USERS],
+        progress=Progress(echo=lambda line: None),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos en una base temporal.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--suppliers', type=int, default=20)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from benchmarks.common import make_app
+
+    app = make_app()
+    with app.app_context():
+        start = time.perf_counter()
+        totals = generate(args.users, args.suppliers, args.products, args.seed)
+        elapsed = time.perf_counter() - start
+    print(f"✅ {totals} en {elapsed:.2f}s — {app.config['SQLALCHEMY_DATABASE_URI']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+"""Benchmark de todas las rutas de `web_bp` con sesiones de admin y subadmin.
+
+Uso:
+
+    python -m benchmarks.routes --products 10000 --iterations 50 --output resultados.json
+    python -m benchmarks.routes --compare resultados.json   # compara con una ejecución anterior
+    python -m benchmarks.routes --max-repeats 3              # falla (exit 1) ante un N+1
+
+Por ruta y rol informa latencia (p50/p90/p99), throughput, sentencias SQL
+por petición, la sentencia más repetida (N+1) y códigos de respuesta. Los resultados se guardan en JSON para
+comparar regresiones entre commits.
+"""
+import argparse
+import io
+import json
+import statistics
+import subprocess
+import time
+
+from app.query_diagnostics import track_queries
+from benchmarks.common import make_app
+from benchmarks.data import FIXED_USERS, PASSWORD, generate
+
+BOTH = ('admin', 'subadmin')
+ADMIN = ('admin',)
+
+
+class Scenario:
+    """Una ruta a medir: método, URL y formulario en función del número de iteración."""
+
+    def __init__(self, endpoint, url, method='GET', data=None, roles=BOTH, setup=None):
+        self.endpoint = endpoint
+        self.url = url
+        self.method = method
+        self.data = data
+        self.roles = roles
+        self.setup = setup
+
+
+def _create_products(prefix):
+    """Setup de los escenarios de borrado: crea una fila desechable por iteración."""
+    def setup(iterations):
+        from app.models import db, Product
+        ids = []
+        for i in range(iterations):
+            product = Product(name=f'{prefix}-{i}', price=1, stock=1)
+            db.session.add(product)
+            db.session.flush()
+            ids.append(product.id)
+        db.session.commit()
+        return ids
+    return setup
+
+
+def _create_suppliers(prefix):
+    def setup(iterations):
+        from app.models import db, Supplier
+        ids = []
+        for i in range(iterations):
+            supplier = Supplier(name=f'{prefix}-{i}')
+            db.session.add(supplier)
+            db.session.flush()
+            ids.append(supplier.id)
+        db.session.commit()
+        return ids
+    return setup
+
+
+def _create_users(prefix):
+    def setup(iterations):
+        from app.models import db, User
+        ids = []
+        for i in range(iterations):
+            user = User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@bench.local', password='x', role='user')
+            db.session.add(user)
+            db.session.flush()
+            ids.append(user.id)
+        db.session.commit()
+        return ids
+    return setup
+
+
+def build_scenarios():
+    """Escenarios por endpoint. `i` es la iteración y `ids` lo que devolvió `setup`."""
+    def product_form(name):
+        return {'name': name, 'description': 'benchmark', 'price': '9.99', 'stock': '25', 'supplier_id': '1'}
+
+    def supplier_form(name):
+        return {'name': name, 'contact_person': 'Bench', 'phone': '099', 'email': f'{name}@bench.local'}
+
+    return [
+        Scenario('web.index', lambda i, ids: '/'),
+        Scenario('web.login', lambda i, ids: '/login', 'POST', lambda i, role: {'username': role, 'password': PASSWORD}),
+        Scenario('web.register', lambda i, ids: '/register', 'POST',
+                 lambda i, role: {'username': f'reg-{role}-{i}', 'email': f'reg-{role}-{i}@bench.local', 'password': 'x'}),
+        Scenario('web.dashboard', lambda i, ids: '/dashboard'),
+        Scenario('web.logout', lambda i, ids: '/logout'),
+        Scenario('web.list_users', lambda i, ids: '/users'),
+        Scenario('web.edit_user', lambda i, ids: '/users/edit/3'),
+        Scenario('web.delete_user', lambda i, ids: f'/users/delete/{ids[i]}', 'POST', roles=ADMIN,
+                 setup=_create_users('bench-del-user')),
+        Scenario('web.admin_dashboard', lambda i, ids: '/admin'),
+        Scenario('web.admin_system_info', lambda i, ids: '/admin/system_info'),
+        Scenario('web.admin_audit_log', lambda i, ids: '/admin/audit?entity=product', roles=ADMIN),
+        Scenario('web.admin_metrics', lambda i, ids: '/admin/metrics', roles=ADMIN),
+        Scenario('web.admin_products_list', lambda i, ids: '/admin/products'),
+        Scenario('web.admin_products_list', lambda i, ids: f'/admin/products?after={i * 50}&max_stock=10&sort=-price'),
+        Scenario('web.admin_products_search', lambda i, ids: '/admin/products/search?q=mango+hielo'),
+        Scenario('web.admin_products_low_stock', lambda i, ids: '/admin/products/low-stock'),
+        Scenario('web.admin_products_export', lambda i, ids: '/admin/products/export?format=csv', roles=ADMIN),
+        Scenario('web.admin_products_import', lambda i, ids: '/admin/products/import', 'POST',
+                 lambda i, role: {'file': (io.BytesIO(f'name,price,stock\nimp-{role}-{i},1,1\n'.encode()), 'p.csv')},
+                 roles=ADMIN),
+        Scenario('web.admin_products_create', lambda i, ids: '/admin/products/create', 'POST',
+                 lambda i, role: product_form(f'bench-{role}-{i}'), roles=ADMIN),
+        Scenario('web.admin_products_edit', lambda i, ids: '/admin/products/edit/2', 'POST',
+                 lambda i, role: product_form(f'bench-edit-{role}-{i}')),
+        Scenario('web.admin_products_bulk', lambda i, ids: '/admin/products/bulk', 'POST',
+                 lambda i, role: {'scope': 'filter', 'supplier_id': '2', 'operation': 'price_percent', 'value': '1'},
+                 roles=ADMIN),
+        Scenario('web.admin_products_delete', lambda i, ids: f'/admin/products/delete/{ids[i]}', 'POST', roles=ADMIN,
+                 setup=_create_products('bench-del-product')),
+        Scenario('web.admin_suppliers_list', lambda i, ids: '/admin/suppliers', roles=ADMIN),
+        Scenario('web.admin_suppliers_export', lambda i, ids: '/admin/suppliers/export?format=ndjson', roles=ADMIN),
+        Scenario('web.admin_suppliers_create', lambda i, ids: '/admin/suppliers/create', 'POST',
+                 lambda i, role: supplier_form(f'bench-{role}-{i}'), roles=ADMIN),
+        Scenario('web.admin_suppliers_edit', lambda i, ids: '/admin/suppliers/edit/2', 'POST',
+                 lambda i, role: supplier_form(f'bench-edit-{role}-{i}'), roles=ADMIN),
+        Scenario('web.admin_suppliers_delete', lambda i, ids: f'/admin/suppliers/delete/{ids[i]}', 'POST', roles=ADMIN,
+                 setup=_create_suppliers('bench-del-supplier')),
+    ]
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _login(client, user_ids, role):
+    # Sesión directa: no se mide el hash de contraseña en cada escenario
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_ids[role]
+        sess['username'] = role
+        sess['user_role'] = role
+
+
+def check_budgets(results, max_statements=None, max_repeats=None):
+    """Rutas cuya peor iteración supera el presupuesto de consultas."""
+    failures = []
+    for row in results:
+        label = f"{row['method']} {row['url']} ({row['role']})"
+        if max_statements is not None and row['sql_max'] > max_statements:
+            failures.append(f"{label}: {row['sql_max']} sentencias (máximo {max_statements})")
+        if max_repeats is not None and row['sql_max_repeat'] > max_repeats:
+            failures.append(f"{label}: {row['sql_max_repeat']} repeticiones de una sentencia (máximo {max_repeats})")
+    return failures
+
+
+def run(users, suppliers, products, iterations, seed):
+    from app.models import db, User
+
+    app = make_app()
+    with app.app_context():
+        generate(users, suppliers, products, seed)
+        user_ids = {role: User.query.filter_by(username=role).first().id for role, _ in FIXED_USERS}
+        engine = db.engine
+
+    scenarios = build_scenarios()
+    covered = {s.endpoint for s in scenarios}
+    missing = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                     if rule.endpoint.startswith('web.') and rule.endpoint not in covered)
+
+    results = []
+    for scenario in scenarios:
+        for role in scenario.roles:
+            ids = []
+            if scenario.setup:
+                with app.app_context():
+                    ids = scenario.setup(iterations)
+            client = app.test_client()
+            latencies, queries, repeats, statuses = [], [], [], {}
+            started = time.perf_counter()
+            for i in range(iterations):
+                _login(client, user_ids, role)
+                url = scenario.url(i, ids)
+                data = scenario.data(i, role) if scenario.data else None
+                with track_queries(engine) as log:
+                    t0 = time.perf_counter()
+                    response = client.open(url, method=scenario.method, data=data)
+                    response.get_data()
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                queries.append(log.total)
+                repeats.append(log.max_repeat())
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            elapsed = time.perf_counter() - started
+            results.append({
+                'endpoint': scenario.endpoint,
+                'method': scenario.method,
+                'url': scenario.url(0, ids or [0]),
+                'role': role,
+                'iterations': iterations,
+                'p50_ms': round(_percentile(latencies, 50), 3),
+                'p90_ms': round(_percentile(latencies, 90), 3),
+                'p99_ms': round(_percentile(latencies, 99), 3),
+                'mean_ms': round(statistics.fmean(latencies), 3),
+                'throughput_rps': round(iterations / elapsed, 1),
+                'sql_per_request': round(statistics.fmean(queries), 2),
+                'sql_max': max(queries),
+                'sql_max_repeat': max(repeats),
+                'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            })
+    return results, missing
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(row):
+    return (row['method'], row['url'], row['role'])
+
+
+def print_results(results, baseline=None):
+    previous = {_key(row): row for row in (baseline or {}).get('results', [])}
+    header = f"{'Ruta':<60}{'Rol':<10}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}{'SQL':>7}{'Rep':>5}  Estados"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        line = (f"{row['method'] + ' ' + row['url']:<60.60}{row['role']:<10}{row['p50_ms']:>9.2f}"
+                f"{row['p99_ms']:>9.2f}{row['throughput_rps']:>9.1f}{row['sql_per_request']:>7.1f}{row['sql_max_repeat']:>5}  {row['statuses']}")
+        old = previous.get(_key(row))
+        if old:
+            delta = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+            line += f"  (p50 {delta:+.0f}%, SQL {old['sql_per_request']:.1f}→{row['sql_per_request']:.1f})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las rutas web.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--suppliers', type=int, default=20)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Archivo JSON donde guardar los resultados.')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para comparar.')
+    parser.add_argument('--max-statements', type=int, help='Falla si alguna ruta supera estas sentencias por petición.')
+    parser.add_argument('--max-repeats', type=int, help='Falla si alguna ruta repite la misma sentencia más veces (N+1).')
+    args = parser.parse_args()
+
+    results, missing = run(args.users, args.suppliers, args.products, args.iterations, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+    print_results(results, baseline)
+    if missing:
+        print(f"\n⚠️ Rutas de web_bp sin escenario: {', '.join(missing)}")
+
+    if args.output:
+        report = {
+            'commit': _git_commit(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'params': vars(args),
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados guardados en {args.output}")
+
+    failures = check_budgets(results, args.max_statements, args.max_repeats)
+    if failures:
+        print('\n❌ Presupuesto de consultas superado:')
+        for failure in failures:
+            print(f'  - {failure}')
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
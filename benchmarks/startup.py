@@ -0,0 +1,64 @@
+"""Tiempo de arranque: import de la aplicación + `create_app`, en procesos nuevos.
+
+Uso:
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --runs 10 --init-db   # incluye además init_db()
+
+Cada medición corre en un intérprete nuevo, como un worker o un script de
+CLI recién lanzado, para que el costo de los imports no quede cacheado.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app, init_db
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+if {init_db}:
+    init_db(app)
+t3 = time.perf_counter()
+print(json.dumps({{'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000, 'init_db_ms': (t3 - t2) * 1000}}))
+"""
+
+
+def measure(runs, init_db):
+    samples = []
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as tmpdir:
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmpdir, 'startup.db'),
+                   JINJA_BYTECODE_CACHE_DIR=os.path.join(tmpdir, 'jinja'))
+        for _ in range(runs):
+            output = subprocess.check_output([sys.executable, '-c', PROBE.format(init_db=init_db)],
+                                             cwd=PROJECT_DIR, env=env, text=True)
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mide el arranque de la aplicación.')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--init-db', action='store_true', help='Incluye la creación/verificación del esquema.')
+    args = parser.parse_args()
+
+    samples = measure(args.runs, args.init_db)
+    keys = ['import_ms', 'create_app_ms'] + (['init_db_ms'] if args.init_db else [])
+    print(f"{'Fase':<16}{'mediana ms':>12}{'mín ms':>10}{'máx ms':>10}")
+    for key in keys:
+        values = [sample[key] for sample in samples]
+        print(f"{key[:-3]:<16}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+    totals = [sum(sample[key] for key in keys) for sample in samples]
+    print(f"{'total':<16}{statistics.median(totals):>12.1f}{min(totals):>10.1f}{max(totals):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Cuenta las sentencias SQL que emite cada operación de escritura de los controladores.
+
+Uso:
+
+    python -m benchmarks.write_queries
+    python -m benchmarks.write_queries --output resultados.json
+    python -m benchmarks.write_queries --compare benchmarks/write_queries_baseline.json
+
+Se ejecuta contra una base SQLite temporal. `write_queries_baseline.json`
+guarda los números del código anterior a las escrituras en un solo viaje
+(validación por restricciones UNIQUE y claves foráneas) para comparar.
+"""
+import argparse
+import json
+import subprocess
+import time
+
+from benchmarks.common import StatementCounter, make_app
+
+
+def run():
+    from app.controllers.auth_controller import AuthController
+    from app.controllers.product_controller import ProductController
+    from app.controllers.supplier_controller import SupplierController
+    from app.models import db
+
+    app = make_app()
+
+    operations = [
+        ('register_user', lambda: AuthController.register_user('bench', 'bench@example.com', 'secret')),
+        ('register_user (duplicado)', lambda: AuthController.register_user('bench', 'other@example.com', 'secret')),
+        ('update_user', lambda: AuthController.update_user(1, username='bench2', email='bench2@example.com', role='subadmin')),
+        ('create_supplier', lambda: SupplierController.create_supplier('Bench', 'Ana', '099', 'bench@supplier.com')),
+        ('create_supplier (duplicado)', lambda: SupplierController.create_supplier('Bench', 'Ana', '099', 'x@supplier.com')),
+        ('update_supplier', lambda: SupplierController.update_supplier(1, name='Bench 2', email='bench2@supplier.com')),
+        ('create_product', lambda: ProductController.create_product('Producto', 'desc', 9.99, 10, 1)),
+        ('create_product (duplicado)', lambda: ProductController.create_product('Producto', 'desc', 9.99, 10, 1)),
+        ('update_product', lambda: ProductController.update_product(1, name='Producto 2', price=5.0, stock=3, supplier_id=1)),
+        ('delete_product', lambda: ProductController.delete_product(1)),
+        ('delete_supplier', lambda: SupplierController.delete_supplier(1)),
+        ('delete_user', lambda: AuthController.delete_user(1)),
+    ]
+
+    results = []
+    with app.app_context():
+        counter = StatementCounter(db.engine)
+        for name, fn in operations:
+            count, result = counter.measure(fn)
+            db.session.remove()
+            results.append({'operation': name, 'statements': count, 'message': result['message']})
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {row['operation']: row for row in (baseline or {}).get('results', [])}
+    header = f"{'Operación':<32}{'Sentencias':>12}{'Antes':>8}  Resultado"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        old = previous.get(row['operation'])
+        before = f"{old['statements']:>8}" if old else f"{'':>8}"
+        print(f"{row['operation']:<32}{row['statements']:>12}{before}  {row['message']}")
+    if previous:
+        now = sum(row['statements'] for row in results if row['operation'] in previous)
+        then = sum(previous[row['operation']]['statements'] for row in results if row['operation'] in previous)
+        print(f"\nTotal: {then} → {now} sentencias (línea base: {baseline.get('commit') or 'sin commit'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sentencias SQL por operación de escritura.')
+    parser.add_argument('--output', help='Archivo JSON donde guardar los resultados.')
+    parser.add_argument('--compare', help='JSON de una ejecución anterior para comparar.')
+    args = parser.parse_args()
+
+    results = run()
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            'commit': _git_commit(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados guardados en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
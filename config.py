@@ -1,7 +1,80 @@
 import os
 
 class Config:
-    SECRET_KEY = '12345'
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'tu-clave-secreta-super-segura-12345')
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'database.db')
+    # Ruta relativa: Flask-SQLAlchemy la resuelve dentro de la carpeta instance/
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Perfil de SQLite para varios workers (se aplica en cada conexión nueva)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negativo = KiB
+    # Las claves foráneas validan proveedor_id en la misma sentencia de escritura
+    SQLITE_FOREIGN_KEYS = os.environ.get('SQLITE_FOREIGN_KEYS', 'ON')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_pre_ping': True,
+    }
+    # Tamaño de página del listado de productos (paginación por keyset)
+    PRODUCTS_PER_PAGE = int(os.environ.get('PRODUCTS_PER_PAGE', 50))
+    # Segundos que un rol permanece en el cache de autorización (0 lo desactiva); cualquier
+    # cambio en la tabla user lo invalida en todos los procesos (ver app/role_cache.py)
+    ROLE_CACHE_TTL = int(os.environ.get('ROLE_CACHE_TTL', 30))
+    # Cada cuántos segundos se relee la versión de la tabla user: demora máxima con la que
+    # otro worker ve un cambio de rol o una baja (0 = en cada petición)
+    ROLE_CACHE_VERSION_TTL = float(os.environ.get('ROLE_CACHE_VERSION_TTL', 1.0))
+    # Hashing de contraseñas (ver app/password_hasher.py). Por defecto scrypt, el de Werkzeug:
+    # los hashes existentes no se reescriben. 'scrypt:N:r:p' sube el costo; 'pbkdf2:sha256' es
+    # más rápido pero sin dureza de memoria, y los hashes scrypt se convertirían al iniciar sesión
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'scrypt')
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 600000))  # solo pbkdf2
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # 0 = en el mismo proceso
+    PASSWORD_HASH_MAX_CONCURRENT = int(os.environ.get('PASSWORD_HASH_MAX_CONCURRENT', 4))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    # Copia de solo lectura para exportaciones, listados y agregados (ver app/snapshot.py).
+    # Ej.: SNAPSHOT_DATABASE_URL=sqlite:///snapshot.db (ruta relativa: dentro de instance/)
+    SNAPSHOT_DATABASE_URL = os.environ.get('SNAPSHOT_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'snapshot': SNAPSHOT_DATABASE_URL} if SNAPSHOT_DATABASE_URL else {}
+    SNAPSHOT_MAX_STALENESS = float(os.environ.get('SNAPSHOT_MAX_STALENESS', 30))  # segundos; más viejo -> base principal
+    SNAPSHOT_REFRESH_INTERVAL = float(os.environ.get('SNAPSHOT_REFRESH_INTERVAL', 10))  # segundos entre renovaciones
+    # API asíncrona de solo lectura (asgi.py, ver app/asgi.py): conexiones aiosqlite y long-poll de alertas
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 8))
+    ASYNC_DB_MAX_OVERFLOW = int(os.environ.get('ASYNC_DB_MAX_OVERFLOW', 8))
+    ASYNC_DB_POOL_TIMEOUT = int(os.environ.get('ASYNC_DB_POOL_TIMEOUT', 30))
+    ASYNC_ALERTS_MAX_WAIT = float(os.environ.get('ASYNC_ALERTS_MAX_WAIT', 30))  # segundos máximos de ?wait=
+    ASYNC_ALERTS_POLL_INTERVAL = float(os.environ.get('ASYNC_ALERTS_POLL_INTERVAL', 0.5))
+    # Filas por transacción en la importación masiva de productos
+    PRODUCT_IMPORT_BATCH_SIZE = int(os.environ.get('PRODUCT_IMPORT_BATCH_SIZE', 5000))
+    # Respuestas de la API mayores a este tamaño (bytes) se comprimen con gzip
+    API_GZIP_MIN_SIZE = int(os.environ.get('API_GZIP_MIN_SIZE', 1024))
+    # Cache de fragmentos de los listados: 'memory' (LRU por proceso), 'file' (compartido) o 'none'
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR')  # por defecto instance/fragment_cache
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 512))
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    FRAGMENT_CACHE_VERSION_TTL = float(os.environ.get('FRAGMENT_CACHE_VERSION_TTL', 1.0))
+    # Plantillas compiladas en disco ('none' lo desactiva; por defecto instance/jinja_cache)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+    # Auditoría: 'table' (audit_log), 'ndjson' (archivos rotados en AUDIT_DIR) o 'none'
+    AUDIT_BACKEND = os.environ.get('AUDIT_BACKEND', 'table')
+    AUDIT_DIR = os.environ.get('AUDIT_DIR')  # por defecto instance/audit
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 500))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+    AUDIT_ENQUEUE_TIMEOUT = float(os.environ.get('AUDIT_ENQUEUE_TIMEOUT', 0.05))
+    AUDIT_FILE_MAX_BYTES = int(os.environ.get('AUDIT_FILE_MAX_BYTES', 10 * 1024 * 1024))
+    AUDIT_FILE_BACKUPS = int(os.environ.get('AUDIT_FILE_BACKUPS', 5))
+    # Instrumentación por petición expuesta en /admin/metrics (formato Prometheus)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') not in ('0', 'false', 'False')
+    METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', 1.0))  # fracción con histogramas
+    # Detector de N+1 y consultas lentas (desarrollo/staging, ver app/query_diagnostics.py)
+    QUERY_DIAGNOSTICS_ENABLED = os.environ.get('QUERY_DIAGNOSTICS_ENABLED', '0') in ('1', 'true', 'True')
+    QUERY_DIAGNOSTICS_MODE = os.environ.get('QUERY_DIAGNOSTICS_MODE', 'warn')  # 'warn' o 'raise'
+    QUERY_DIAGNOSTICS_REPEAT_THRESHOLD = int(os.environ.get('QUERY_DIAGNOSTICS_REPEAT_THRESHOLD', 5))
+    QUERY_DIAGNOSTICS_SLOW_MS = float(os.environ.get('QUERY_DIAGNOSTICS_SLOW_MS', 100))
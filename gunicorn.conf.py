@@ -0,0 +1,39 @@
+"""Configuración de gunicorn: `gunicorn -c gunicorn.conf.py run:app`.
+
+Con `preload_app` la aplicación se importa y se crea una sola vez en el
+master y los workers la heredan con fork, así que arrancan sin volver a
+importar Flask/SQLAlchemy ni compilar plantillas. El esquema no se toca al
+arrancar: ejecutar `flask --app run init-db` antes del despliegue.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', min(4, multiprocessing.cpu_count())))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') not in ('0', 'false', 'False')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+
+def when_ready(server):
+    # En el master y antes del fork: las plantillas compiladas quedan en
+    # memoria compartida (copy-on-write) para todos los workers
+    if preload_app:
+        from app.extensions import precompile_templates
+        total = precompile_templates(server.app.wsgi())
+        server.log.info('%d plantillas precompiladas', total)
+
+
+def worker_exit(server, worker):
+    # Vuelca los eventos de auditoría pendientes antes de que el worker termine
+    from app.audit import audit_log
+    audit_log.shutdown()
+
+
+def post_fork(server, worker):
+    # Las conexiones SQLite no se pueden compartir entre procesos: cada worker
+    # descarta las que hubiera abierto el master y abre las suyas
+    if preload_app:
+        from app.extensions import db
+        with server.app.wsgi().app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
@@ -0,0 +1,24 @@
+"""Configuración de gunicorn para la API asíncrona: `gunicorn -c gunicorn_asgi.conf.py asgi:app`.
+
+gunicorn solo gestiona los procesos; cada worker es un event loop de
+uvicorn. A diferencia de `uvicorn --workers N`, gunicorn activa TCP_NODELAY
+en el socket que escucha y las conexiones aceptadas lo heredan: sin él cada
+respuesta con keep-alive espera ~40 ms (Nagle + ACK retardado).
+"""
+import importlib.util
+import multiprocessing
+import os
+
+# `uvicorn.workers` está obsoleto en uvicorn recientes: se prefiere el
+# paquete uvicorn-worker si está instalado
+if importlib.util.find_spec('uvicorn_worker'):
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+bind = os.environ.get('ASGI_BIND', '127.0.0.1:8001')
+workers = int(os.environ.get('ASGI_WORKERS', min(4, multiprocessing.cpu_count())))
+keepalive = int(os.environ.get('ASGI_KEEPALIVE', 75))
+backlog = int(os.environ.get('ASGI_BACKLOG', 4096))
+# Los long-poll de /stock/alerts?wait=N no bloquean el worker; el timeout solo vigila que siga vivo
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
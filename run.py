@@ -1,6 +1,8 @@
-from app import create_app
+from app import create_app, init_db
 
 app = create_app()
 
 if __name__ == '__main__':
+    # Servidor de desarrollo: crea el esquema si falta (en producción: flask init-db)
+    init_db(app)
     app.run(debug=True)
\ No newline at end of file
@@ -1,9 +1,18 @@
-from app import create_app
+"""Datos de prueba.
+
+Sin argumentos crea el catálogo de demostración. Para volúmenes grandes usa
+la carga masiva de `app.seeding` (equivale a `flask --app run seed ...`):
+
+    python seed_data.py --users 10000 --suppliers 1000 --products 1000000
+"""
+import argparse
+
+from app import create_app, init_db
 from app.models import db, Product, Supplier
+from app.seeding import DEFAULT_BATCH_SIZE, HASH_MODES, Progress, seed_database
 
-app = create_app()
 
-with app.app_context():
+def seed_demo():
     # Crear proveedores
     if Supplier.query.count() == 0:
         suppliers = [
@@ -17,8 +26,8 @@ with app.app_context():
     
     # Crear productos
     if Product.query.count() == 0:
-        supplier1 = Supplier.query.filter_by(name='Proveedor A').first()
-        supplier2 = Supplier.query.filter_by(name='Proveedor B').first()
+        supplier1 = Supplier.query.filter_by(name='ZEN').first()
+        supplier2 = Supplier.query.filter_by(name='Death Row').first()
         
         products = [
             Product(name='Laptop HP', description='Laptop de alto rendimiento', price=899.99, stock=15, supplier_id=supplier1.id if supplier1 else None),
@@ -31,4 +40,32 @@ with app.app_context():
         db.session.commit()
         print("✅ Productos creados")
     
-    print("\n🎉 Datos de prueba creados exitosamente")
\ No newline at end of file
+    print("\n🎉 Datos de prueba creados exitosamente")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crea datos de prueba.')
+    parser.add_argument('--users', type=int, default=0)
+    parser.add_argument('--suppliers', type=int, default=0)
+    parser.add_argument('--products', type=int, default=0)
+    parser.add_argument('--sales', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--hash-mode', choices=HASH_MODES, default='shared')
+    args = parser.parse_args()
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        if not (args.users or args.suppliers or args.products or args.sales):
+            seed_demo()
+            return
+        progress = Progress()
+        totals = seed_database(db.engine, users=args.users, suppliers=args.suppliers, products=args.products,
+                               sales=args.sales, seed=args.seed, batch_size=args.batch_size, hash_mode=args.hash_mode,
+                               progress=progress)
+        print(f"\n🎉 {totals}: {progress.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Prueba de estrés de escrituras concurrentes sobre SQLite.
+
+Simula varios workers de gunicorn (un proceso por worker) creando y
+actualizando productos a la vez a través de ProductController, y cuenta los
+errores "database is locked". Uso:
+
+    python stress_writes.py --workers 4 --ops 200
+"""
+import argparse
+import multiprocessing
+import time
+
+from sqlalchemy.exc import OperationalError
+
+
+def worker(worker_id, ops, results):
+    from app import create_app
+    from app.controllers.product_controller import ProductController
+    from app.models import db
+
+    app = create_app()
+    ok = locked = 0
+    try:
+        with app.app_context():
+            for i in range(ops):
+                try:
+                    result = ProductController.create_product(f'stress-{worker_id}-{i}', 'stress', 1.0, i)
+                    if result['success']:
+                        ProductController.update_product(result['product']['id'], stock=i + 1)
+                    ok += 1
+                except OperationalError as exc:
+                    db.session.rollback()
+                    if 'locked' not in str(exc):
+                        raise
+                    locked += 1
+    finally:
+        results.put((ok, locked))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=200)
+    args = parser.parse_args()
+
+    # Crear el esquema una sola vez antes de lanzar los workers
+    from app import create_app, init_db
+    init_db(create_app())
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(n, args.ops, results))
+                 for n in range(args.workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    ok = sum(t[0] for t in totals)
+    locked = sum(t[1] for t in totals)
+    print(f"✅ {ok} operaciones correctas, ❌ {locked} 'database is locked' "
+          f"en {elapsed:.2f}s ({ok * 2 / elapsed:.0f} escrituras/s)")
+
+
+if __name__ == '__main__':
+    main()
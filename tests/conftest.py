@@ -0,0 +1,110 @@
+import pytest
+
+from app import create_app, init_db
+from app.extensions import db
+from app.fragment_cache import fragment_cache
+from app.models import Product, Supplier, User
+from app.password_hasher import password_hasher
+from app.role_cache import role_cache
+from config import Config
+
+pytest_plugins = ['app.query_budget_plugin']
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SECRET_KEY = 'tests'
+    # Hash barato y en el mismo proceso
+    PASSWORD_HASH_WORKERS = 0
+    PASSWORD_HASH_ALGORITHM = 'pbkdf2:sha256'
+    PASSWORD_HASH_ITERATIONS = 1000
+    SQLALCHEMY_BINDS = {}
+    FRAGMENT_CACHE_BACKEND = 'memory'
+    JINJA_BYTECODE_CACHE_DIR = 'none'
+    AUDIT_BACKEND = 'none'
+    METRICS_ENABLED = False
+    QUERY_DIAGNOSTICS_ENABLED = False
+
+
+def _reset_process_caches():
+    # Singletons por proceso: cada test tiene su base y sus versiones de tabla
+    role_cache.clear()
+    fragment_cache.forget_versions()
+    if fragment_cache._backend:
+        fragment_cache._backend.clear()
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = type('TempTestConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+    })
+    app = create_app(config)
+    init_db(app)
+    _reset_process_caches()
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    _reset_process_caches()
+
+
+@pytest.fixture
+def ctx(app):
+    """Contexto de aplicación para llamar a los controladores sin pasar por una petición.
+
+    Las rutas se prueban sin él: cada petición del cliente abre su propio
+    contexto y su propia sesión de SQLAlchemy, como en producción.
+    """
+    with app.app_context():
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def catalog(app):
+    """Tres proveedores y treinta productos; los cinco primeros con stock bajo el umbral."""
+    with app.app_context():
+        suppliers = [Supplier(name=f'Proveedor {i}', email=f'p{i}@test.local') for i in range(3)]
+        db.session.add_all(suppliers)
+        db.session.flush()
+        db.session.add_all([
+            Product(name=f'Producto {i:02d}', description=f'Descripción {i}', price=10.0 + i,
+                    stock=2 if i < 5 else 50, reorder_threshold=10, supplier_id=suppliers[i % 3].id)
+            for i in range(30)
+        ])
+        db.session.commit()
+        return {'suppliers': [s.id for s in suppliers],
+                'products': [p.id for p in Product.query.order_by(Product.id)]}
+
+
+def _make_user(app, username, role):
+    with app.app_context():
+        user = User(username=username, email=f'{username}@test.local', password=password_hasher.hash('secreto'),
+                    role=role)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def _login(client, user_id, role):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['username'] = f'{role}-test'
+        session['user_role'] = role
+    return client
+
+
+@pytest.fixture
+def admin_id(app):
+    return _make_user(app, 'admin', 'admin')
+
+
+@pytest.fixture
+def admin_client(app, admin_id):
+    return _login(app.test_client(), admin_id, 'admin')
+
+
+@pytest.fixture
+def subadmin_client(app):
+    return _login(app.test_client(), _make_user(app, 'subadmin', 'subadmin'), 'subadmin')
@@ -0,0 +1,24 @@
+from flask import Flask
+
+from app import create_app, init_db
+from tests.conftest import TestingConfig
+
+
+def test_create_app_does_not_touch_the_filesystem(tmp_path, monkeypatch):
+    instance = tmp_path / 'instance'
+    monkeypatch.setattr(Flask, 'auto_find_instance_path', lambda self: str(instance))
+    config = type('RelativePathConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///relativa.db',
+        'JINJA_BYTECODE_CACHE_DIR': None,
+    })
+
+    app = create_app(config)
+
+    assert not instance.exists()
+    assert app.config['SQLALCHEMY_DATABASE_URI'] == f"sqlite:///{instance / 'relativa.db'}"
+
+    init_db(app)
+    assert (instance / 'relativa.db').exists()
+    assert not (instance / 'jinja_cache').exists()
+    assert app.test_client().get('/login').status_code == 200
+    assert any((instance / 'jinja_cache').iterdir())
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.audit import TableBackend, make_event
+from app.extensions import db
+from app.models import AuditLog
+
+
+@pytest.fixture
+def audit_rows(app):
+    TableBackend(app).write([make_event('update', 'product', 1, {'price': [1, 2]}),
+                             make_event('delete', 'user', 2)])
+    return 2
+
+
+def test_audit_log_rejects_update(ctx, audit_rows):
+    with pytest.raises(IntegrityError, match='solo inserción'):
+        db.session.execute(update(AuditLog).values(action='tampered'))
+    db.session.rollback()
+    assert db.session.execute(select(func.count()).where(AuditLog.action == 'tampered')).scalar() == 0
+
+
+def test_audit_log_rejects_delete(ctx, audit_rows):
+    with pytest.raises(IntegrityError, match='solo inserción'):
+        db.session.execute(delete(AuditLog))
+    db.session.rollback()
+    assert db.session.execute(select(func.count()).select_from(AuditLog)).scalar() == audit_rows
+
+
+def test_audit_page_lists_events(audit_rows, admin_client):
+    response = admin_client.get('/admin/audit?entity=product')
+    assert response.status_code == 200
+    assert b'product' in response.data
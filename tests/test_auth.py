@@ -0,0 +1,82 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.controllers.auth_controller import AuthController
+from app.extensions import db
+from app.models import User, bump_table_version, get_table_version
+from app.password_hasher import password_hasher
+from app.role_cache import role_cache
+
+
+def _change_role_elsewhere(app, user_id, role):
+    # Otro worker: su invalidate() no llega a la cache de este proceso
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(User.__table__.update().where(User.id == user_id).values(role=role))
+            bump_table_version(connection, User.__tablename__)
+
+
+def test_demotion_in_other_worker_applies_after_version_ttl(app, admin_client, admin_id):
+    assert admin_client.get('/admin/suppliers').status_code == 200
+    assert admin_client.get('/admin/suppliers').status_code == 200  # rol ya en cache
+
+    _change_role_elsewhere(app, admin_id, 'user')
+    assert admin_client.get('/admin/suppliers').status_code == 200  # versión de `user` aún memorizada
+
+    role_cache.forget_version()  # vence ROLE_CACHE_VERSION_TTL
+    assert admin_client.get('/admin/suppliers').status_code == 403
+    assert admin_client.get('/api/v1/suppliers').status_code == 403
+
+
+def test_deleted_user_loses_access(app, admin_client, admin_id):
+    app.config['ROLE_CACHE_VERSION_TTL'] = 0
+    assert admin_client.get('/api/v1/users').status_code == 200
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(User.__table__.delete().where(User.id == admin_id))
+            bump_table_version(connection, User.__tablename__)
+    assert admin_client.get('/api/v1/users').status_code == 403
+
+
+@pytest.mark.parametrize('configured, stored, rehash', [
+    ('scrypt', 'scrypt', False),
+    ('scrypt', 'scrypt:16384:8:1', True),
+    ('scrypt', 'pbkdf2:sha256:1000', True),
+    ('pbkdf2:sha256', 'pbkdf2:sha256:1000', False),
+    ('pbkdf2:sha256', 'pbkdf2:sha256:2000', True),
+    ('pbkdf2:sha256', 'scrypt', True),
+])
+def test_needs_rehash_compares_parameters(app, ctx, configured, stored, rehash):
+    app.config['PASSWORD_HASH_ALGORITHM'] = configured
+    app.config['PASSWORD_HASH_ITERATIONS'] = 1000
+    assert password_hasher.needs_rehash(generate_password_hash('secreto', stored)) is rehash
+
+
+def test_login_keeps_current_hash(app, admin_id):
+    with app.app_context():
+        stored = db.session.get(User, admin_id).password
+    response = app.test_client().post('/api/v1/auth/login', json={'username': 'admin', 'password': 'secreto'})
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(User, admin_id).password == stored
+
+
+def test_login_rehash_keeps_user_version(app, admin_id):
+    app.config['PASSWORD_HASH_ITERATIONS'] = 2000
+    with app.app_context():
+        stored = db.session.get(User, admin_id).password
+        version = get_table_version(User.__tablename__).version
+    response = app.test_client().post('/api/v1/auth/login', json={'username': 'admin', 'password': 'secreto'})
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(User, admin_id).password != stored
+        assert get_table_version(User.__tablename__).version == version
+
+
+def test_rejected_update_leaves_no_pending_changes(ctx, admin_id):
+    result = AuthController.update_user(admin_id, username='renombrado', role='root')
+    assert not result['success']
+
+    db.session.commit()  # otra escritura de la misma petición
+    db.session.expire_all()
+    assert db.session.get(User, admin_id).username == 'admin'
@@ -0,0 +1,57 @@
+from app.extensions import db
+from app.models import Product, bump_table_version
+
+
+def test_etag_changes_after_write(catalog, admin_client):
+    first = admin_client.get('/api/v1/products')
+    etag = first.headers['ETag']
+    assert admin_client.get('/api/v1/products', headers={'If-None-Match': etag}).status_code == 304
+
+    product_id = catalog['products'][0]
+    assert admin_client.put(f'/api/v1/products/{product_id}', json={'price': 99.5}).status_code == 200
+
+    response = admin_client.get('/api/v1/products', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert any(product['price'] == 99.5 for product in response.get_json()['products'])
+
+
+def test_supplier_rename_invalidates_product_etag(catalog, admin_client):
+    etag = admin_client.get('/api/v1/products').headers['ETag']
+    supplier_id = catalog['suppliers'][0]
+    assert admin_client.put(f'/api/v1/suppliers/{supplier_id}', json={'name': 'Renombrado'}).status_code == 200
+    assert admin_client.get('/api/v1/products', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_fragment_cache_invalidated_by_commit(catalog, admin_client):
+    assert b'Producto 00' in admin_client.get('/admin/products').data
+    product_id = catalog['products'][0]
+
+    response = admin_client.post(f'/admin/products/edit/{product_id}', data={
+        'name': 'Editado', 'description': '', 'price': '10', 'stock': '2', 'reorder_threshold': '10',
+        'supplier_id': str(catalog['suppliers'][0]),
+    })
+    assert response.status_code == 302
+
+    html = admin_client.get('/admin/products').data
+    assert b'Editado' in html and b'Producto 00' not in html
+
+
+def test_fragment_cache_sees_other_process_writes(app, catalog, admin_client):
+    # Otro worker: escribe sin pasar por esta sesión; se ve al releer las versiones
+    app.config['FRAGMENT_CACHE_VERSION_TTL'] = 0
+    admin_client.get('/admin/products')
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(Product.__table__.update().where(Product.id == catalog['products'][0])
+                               .values(name='Desde otro proceso'))
+            bump_table_version(connection, Product.__tablename__)
+
+    assert b'Desde otro proceso' in admin_client.get('/admin/products').data
+
+
+def test_low_stock_badge_follows_product_version(catalog, admin_client):
+    assert b'<span class="badge">5</span>' in admin_client.get('/admin/products').data
+    response = admin_client.post('/api/v1/stock/adjust', json={'lines': [{'product_id': catalog['products'][0], 'delta': 20}]})
+    assert response.status_code == 200
+    assert b'<span class="badge">4</span>' in admin_client.get('/admin/products').data
@@ -0,0 +1,135 @@
+import io
+
+import pytest
+from sqlalchemy import text
+
+from app import init_db
+from app.controllers.product_controller import ProductController
+from app.extensions import db
+from app.models import Product, Supplier
+
+
+class _ConcurrentWriter(io.StringIO):
+    """CSV que, a mitad de la lectura, simula otro proceso creando un nombre y borrando un proveedor."""
+
+    def __init__(self, data, engine, on_line):
+        super().__init__(data)
+        self.engine = engine
+        self.on_line = on_line
+        self.lines = 0
+
+    def __next__(self):
+        self.lines += 1
+        if self.lines == self.on_line:
+            with self.engine.begin() as connection:
+                connection.execute(Product.__table__.insert().values(name='Duplicado', price=1, stock=1, version=1,
+                                                                     reorder_threshold=10))
+                connection.execute(Supplier.__table__.delete().where(Supplier.name == 'Temporal'))
+        return super().__next__()
+
+
+def test_import_reports_rows_rejected_by_concurrent_writes(ctx):
+    db.session.add(Supplier(name='Temporal'))
+    db.session.commit()
+    supplier_id = Supplier.query.filter_by(name='Temporal').one().id
+    data = ('name,price,stock,supplier_id\n'
+            'Primero,1,1,\n'
+            'Duplicado,2,2,\n'
+            f'Sin proveedor,3,3,{supplier_id}\n'
+            'Precio malo,x,1,\n'
+            'Último,5,5,\n')
+
+    result = ProductController.import_products(_ConcurrentWriter(data, db.engine, on_line=3), 'csv', batch_size=100)
+
+    assert result['imported'] == 2
+    assert [(error['line'], error['message']) for error in result['errors']] == [
+        (3, 'Ya existe un producto con ese nombre'),
+        (4, 'Proveedor no encontrado'),
+        (5, 'Precio, stock o umbral inválido'),
+    ]
+    names = {name for (name,) in db.session.query(Product.name)}
+    assert {'Primero', 'Último', 'Duplicado'} <= names and 'Sin proveedor' not in names
+
+
+def test_bulk_price_delta_is_all_or_nothing(ctx, catalog):
+    ids = catalog['products'][:3]  # precios 10, 11 y 12
+
+    result = ProductController.bulk_update('price_delta', -10.5, product_ids=ids)
+
+    assert not result['success']
+    assert '1 productos' in result['message']
+    db.session.expire_all()
+    assert sorted(p.price for p in Product.query.filter(Product.id.in_(ids))) == [10.0, 11.0, 12.0]
+
+    result = ProductController.bulk_update('price_delta', -10, product_ids=ids)
+    assert result['success'] and result['updated'] == 3
+
+
+def test_bulk_update_requires_a_target(ctx, catalog):
+    assert not ProductController.bulk_update('stock_set', 0)['success']
+
+
+def test_bulk_update_reports_busy_database(ctx, catalog):
+    with db.engine.connect() as other:
+        other.exec_driver_sql('PRAGMA busy_timeout = 0')
+        other.exec_driver_sql('BEGIN IMMEDIATE')
+        db.session.connection().exec_driver_sql('PRAGMA busy_timeout = 0')
+        result = ProductController.bulk_update('stock_set', 1, product_ids=catalog['products'][:2])
+        other.exec_driver_sql('ROLLBACK')
+    assert not result['success']
+    assert 'ocupada' in result['message']
+
+
+def test_init_db_backfills_missing_search_index(app, catalog):
+    with app.app_context():
+        for name in ('product_fts_ai', 'product_fts_ad', 'product_fts_au', 'product_fts_supplier_au'):
+            db.session.execute(text(f'DROP TRIGGER {name}'))
+        db.session.execute(text('DROP TABLE product_fts'))
+        db.session.commit()
+
+    init_db(app)
+
+    with app.app_context():
+        result = ProductController.search_products('producto')
+        assert len(result['products']) == min(30, result['per_page'])
+
+
+@pytest.mark.parametrize('terms', ['descripción 7', 'proveedor 1'])
+def test_search_matches_description_and_supplier(ctx, catalog, terms):
+    assert ProductController.search_products(terms)['products']
+
+
+@pytest.mark.parametrize('method, body', [
+    ('post', {'name': 'Nuevo', 'price': 'abc'}),
+    ('post', {'name': 'Nuevo', 'price': 1, 'stock': 'x'}),
+    ('post', {'name': 'Nuevo', 'price': 1, 'reorder_threshold': 2.5}),
+    ('post', ['Nuevo', 1]),
+    ('put', {'price': 'nan'}),
+    ('put', {'stock': [1]}),
+    ('put', ['Nuevo']),
+])
+def test_product_api_rejects_invalid_numbers(catalog, admin_client, method, body):
+    path = '/api/v1/products' if method == 'post' else f"/api/v1/products/{catalog['products'][0]}"
+    response = getattr(admin_client, method)(path, json=body)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+
+
+def test_product_api_accepts_numeric_strings(catalog, admin_client):
+    response = admin_client.post('/api/v1/products', json={'name': 'Nuevo', 'price': '2.5', 'stock': '3',
+                                                          'reorder_threshold': 0})
+    assert response.status_code == 201
+    product = response.get_json()['product']
+    assert (product['price'], product['stock'], product['reorder_threshold']) == (2.5, 3, 0)
+
+
+def test_import_keeps_zero_reorder_threshold(ctx):
+    data = ('name,price,stock,reorder_threshold\n'
+            'Sin umbral,1,1,0\n'
+            'Umbral por defecto,1,1,\n')
+
+    result = ProductController.import_products(io.StringIO(data), 'csv')
+
+    assert result['imported'] == 2 and not result['errors']
+    thresholds = dict(db.session.query(Product.name, Product.reorder_threshold))
+    assert thresholds == {'Sin umbral': 0, 'Umbral por defecto': 10}
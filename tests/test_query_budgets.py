@@ -0,0 +1,48 @@
+"""Presupuestos de SQL por ruta con 30 productos: sin N+1 y aciertos de cache sin consultar las filas."""
+import pytest
+
+# Cada ruta lee la versión de una a tres tablas (rol, ETag, fragmentos) con la
+# misma sentencia; un N+1 sobre los productos se repetiría ~30 veces
+MAX_REPEATS = 3
+
+# Ruta -> máximo de sentencias en frío (el rol y las versiones de tabla cuentan)
+ROUTE_BUDGETS = {
+    '/admin': 9,
+    '/admin/products': 7,
+    '/admin/products?min_stock=10&sort=-price': 7,
+    '/admin/products/search?q=producto': 6,
+    '/admin/products/low-stock': 6,
+    '/admin/suppliers': 5,
+    '/users': 4,
+    '/api/v1/products': 5,
+    '/api/v1/suppliers': 4,
+    '/api/v1/stock/alerts': 4,
+}
+
+
+@pytest.mark.parametrize('path', sorted(ROUTE_BUDGETS))
+def test_route_budget(catalog, admin_client, query_budget, path):
+    with query_budget(max_statements=ROUTE_BUDGETS[path], max_repeats=MAX_REPEATS):
+        response = admin_client.get(path)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('path', ['/admin/products', '/admin/suppliers', '/users'])
+def test_cached_list_skips_the_database(catalog, admin_client, query_budget, path):
+    admin_client.get(path)
+    # Rol, versiones de tabla, fragmento y contador de stock bajo en cache: ninguna sentencia
+    with query_budget(max_statements=0):
+        response = admin_client.get(path)
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def products_etag(catalog, admin_client):
+    return admin_client.get('/api/v1/products').headers['ETag']
+
+
+@pytest.mark.query_budget(max_statements=2)
+def test_not_modified_skips_rows(admin_client, products_etag):
+    # Versiones de `product` y `supplier` (ETag), sin leer productos; el rol sale del cache
+    response = admin_client.get('/api/v1/products', headers={'If-None-Match': products_etag})
+    assert response.status_code == 304
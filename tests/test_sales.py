@@ -0,0 +1,43 @@
+from sqlalchemy import select
+
+from app.controllers.sales_controller import SalesController
+from app.extensions import db
+from app.models import DailySales, Product, ProductSales, StockMovement
+
+
+def _rollups():
+    daily = {row.day: (round(row.revenue, 2), row.units, row.sales) for row in db.session.scalars(select(DailySales))}
+    by_product = {row.product_id: (round(row.revenue, 2), row.units)
+                  for row in db.session.scalars(select(ProductSales))}
+    return daily, by_product
+
+
+def test_incremental_rollups_match_recompute(ctx, catalog):
+    first, second, third = catalog['products'][10:13]
+    assert SalesController.record_movements([{'product_id': first, 'quantity': 2},
+                                             {'product_id': second, 'quantity': 1, 'unit_price': 7.25}])['success']
+    assert SalesController.record_movements([{'product_id': first, 'quantity': 3, 'unit_price': 19.99}])['success']
+    assert SalesController.record_movements([{'product_id': third, 'quantity': 4}], kind='restock')['success']
+    assert SalesController.record_movements([{'product_id': third, 'quantity': 1}])['success']
+
+    incremental = _rollups()
+    SalesController.recompute_rollups()
+    db.session.expire_all()
+
+    assert _rollups() == incremental
+    daily, by_product = incremental
+    assert set(by_product) == {first, second, third}
+    assert sum(units for _, units, _ in daily.values()) == 7
+
+
+def test_failed_sale_writes_nothing(ctx, catalog):
+    low, high = catalog['products'][0], catalog['products'][10]
+
+    result = SalesController.record_movements([{'product_id': high, 'quantity': 1},
+                                               {'product_id': low, 'quantity': 5}])
+
+    assert not result['success']
+    db.session.expire_all()
+    assert db.session.get(Product, high).stock == 50
+    assert db.session.scalar(select(StockMovement.id)) is None
+    assert _rollups() == ({}, {})
@@ -0,0 +1,67 @@
+import pytest
+
+from app.controllers.product_controller import ProductController
+from app.controllers.stock_controller import StockController
+from app.extensions import db
+from app.models import Product, StockAlert, get_table_version
+
+
+def _stocks(ids):
+    db.session.expire_all()
+    return {product.id: (product.stock, product.version) for product in Product.query.filter(Product.id.in_(ids))}
+
+
+def test_adjust_stock_is_all_or_nothing(ctx, catalog):
+    low, high = catalog['products'][0], catalog['products'][10]
+    before = _stocks([low, high])
+    version = get_table_version(Product.__tablename__).version
+
+    result = ProductController.adjust_stock([(high, -5), (low, -3)])
+
+    assert not result['success']
+    assert _stocks([low, high]) == before
+    db.session.expire_all()
+    assert get_table_version(Product.__tablename__).version == version
+
+
+def test_adjust_stock_applies_every_line(ctx, catalog):
+    first, second = catalog['products'][10], catalog['products'][11]
+
+    result = ProductController.adjust_stock([(first, -5), (second, 7), (first, -1)])
+
+    assert result['success']
+    assert {pid: stock for pid, (stock, _) in _stocks([first, second]).items()} == {first: 44, second: 57}
+
+
+def test_adjust_stock_api_conflict(catalog, admin_client, app):
+    low = catalog['products'][0]
+    response = admin_client.post('/api/v1/stock/adjust', json={'lines': [{'product_id': low, 'delta': -3}]})
+    assert response.status_code == 409
+    with app.app_context():
+        assert db.session.get(Product, low).stock == 2
+
+
+def test_watchlist_follows_stock_changes(ctx, catalog):
+    restored, lowered = catalog['products'][0], catalog['products'][10]
+    assert StockController.count_low_stock() == 5
+
+    ProductController.adjust_stock([(restored, 20), (lowered, -45)])
+
+    listed = {item['id'] for item in StockController.get_low_stock()['products']}
+    assert restored not in listed and lowered in listed
+    kinds = {(alert.product_id, alert.kind) for alert in StockAlert.query}
+    assert {(restored, 'restored'), (lowered, 'low')} <= kinds
+
+
+@pytest.mark.parametrize('body', [
+    [{'product_id': 1, 'delta': 1}],
+    {'lines': {'product_id': 1, 'delta': 1}},
+    {'lines': []},
+    {'lines': [{'product_id': 1, 'delta': 'x'}]},
+    {'lines': [{'product_id': 1}]},
+    {'lines': [5]},
+])
+def test_adjust_stock_api_rejects_malformed_body(catalog, admin_client, body):
+    response = admin_client.post('/api/v1/stock/adjust', json=body)
+    assert response.status_code == 400
+    assert not response.get_json()['success']